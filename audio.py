@@ -4,18 +4,21 @@
 Audio utility module for HOORCH.
 
 Provides functions to play audio files (blocking and non-blocking), determine
-audio durations using external tools (soxi and ffprobe fallback), record and
-process story recordings, and helper utilities.
+audio durations (cached in `audio_index`, with soxi and ffprobe as fallback for
+formats that cannot be parsed in-process), record and process story
+recordings, and helper utilities.
 
-This file is designed to be robust when `soxi -D` outputs non-trivial text or
-when the duration might appear on stderr. It attempts soxi first and falls back
-to ffprobe. If both fail, a sensible default wait time is used.
+The soxi/ffprobe fallback is designed to be robust when `soxi -D` outputs
+non-trivial text or when the duration might appear on stderr. If both fail, a
+sensible default wait time is used.
 """
 
 import logging
 import os
 import re
+import shutil
 import subprocess
+import threading
 import time
 from datetime import datetime
 from pathlib import Path
@@ -23,7 +26,14 @@ from typing import Optional, Tuple
 
 from dotenv import load_dotenv
 
+import audio_cache
+import audio_engine
+import audio_index
 import env_tools
+import recorder
+import settings
+import speech_cache
+import story_processing
 
 # Load environment variables from .env file (override defaults)
 dotenv_path = "/home/pi/hoorch/.env"
@@ -77,10 +87,24 @@ else:
 # Path to the data directory
 data_path = Path("./data")
 
+# Story recording in progress (see record_story/stop_recording)
+_recorder: Optional[recorder.StoryRecorder] = None
+
 
 def init():
-    """Initialize audio subsystem (placeholder)."""
+    """Open the audio engine and start the background jobs.
+
+    Updates the duration and loudness index, resumes story post-processing
+    and pre-renders the eSpeak phrases.
+    """
     logger.info("Audio driver set to 'alsa' for sox recording.")
+    if audio_engine.init():
+        audio_cache.preload_in_background()
+    audio_index.build_in_background(
+        data_path, _get_duration_from_soxi_or_ffprobe, loudness=True
+    )
+    story_processing.start()
+    speech_cache.prerender_in_background(settings.speaker_volume(10))
 
 
 def wait_for_reader():
@@ -162,7 +186,7 @@ def _get_duration_from_soxi_or_ffprobe(file_path: Path) -> Optional[float]:
 
 def get_audio_length(folder, audiofile) -> Optional[float]:
     """
-    Determine audio length.
+    Determine audio length (from the duration index; computed once per file version).
 
     `folder` may be a Path-like relative to data/ or an absolute path starting with 'data'.
     `audiofile` is the filename.
@@ -172,116 +196,126 @@ def get_audio_length(folder, audiofile) -> Optional[float]:
     else:
         file_path = Path(folder) / audiofile
 
-    return _get_duration_from_soxi_or_ffprobe(file_path)
+    return audio_index.get_duration(file_path, _get_duration_from_soxi_or_ffprobe)
 
 
-def play_full(folder, audiofile):
+def play_full(folder, audiofile, cancel: Optional[threading.Event] = None):
     """
     Blocking play of a numbered TTS file located at data/<folder>/<nnn>.mp3
 
     `audiofile` expected to be an integer id for the filename formatting.
+    Setting the optional `cancel` event stops playback early.
     """
-    load_dotenv(override=True)
-    SPEAKER_VOLUME = int(os.getenv("SPEAKER_VOLUME", "10"))
+    SPEAKER_VOLUME = settings.speaker_volume(10)
 
     file_path = data_path / folder / f"{audiofile:03d}.mp3"
     logger.info("Playing full audio file: %s", file_path)
 
     try:
-        duration = get_audio_length(file_path.parent, file_path.name)
-        waitingtime = (
-            duration if duration is not None else 1.0
-        ) + WAITTIME_OFFSET
-
-        cmd = ["play", str(file_path), "vol", str(SPEAKER_VOLUME / 100)]
-        logger.info("Executing: %s", " ".join(cmd))
-        subprocess.Popen(
-            cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
-        )
-
-        logger.debug(
-            "Waiting time for audio file %s: %s seconds", file_path, waitingtime
-        )
-        time.sleep(waitingtime)
+        playback = audio_engine.play(file_path, SPEAKER_VOLUME / 100, cancel=cancel)
+        playback.wait()
     except Exception as e:
         logger.error("Error playing audio file %s: %s", file_path, e)
 
 
 def play_file(
-    folder, audiofile: str, return_process: bool = False
-) -> Optional[Tuple[subprocess.Popen, float]]:
+    folder,
+    audiofile: str,
+    return_process: bool = False,
+    cancel: Optional[threading.Event] = None,
+) -> Optional[Tuple[audio_engine.Playback, float]]:
     """
-    Non-blocking play for sounds in data/<folder>/<audiofile>.
+    Play a sound in data/<folder>/<audiofile>.
 
-    Returns either (process, waitingtime) if return_process=True, or None and sleeps for waitingtime.
+    With return_process=True this does not block and returns
+    (playback handle, waitingtime); otherwise it returns None once the clip
+    has finished. Setting the optional `cancel` event stops playback early.
     """
-    load_dotenv(override=True)
-    SPEAKER_VOLUME = int(os.getenv("SPEAKER_VOLUME", "50"))
+    SPEAKER_VOLUME = settings.speaker_volume(50)
 
     file_path = data_path / folder / audiofile
-    duration = get_audio_length(file_path.parent, file_path.name)
-    waitingtime = (duration if duration is not None else 1.0) + WAITTIME_OFFSET
 
     logger.info("Playing audio file: %s", file_path)
     logger.info("SpeakerVol: %s", SPEAKER_VOLUME / 100)
-    cmd = ["play", str(file_path), "vol", str(SPEAKER_VOLUME / 100)]
-    process = subprocess.Popen(
-        cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
-    )
+    playback = audio_engine.play(file_path, SPEAKER_VOLUME / 100, cancel=cancel)
 
     if return_process:
-        return process, waitingtime
+        duration = get_audio_length(file_path.parent, file_path.name)
+        waitingtime = (duration if duration is not None else 1.0) + WAITTIME_OFFSET
+        return playback, waitingtime
     else:
-        time.sleep(waitingtime)
+        playback.wait()
         return None
 
 
+def _clip_path(folder, audiofile) -> Path:
+    if isinstance(audiofile, int):
+        audiofile = f"{audiofile:03d}.mp3"
+    return data_path / folder / audiofile
+
+
+def play_sequence(
+    clips,
+    interrupt=None,
+    wait: bool = True,
+    cancel: Optional[threading.Event] = None,
+) -> Optional[audio_engine.Sequence]:
+    """
+    Play several clips back to back without gaps.
+
+    `clips` is a list of (folder, audiofile) pairs; an integer audiofile is a
+    numbered TTS file as in play_full. `interrupt` is an optional predicate
+    checked at every clip boundary on the audio engine's monitor thread, so it
+    must not block (no reader scans); when it returns True the rest of the sequence is skipped and the returned handle
+    has `interrupted` set. Setting the optional `cancel` event stops the
+    sequence at once. With wait=False the handle is returned right away.
+    """
+    paths = [_clip_path(folder, audiofile) for folder, audiofile in clips]
+    if not paths:
+        return None
+    SPEAKER_VOLUME = settings.speaker_volume(50)
+
+    logger.info("Playing sequence: %s", ", ".join(str(p) for p in paths))
+    sequence = audio_engine.play_sequence(
+        paths, SPEAKER_VOLUME / 100, interrupt, cancel
+    )
+    if wait:
+        sequence.wait()
+    return sequence
+
+
 def play_story(figure_id):
     """
-    Play a story file for a given figure (non-blocking).
+    Play a story file for a given figure; returns the playback handle once it ended.
 
+    Stories are streamed from disk instead of being decoded into memory.
     `figure_id` is expected to have attribute `rfid_tag`.
     """
-    load_dotenv(override=True)
-    SPEAKER_VOLUME = int(os.getenv("SPEAKER_VOLUME", "50"))
+    SPEAKER_VOLUME = settings.speaker_volume(50)
 
     file_path = (
         data_path / "figures" / figure_id.rfid_tag / f"{figure_id.rfid_tag}.mp3"
     )
-    duration = get_audio_length(file_path.parent, file_path.name)
-    waitingtime = (duration if duration is not None else 1.0) + WAITTIME_OFFSET
 
     logger.info("Playing story for figure: %s", figure_id.rfid_tag)
-    logger.info("Waiting time: %s", waitingtime)
 
-    cmd = ["play", str(file_path), "vol", str(SPEAKER_VOLUME / 100)]
-    process = subprocess.Popen(
-        cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
-    )
-    time.sleep(waitingtime)
-    return process
+    playback = audio_engine.play(file_path, SPEAKER_VOLUME / 100, stream=True)
+    playback.wait()
+    return playback
 
 
 def kill_sounds():
-    """Stop all playing sounds by killing `play` processes."""
+    """Stop all sounds started through the audio engine."""
     logger.info("Stopping all sounds.")
     try:
-        subprocess.run(
-            ["killall", "-q", "play"],
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
-            check=False,
-        )
+        audio_engine.stop_all()
     except Exception as e:
-        logger.debug("Could not kill sounds: %s", e)
+        logger.debug("Could not stop sounds: %s", e)
 
 
 def file_is_playing(audiofile: str) -> bool:
-    """Return True if `audiofile` appears in the current process list."""
-    output = subprocess.run(["ps", "ax"], stdout=subprocess.PIPE).stdout.decode(
-        "utf-8"
-    )
-    is_playing = audiofile in output
+    """Return True if a clip whose file name ends with `audiofile` is playing."""
+    is_playing = audio_engine.is_playing(audiofile)
     logger.debug("File %s is playing: %s", audiofile, is_playing)
     return is_playing
 
@@ -300,105 +334,52 @@ def record_story(figure):
         today = datetime.today().strftime("%Y-%m-%d")
         file_path.rename(file_path.with_name(f"{today}_{file_path.name}"))
 
-    execute_record = f"AUDIODEV=plughw:0,0 rec -c 1 -r 48000 -b 16 --encoding signed-integer {file_path}"
-    logger.info("Starting record: %s", execute_record)
-    subprocess.Popen(execute_record, shell=True, stdout=None, stderr=None)
+    global _recorder
+    if _recorder is not None:
+        _recorder.stop()
+    _recorder = recorder.StoryRecorder(file_path)
+    _recorder.start()
     logger.info("Started recording to %s", file_path)
 
 
-def trim_normalize_clean_audio(
-    file_path: Path,
-    trim_length: float = 0.2,
-    loudness: int = -24,
-    bitrate: str = "192k",
-) -> None:
-    """
-    Trim the start of an MP3, apply a highpass filter and loudness normalization,
-    and overwrite the original file.
-    """
-    logger_local = logging.getLogger(__name__)
+def _story_files(figure_dir: Path) -> list:
+    """Stories in `figure_dir`, without hidden in-progress files."""
+    return [p for p in figure_dir.iterdir() if not p.name.startswith(".")]
 
-    trimmed_file = file_path.with_suffix(".trimmed.mp3")
-    normalized_file = file_path.with_suffix(".normalized.mp3")
 
-    try:
-        # Trim beginning using ffmpeg (fast copy)
-        trim_cmd = [
-            "ffmpeg",
-            "-y",
-            "-ss",
-            str(trim_length),
-            "-i",
-            str(file_path),
-            "-c",
-            "copy",
-            str(trimmed_file),
-        ]
-        subprocess.run(
-            trim_cmd,
-            check=True,
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
-        )
-
-        # Apply highpass + loudnorm
-        audio_filter = f"highpass=f=80,loudnorm=I={loudness}:TP=-2.0:LRA=11"
-        normalize_cmd = [
-            "ffmpeg",
-            "-y",
-            "-i",
-            str(trimmed_file),
-            "-filter:a",
-            audio_filter,
-            "-c:a",
-            "libmp3lame",
-            "-b:a",
-            bitrate,
-            str(normalized_file),
-        ]
-        subprocess.run(
-            normalize_cmd,
-            check=True,
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
-        )
-
-        # Replace original
-        normalized_file.replace(file_path)
-        trimmed_file.unlink(missing_ok=True)
-
-        logger_local.info(
-            "Processed audio: %s (trim=%ss, loudness=%s LUFS)",
-            file_path,
-            trim_length,
-            loudness,
-        )
-    except subprocess.CalledProcessError as e:
-        logger_local.error("ffmpeg process failed: %s", e)
-    except Exception as e:
-        logger_local.error("Error processing %s: %s", file_path, e)
+def _remove_figure_dir(figure_dir: Path) -> None:
+    """Delete a figure directory that holds no stories (hidden leftovers included)."""
+    shutil.rmtree(figure_dir, ignore_errors=True)
+    logger.info("Deleted empty figure directory: %s", figure_dir)
 
 
 def stop_recording(figure_id):
-    """Stop recording (kill rec) and post-process the latest recording for the given figure."""
-    subprocess.Popen("killall rec", shell=True, stdout=None, stderr=None)
+    """Stop recording and prune the latest recording for the given figure.
+
+    The recorder trims, filters and encodes while recording, so the story is
+    playable right away; loudness normalization is queued in
+    `story_processing` and runs in the background.
+    """
+    global _recorder
+    recorded = None
+    if _recorder is not None:
+        recorded = _recorder.stop()
+        _recorder = None
     logger.info("Stopped recording for figure: %s", figure_id)
 
     figure_dir = data_path / "figures" / figure_id.rfid_tag
     mp3_file = figure_dir / f"{figure_id.rfid_tag}.mp3"
 
-    # If file exists, process and possibly prune
+    # If file exists, possibly prune
     if mp3_file.is_file():
-        trim_normalize_clean_audio(mp3_file)
         # If file is smaller than 50kB, delete it and handle directory contents
         if mp3_file.stat().st_size < 50000:
             mp3_file.unlink()
             logger.warning("Deleted small/incomplete recording: %s", mp3_file)
-            files_in_dir = list(figure_dir.iterdir())
+            files_in_dir = _story_files(figure_dir)
 
             if not files_in_dir:
-                figure_dir.rmdir()
-                logger.info("Deleted empty figure directory: %s", figure_dir)
+                _remove_figure_dir(figure_dir)
             else:
                 sorted_files = sorted(
                     files_in_dir, key=lambda x: x.stat().st_mtime, reverse=True
@@ -408,14 +389,15 @@ def stop_recording(figure_id):
                 logger.info(
                     "Renamed latest file %s to %s", latest_file, mp3_file
                 )
+        elif recorded is not None:
+            story_processing.enqueue(mp3_file)
         return True
     else:
         # No final mp3 file present yet; try to pick the latest temporary file
-        files_in_dir = list(figure_dir.iterdir()) if figure_dir.exists() else []
+        files_in_dir = _story_files(figure_dir) if figure_dir.exists() else []
         if not files_in_dir:
             if figure_dir.exists():
-                figure_dir.rmdir()
-                logger.info("Deleted empty figure directory: %s", figure_dir)
+                _remove_figure_dir(figure_dir)
             return True
         else:
             sorted_files = sorted(
@@ -428,11 +410,14 @@ def stop_recording(figure_id):
 
 
 def espeaker(words: str):
-    """Speak given words using espeak and aplay (blocking)."""
-    load_dotenv(dotenv_path, override=True)
-    SPEAKER_VOLUME = int(os.getenv("SPEAKER_VOLUME", "10"))
+    """Speak given words (blocking); phrases are synthesized once and cached."""
+    SPEAKER_VOLUME = settings.speaker_volume(10)
 
     logger.info("Speaking words: %s", words)
+    wav_file = speech_cache.render(str(words), SPEAKER_VOLUME)
+    if wav_file is not None:
+        audio_engine.play(wav_file).wait()
+        return
     execute_espeak = f'espeak -v de+f2 -p 30 -g 12 -s 170 -a {SPEAKER_VOLUME} --stdout "{words}" | aplay -D "default"'
     os.system(execute_espeak)
     logger.debug("Executed eSpeak command for words: %s", words)
@@ -447,9 +432,8 @@ def delete_story(figure):
         mp3_file.unlink()
         logger.info("Deleted story file: %s", mp3_file)
 
-        if not any(figure_dir.iterdir()):
-            figure_dir.rmdir()
-            logger.info("Deleted empty figure directory: %s", figure_dir)
+        if not _story_files(figure_dir):
+            _remove_figure_dir(figure_dir)
         return True
     else:
         logger.warning("Story file not found for deletion: %s", mp3_file)
@@ -0,0 +1,179 @@
+"""
+Memory-capped LRU cache of decoded clips for the audio engine.
+
+Decoding an MP3 into a `pygame.mixer.Sound` takes far longer than starting
+playback of an already decoded buffer, and the same prompts (round start/end,
+"waiting" sound, score announcements) are played over and over. This cache
+keeps decoded Sounds keyed by path, mtime and size and evicts the least
+recently used ones once `max_bytes` of PCM is held.
+
+Play counts per file are persisted in PLAY_COUNTS_FILE; `preload()` (started
+by `audio.init()`) decodes HOT_CLIPS and the most played files ahead of time.
+"""
+
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+from logger_util import get_logger
+
+logger = get_logger(__name__, "logs/audio.log")
+
+data_path = Path("./data")
+PLAY_COUNTS_FILE = data_path / ".audio_play_counts.json"
+max_bytes = 24 * 1024 * 1024  # decoded PCM kept in memory at most
+preload_count = 40  # most played files decoded at startup
+save_every = 20  # persist play counts after this many plays
+
+# Prompts every game uses; preloaded even before any play counts exist
+HOT_CLIPS = (
+    "TTS/054.mp3",
+    "TTS/059.mp3",
+    "TTS/080.mp3",
+    "sounds/waiting.mp3",
+)
+
+_cache: "OrderedDict[tuple, tuple]" = OrderedDict()  # key -> (Sound, bytes)
+_cached_bytes = 0
+_play_counts: Optional[dict] = None
+_unsaved_plays = 0
+_lock = threading.RLock()
+
+
+def _cache_key(path: Path) -> Optional[tuple]:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return (os.path.normpath(str(path)), st.st_mtime_ns, st.st_size)
+
+
+def _pcm_bytes(sound) -> int:
+    import pygame
+
+    frequency, size, channels = pygame.mixer.get_init()
+    return int(sound.get_length() * frequency * channels * abs(size) // 8)
+
+
+def _load_counts() -> dict:
+    global _play_counts
+    if _play_counts is None:
+        try:
+            with open(PLAY_COUNTS_FILE, "r", encoding="utf-8") as f:
+                _play_counts = {k: int(v) for k, v in json.load(f).items()}
+        except FileNotFoundError:
+            _play_counts = {}
+        except (ValueError, OSError) as e:
+            logger.warning("Ignoring unreadable play counts %s: %s", PLAY_COUNTS_FILE, e)
+            _play_counts = {}
+    return _play_counts
+
+
+def save_counts() -> None:
+    global _unsaved_plays
+    with _lock:
+        data = dict(_load_counts())
+        _unsaved_plays = 0
+    tmp_path = f"{PLAY_COUNTS_FILE}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, PLAY_COUNTS_FILE)
+    except OSError as e:
+        logger.warning("Could not write play counts %s: %s", PLAY_COUNTS_FILE, e)
+
+
+def _count_play(name: str) -> None:
+    global _unsaved_plays
+    with _lock:
+        counts = _load_counts()
+        counts[name] = counts.get(name, 0) + 1
+        _unsaved_plays += 1
+        save = _unsaved_plays >= save_every
+    if save:
+        save_counts()
+
+
+def _insert(key: tuple, sound) -> None:
+    global _cached_bytes
+    size = _pcm_bytes(sound)
+    if size > max_bytes:
+        return
+    _cache[key] = (sound, size)
+    _cached_bytes += size
+    while _cached_bytes > max_bytes:
+        _, (_, evicted) = _cache.popitem(last=False)
+        _cached_bytes -= evicted
+
+
+def _decode(path: Path, key: Optional[tuple]):
+    import pygame
+
+    sound = pygame.mixer.Sound(str(path))
+    if key is not None:
+        with _lock:
+            if key not in _cache:
+                _insert(key, sound)
+    return sound
+
+
+def get(path, count: bool = True):
+    """Return the decoded Sound for `path`, decoding and caching it on a miss."""
+    path = Path(path)
+    key = _cache_key(path)
+    if count and key is not None:
+        _count_play(key[0])
+    with _lock:
+        entry = _cache.get(key) if key is not None else None
+        if entry is not None:
+            _cache.move_to_end(key)
+            return entry[0]
+    return _decode(path, key)
+
+
+def preload(limit: Optional[int] = None) -> int:
+    """Decode HOT_CLIPS and the most played files. Returns the number decoded."""
+    limit = preload_count if limit is None else limit
+    with _lock:
+        counts = dict(_load_counts())
+    names = [os.path.normpath(str(data_path / clip)) for clip in HOT_CLIPS]
+    names += [n for n, _ in sorted(counts.items(), key=lambda kv: -kv[1]) if n not in names]
+
+    loaded = 0
+    for name in names[:limit]:
+        path = Path(name)
+        key = _cache_key(path)
+        if key is None or key in _cache:
+            continue
+        try:
+            _decode(path, key)
+            loaded += 1
+        except Exception as e:
+            logger.debug("Could not preload %s: %s", path, e)
+        if _cached_bytes >= max_bytes:
+            break
+    logger.info("Preloaded %d clips (%d kB decoded)", loaded, _cached_bytes // 1024)
+    return loaded
+
+
+def preload_in_background(limit: Optional[int] = None) -> threading.Thread:
+    thread = threading.Thread(
+        target=preload, args=(limit,), name="audio-preload", daemon=True
+    )
+    thread.start()
+    return thread
+
+
+def clear() -> None:
+    global _cached_bytes
+    with _lock:
+        _cache.clear()
+        _cached_bytes = 0
+
+
+def stats() -> dict:
+    with _lock:
+        return {"entries": len(_cache), "bytes": _cached_bytes, "max_bytes": max_bytes}
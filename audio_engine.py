@@ -0,0 +1,332 @@
+"""
+Long-lived in-process audio engine.
+
+All clips are played through one pygame mixer that is opened once, instead
+of starting a SoX `play` process (decoder init, ALSA device open) per clip.
+Short clips are decoded into a `pygame.mixer.Sound` and played on a free
+mixer channel; long files (stories) are streamed through `pygame.mixer.music`.
+
+`play()` returns a `Playback` handle with `stop()`, `is_playing()` and
+`wait()`. A single monitor thread watches the active handles and sets their
+completion event as soon as the mixer reports the channel idle, so callers
+wait for the real end of a clip rather than sleeping for its duration. The
+monitor only polls while something is playing; otherwise it waits until
+`play()` or `play_sequence()` wakes it.
+
+If the mixer cannot be opened (no audio device, pygame missing) playback
+falls back to one SoX `play` process per clip behind the same handle API.
+
+Every clip is played with its loudness gain from `audio_index` on top of the
+requested volume.
+"""
+
+import subprocess
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional
+
+import audio_cache
+import audio_index
+from logger_util import get_logger
+
+logger = get_logger(__name__, "logs/audio.log")
+
+try:
+    import pygame
+except ImportError:  # pragma: no cover - pygame is installed on the box
+    pygame = None
+
+FREQUENCY = 22050  # same mixer settings the pygame games used before
+BUFFER = 512
+NUM_CHANNELS = 16
+POLL_INTERVAL = 0.01  # seconds between completion checks
+STREAM_MIN_BYTES = 2 * 1024 * 1024  # stream files larger than this via mixer.music
+
+_lock = threading.RLock()
+_has_active = threading.Condition(_lock)  # notified when a playback is added
+_active: List["Playback"] = []
+_monitor: Optional[threading.Thread] = None
+_mixer_ok: Optional[bool] = None  # None = not tried yet
+_music_owner: Optional["Playback"] = None
+
+
+def init() -> bool:
+    """Open the mixer if it is not open yet. Returns False if it is unavailable."""
+    global _mixer_ok
+    with _lock:
+        if pygame is not None and pygame.mixer.get_init():
+            _mixer_ok = True
+            return True
+        if _mixer_ok is False:
+            return False
+        try:
+            pygame.mixer.pre_init(frequency=FREQUENCY, buffer=BUFFER)
+            pygame.mixer.init()
+            pygame.mixer.set_num_channels(NUM_CHANNELS)
+            _mixer_ok = True
+            logger.info("Audio engine: pygame mixer opened (%s)", pygame.mixer.get_init())
+        except Exception as e:
+            _mixer_ok = False
+            logger.warning("Audio engine: mixer unavailable, using SoX play: %s", e)
+        return _mixer_ok
+
+
+class Playback:
+    """Handle of one playing clip."""
+
+    def __init__(self, path: Path, volume: float, cancel: Optional[threading.Event] = None):
+        self.path = Path(path)
+        self.volume = volume
+        self.cancel = cancel  # stops the playback as soon as it is set
+        self.started_at = time.monotonic()
+        self._done = threading.Event()
+        self._channel = None
+        self._process: Optional[subprocess.Popen] = None
+        self._streamed = False
+
+    def _start(self, sound=None, stream=False) -> None:
+        global _music_owner
+        if stream:
+            pygame.mixer.music.load(str(self.path))
+            pygame.mixer.music.set_volume(self.volume * audio_index.gain_factor(self.path))
+            pygame.mixer.music.play()
+            self._streamed = True
+            if _music_owner is not None:
+                _music_owner._done.set()
+            _music_owner = self
+        elif sound is not None:
+            # Cached Sounds are shared: they carry the per-file gain (see
+            # load_sound), the requested volume is set on the channel
+            self._channel = pygame.mixer.find_channel(True)
+            self._channel.play(sound)
+            self._channel.set_volume(self.volume)
+        else:
+            self._process = subprocess.Popen(
+                ["play", str(self.path), "vol", str(self.volume * audio_index.gain_factor(self.path))],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+
+    def _busy(self) -> bool:
+        if self._done.is_set():
+            return False
+        if self._streamed:
+            return _music_owner is self and pygame.mixer.music.get_busy()
+        if self._channel is not None:
+            return self._channel.get_busy()
+        if self._process is not None:
+            return self._process.poll() is None
+        return False
+
+    def _tick(self) -> bool:
+        """Called by the monitor thread; returns False once playback is over."""
+        return self._busy()
+
+    def is_playing(self) -> bool:
+        return not self._done.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the clip finished or was stopped. Returns False on timeout."""
+        return self._done.wait(timeout)
+
+    def stop(self) -> None:
+        global _music_owner
+        with _lock:
+            if self._done.is_set():
+                return
+            try:
+                if self._streamed and _music_owner is self:
+                    pygame.mixer.music.stop()
+                    _music_owner = None
+                elif self._channel is not None:
+                    self._channel.stop()
+                elif self._process is not None:
+                    self._process.terminate()
+            except Exception as e:
+                logger.debug("Could not stop %s: %s", self.path, e)
+            self._done.set()
+
+    def __repr__(self):
+        state = "playing" if self.is_playing() else "done"
+        return f"Playback({self.path.name}, {state})"
+
+
+class Sequence(Playback):
+    """Several clips played back to back on one channel as a single playback.
+
+    The next clip is queued on the channel while the current one plays, so
+    there is no gap between clips. At every clip boundary the optional
+    `interrupt` predicate is evaluated on the monitor thread (it must return
+    quickly); if it returns True the sequence stops and `interrupted` is set.
+    """
+
+    def __init__(self, paths, volume: float, interrupt=None, cancel=None):
+        super().__init__(paths[0], volume, cancel)
+        self.paths = [Path(p) for p in paths]
+        self.interrupt = interrupt
+        self.interrupted = False
+        self.index = 0  # clip currently playing
+        self._sounds = None
+        self._queued = False
+
+    def _start_sequence(self, sounds) -> None:
+        self._sounds = sounds
+        if sounds is None:
+            self._start()
+            return
+        self._start(sound=sounds[0])
+        self._queue_next()
+
+    def _queue_next(self) -> None:
+        self._queued = self.index + 1 < len(self.paths)
+        if self._queued:
+            self._channel.queue(self._sounds[self.index + 1])
+
+    def _should_interrupt(self) -> bool:
+        if self.interrupt is None:
+            return False
+        try:
+            return bool(self.interrupt())
+        except Exception as e:
+            logger.debug("Sequence interrupt check failed: %s", e)
+            return False
+
+    def _next_clip(self) -> bool:
+        """Advance to the next clip; returns False if the sequence is over."""
+        self.index += 1
+        if self.index >= len(self.paths):
+            return False
+        self.path = self.paths[self.index]
+        if self._should_interrupt():
+            self.interrupted = True
+            self.stop()
+            return False
+        if self._sounds is None:
+            self._start()
+        else:
+            self._queue_next()
+        return True
+
+    def _tick(self) -> bool:
+        if self._done.is_set():
+            return False
+        if self._sounds is None:
+            if self._process.poll() is None:
+                return True
+            return self._next_clip()
+        if not self._channel.get_busy():
+            return False
+        if self._queued and self._channel.get_queue() is None:
+            # The queued clip became the current one
+            return self._next_clip()
+        return True
+
+
+def _monitor_loop():
+    while True:
+        with _lock:
+            # Sleep without polling while nothing is playing
+            _has_active.wait_for(lambda: _active)
+        time.sleep(POLL_INTERVAL)
+        with _lock:
+            active = list(_active)
+        for playback in active:
+            if playback.cancel is not None and playback.cancel.is_set():
+                playback.stop()
+            elif playback._tick():
+                continue
+            with _lock:
+                playback._done.set()
+                if playback in _active:
+                    _active.remove(playback)
+
+
+def _ensure_monitor():
+    """Start the monitor thread and wake it up; the caller holds _lock."""
+    global _monitor
+    _has_active.notify()
+    if _monitor is None or not _monitor.is_alive():
+        _monitor = threading.Thread(target=_monitor_loop, name="audio-engine", daemon=True)
+        _monitor.start()
+
+
+def load_sound(path: Path):
+    """Return the decoded mixer Sound for `path` (cached in audio_cache)."""
+    sound = audio_cache.get(path)
+    sound.set_volume(audio_index.gain_factor(path))
+    return sound
+
+
+def play(
+    path,
+    volume: float = 1.0,
+    stream: Optional[bool] = None,
+    cancel: Optional[threading.Event] = None,
+) -> Playback:
+    """Start playing `path` and return its Playback handle (non-blocking).
+
+    `stream` forces (or prevents) streaming through mixer.music; by default
+    only large files are streamed. Setting the `cancel` event (e.g. from an
+    RFID tag callback) stops the clip within one monitor tick.
+    """
+    path = Path(path)
+    playback = Playback(path, max(0.0, volume), cancel)
+    try:
+        # Decode outside the lock so the monitor keeps running meanwhile
+        sound = None
+        if init():
+            if stream is None:
+                stream = path.stat().st_size > STREAM_MIN_BYTES
+            if not stream:
+                sound = load_sound(path)
+        with _lock:
+            if sound is not None:
+                playback._start(sound=sound)
+            else:
+                playback._start(stream=bool(_mixer_ok))
+            _active.append(playback)
+            _ensure_monitor()
+    except Exception as e:
+        logger.error("Could not play %s: %s", path, e)
+        playback._done.set()
+    return playback
+
+
+def play_sequence(
+    paths, volume: float = 1.0, interrupt=None, cancel: Optional[threading.Event] = None
+) -> Sequence:
+    """Play `paths` back to back as one Sequence handle (non-blocking).
+
+    All clips are decoded before playback starts. `interrupt` is an optional
+    predicate checked at each clip boundary (see Sequence); `cancel` works as
+    in play().
+    """
+    sequence = Sequence(paths, max(0.0, volume), interrupt, cancel)
+    try:
+        sounds = [load_sound(p) for p in sequence.paths] if init() else None
+        with _lock:
+            sequence._start_sequence(sounds)
+            _active.append(sequence)
+            _ensure_monitor()
+    except Exception as e:
+        logger.error("Could not play sequence %s: %s", [p.name for p in sequence.paths], e)
+        sequence._done.set()
+    return sequence
+
+
+def stop_all() -> None:
+    """Stop every clip started through the engine."""
+    with _lock:
+        for playback in list(_active):
+            playback.stop()
+        _active.clear()
+
+
+def is_playing(filename: Optional[str] = None) -> bool:
+    """True if any clip (or one whose file name ends with `filename`) is playing."""
+    with _lock:
+        return any(
+            p.is_playing() and (filename is None or str(p.path).endswith(filename))
+            for p in _active
+        )
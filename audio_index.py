@@ -0,0 +1,370 @@
+"""
+Persistent index of audio durations under data/.
+
+Playback used to fork `soxi` (and often `ffprobe`) for every clip just to
+know how long to wait. This index stores the duration of each file together
+with its mtime and size in INDEX_FILE, so a duration is computed once per
+file version. MP3 and WAV durations are read in-process (MP3 via the
+Xing/Info or VBRI header, else by walking the frame headers); other formats
+use the caller's fallback (see `audio._get_duration_from_soxi_or_ffprobe`).
+
+The index also stores a playback gain per file. `build(..., loudness=True)`
+measures the integrated loudness (EBU R128, via ffmpeg) of every file once
+and stores the gain that brings it down to TARGET_LOUDNESS; the audio engine
+applies it as the clip volume, so the whole library plays at a consistent
+level without any per-playback filtering.
+"""
+
+import json
+import os
+import re
+import struct
+import subprocess
+import threading
+import wave
+from pathlib import Path
+from typing import Callable, Optional
+
+from logger_util import get_logger
+
+logger = get_logger(__name__, "logs/audio.log")
+
+data_path = Path("./data")
+INDEX_FILE = data_path / ".audio_index.json"
+AUDIO_SUFFIXES = (".mp3", ".wav", ".ogg", ".aif", ".aiff")
+HEAD_BYTES = 16 * 1024  # read to find the first MP3 frame and its Xing/VBRI header
+
+TARGET_LOUDNESS = -20.0  # LUFS
+MIN_GAIN_DB = -20.0
+SILENT_LUFS = -60.0  # measurements below this (silence, very short clips) are ignored
+
+_entries: Optional[dict] = None  # relative path -> [mtime_ns, size, duration, gain_db]
+_dirty = False
+_lock = threading.Lock()
+
+# MPEG audio header tables, indexed by version (1, 2, 2.5) and layer (1, 2, 3)
+_BITRATES = {
+    (1, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (1, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (1, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (2, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (2, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (2, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+_SAMPLE_RATES = {1: (44100, 48000, 32000), 2: (22050, 24000, 16000), 2.5: (11025, 12000, 8000)}
+_VERSIONS = {0: 2.5, 2: 2, 3: 1}
+_LAYERS = {1: 3, 2: 2, 3: 1}
+
+
+def _parse_frame_header(header: int):
+    """Return (frame_length, samples_per_frame, sample_rate, version, channels) or None."""
+    if (header >> 21) & 0x7FF != 0x7FF:
+        return None
+    version = _VERSIONS.get((header >> 19) & 0x3)
+    layer = _LAYERS.get((header >> 17) & 0x3)
+    bitrate_index = (header >> 12) & 0xF
+    rate_index = (header >> 10) & 0x3
+    if version is None or layer is None or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+    padding = (header >> 9) & 0x1
+    channels = 1 if (header >> 6) & 0x3 == 3 else 2
+    bitrate = _BITRATES[(1 if version == 1 else 2, layer)][bitrate_index] * 1000
+    sample_rate = _SAMPLE_RATES[version][rate_index]
+
+    if layer == 1:
+        samples = 384
+        length = (12 * bitrate // sample_rate + padding) * 4
+    elif layer == 3 and version != 1:
+        samples = 576
+        length = 72 * bitrate // sample_rate + padding
+    else:
+        samples = 1152
+        length = 144 * bitrate // sample_rate + padding
+    return length, samples, sample_rate, version, channels
+
+
+def _header_at(f, pos: int):
+    """Parsed frame header at file offset `pos`, or None."""
+    f.seek(pos)
+    raw = f.read(4)
+    if len(raw) < 4:
+        return None
+    return _parse_frame_header(struct.unpack(">I", raw)[0])
+
+
+def mp3_duration(path) -> Optional[float]:
+    """Duration of an MP3 file from its frame headers, or None if unparsable.
+
+    Only the ID3 header and the first HEAD_BYTES after it are read; files
+    without a Xing/Info or VBRI header are walked frame by frame with seeks,
+    so long stories are never loaded into memory.
+    """
+    with open(path, "rb") as f:
+        file_size = os.fstat(f.fileno()).st_size
+        start = 0
+        tag = f.read(10)
+        if tag[:3] == b"ID3" and len(tag) == 10:
+            size = (tag[6] << 21) | (tag[7] << 14) | (tag[8] << 7) | tag[9]
+            start = 10 + size + (10 if tag[5] & 0x10 else 0)
+        f.seek(start)
+        head = f.read(HEAD_BYTES)
+
+        # Find the first valid frame (a following frame header must match too)
+        end = len(head) - 4
+        pos = 0
+        first = None
+        while pos < end:
+            if head[pos] == 0xFF:
+                info = _parse_frame_header(struct.unpack_from(">I", head, pos)[0])
+                if info is not None:
+                    nxt = start + pos + info[0]
+                    if nxt + 4 > file_size or _header_at(f, nxt) is not None:
+                        first = info
+                        break
+            pos += 1
+        if first is None:
+            return None
+
+        length, samples, sample_rate, version, channels = first
+
+        # Xing/Info header (VBR and LAME CBR files) carries the frame count
+        side_info = (32 if channels == 2 else 17) if version == 1 else (17 if channels == 2 else 9)
+        xing = pos + 4 + side_info
+        if head[xing : xing + 4] in (b"Xing", b"Info"):
+            flags = struct.unpack_from(">I", head, xing + 4)[0]
+            if flags & 0x1:
+                frames = struct.unpack_from(">I", head, xing + 8)[0]
+                return frames * samples / sample_rate
+        vbri = pos + 4 + 32
+        if head[vbri : vbri + 4] == b"VBRI":
+            frames = struct.unpack_from(">I", head, vbri + 14)[0]
+            return frames * samples / sample_rate
+
+        # No header: walk the frames
+        total_samples = 0
+        offset = start + pos
+        while True:
+            info = _header_at(f, offset)
+            if info is None:
+                break
+            total_samples += info[1]
+            offset += info[0]
+        return total_samples / sample_rate
+
+
+def wav_duration(path) -> Optional[float]:
+    with wave.open(str(path), "rb") as w:
+        return w.getnframes() / float(w.getframerate())
+
+
+_PARSERS = {".mp3": mp3_duration, ".wav": wav_duration}
+
+
+def _key(path: Path) -> str:
+    return os.path.normpath(str(path))
+
+
+def _load() -> dict:
+    global _entries
+    if _entries is None:
+        try:
+            with open(INDEX_FILE, "r", encoding="utf-8") as f:
+                _entries = json.load(f)
+        except FileNotFoundError:
+            _entries = {}
+        except (ValueError, OSError) as e:
+            logger.warning("Ignoring unreadable audio index %s: %s", INDEX_FILE, e)
+            _entries = {}
+    return _entries
+
+
+def save() -> None:
+    """Write the index if it changed since the last save."""
+    global _dirty
+    with _lock:
+        if not _dirty:
+            return
+        data = dict(_load())
+        _dirty = False
+    tmp_path = f"{INDEX_FILE}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, INDEX_FILE)
+    except OSError as e:
+        logger.warning("Could not write audio index %s: %s", INDEX_FILE, e)
+
+
+def _compute(path: Path, fallback) -> Optional[float]:
+    parser = _PARSERS.get(path.suffix.lower())
+    if parser is not None:
+        try:
+            duration = parser(path)
+            if duration:
+                return duration
+        except (OSError, EOFError, wave.Error, struct.error) as e:
+            logger.debug("Could not parse %s in-process: %s", path, e)
+    return fallback(path) if fallback is not None else None
+
+
+def _lookup(path: Path, fallback) -> tuple:
+    """Return (duration, changed) for `path`, computing it if the entry is stale."""
+    global _dirty
+    try:
+        st = path.stat()
+    except OSError:
+        return None, False
+
+    key = _key(path)
+    with _lock:
+        entry = _load().get(key)
+    if entry is not None and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+        return entry[2], False
+
+    duration = _compute(path, fallback)
+    if duration is None:
+        return None, False
+    with _lock:
+        _load()[key] = [st.st_mtime_ns, st.st_size, duration]
+        _dirty = True
+    return duration, True
+
+
+def get_duration(
+    path, fallback: Optional[Callable[[Path], Optional[float]]] = None
+) -> Optional[float]:
+    """Return the duration of `path` in seconds (None if it cannot be determined)."""
+    duration, changed = _lookup(Path(path), fallback)
+    if changed:
+        save()
+    return duration
+
+
+def measure_loudness(path) -> Optional[float]:
+    """Integrated loudness of `path` in LUFS (ffmpeg ebur128), None if unknown."""
+    cmd = [
+        "nice", "-n", "19",
+        "ffmpeg", "-nostats", "-hide_banner", "-i", str(path),
+        "-filter:a", "ebur128=framelog=quiet", "-f", "null", "-",
+    ]
+    try:
+        result = subprocess.run(
+            cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True
+        )
+    except (subprocess.CalledProcessError, OSError) as e:
+        logger.debug("Could not measure loudness of %s: %s", path, e)
+        return None
+    matches = re.findall(r"I:\s+(-?\d+(?:\.\d+)?) LUFS", result.stderr)
+    if not matches:
+        return None
+    loudness = float(matches[-1])
+    return loudness if loudness > SILENT_LUFS else None
+
+
+def _gain_for(loudness: float) -> float:
+    # Gains only attenuate: the mixer cannot play a clip louder than full scale
+    return round(max(MIN_GAIN_DB, min(0.0, TARGET_LOUDNESS - loudness)), 2)
+
+
+def _analyze(path: Path, measure) -> bool:
+    """Store the gain of `path` if it is indexed and not analyzed yet."""
+    global _dirty
+    try:
+        st = path.stat()
+    except OSError:
+        return False
+    key = _key(path)
+    with _lock:
+        entry = _load().get(key)
+    if entry is None or entry[:2] != [st.st_mtime_ns, st.st_size] or len(entry) > 3:
+        return False
+
+    loudness = measure(path)
+    gain = _gain_for(loudness) if loudness is not None else 0.0
+    with _lock:
+        entry = _load().get(key)
+        if entry is not None and entry[:2] == [st.st_mtime_ns, st.st_size]:
+            _load()[key] = entry[:3] + [gain]
+            _dirty = True
+    return True
+
+
+def get_gain(path) -> float:
+    """Playback gain of `path` in dB (0.0 if it was not analyzed yet)."""
+    path = Path(path)
+    try:
+        st = path.stat()
+    except OSError:
+        return 0.0
+    with _lock:
+        entry = _load().get(_key(path))
+    if entry is None or len(entry) < 4 or entry[:2] != [st.st_mtime_ns, st.st_size]:
+        return 0.0
+    return entry[3]
+
+
+def gain_factor(path) -> float:
+    """Playback gain of `path` as a linear volume factor."""
+    return 10 ** (get_gain(path) / 20)
+
+
+def is_hidden(key: str) -> bool:
+    """True for paths inside hidden directories or of hidden files."""
+    return any(part.startswith(".") and part not in (".", "..") for part in Path(key).parts)
+
+
+def build(root=data_path, fallback=None, loudness: bool = False, measure=None) -> int:
+    """Index every audio file below `root`; drop entries of deleted files.
+
+    With `loudness`, files without a stored gain are analyzed as well (this
+    runs ffmpeg once per new or changed file). Returns the number of
+    (re)computed durations.
+    """
+    global _dirty
+    measure = measure or measure_loudness
+    computed = 0
+    analyzed = 0
+    for dirpath, dirnames, filenames in os.walk(root):
+        # Hidden directories (e.g. the eSpeak cache, whose WAVs already carry
+        # the speaker volume) and in-progress files are not part of the library
+        dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+        for name in filenames:
+            if name.lower().endswith(AUDIO_SUFFIXES) and not name.startswith("."):
+                path = Path(dirpath) / name
+                _, changed = _lookup(path, fallback)
+                computed += changed
+                if loudness and _analyze(path, measure):
+                    analyzed += 1
+                    if analyzed % 50 == 0:
+                        save()
+
+    with _lock:
+        entries = _load()
+        stale = [k for k in entries if not os.path.exists(k) or is_hidden(k)]
+        for k in stale:
+            del entries[k]
+        if stale:
+            _dirty = True
+    save()
+    logger.info(
+        "Audio index built: %d durations computed, %d files analyzed, %d removed",
+        computed, analyzed, len(stale),
+    )
+    return computed
+
+
+def build_in_background(root=data_path, fallback=None, loudness: bool = False) -> threading.Thread:
+    thread = threading.Thread(
+        target=build, args=(root, fallback, loudness), name="audio-index", daemon=True
+    )
+    thread.start()
+    return thread
+
+
+def set_index_file(path) -> None:
+    """Use a different index file (drops the loaded entries)."""
+    global INDEX_FILE, _entries, _dirty
+    with _lock:
+        INDEX_FILE = Path(path)
+        _entries = None
+        _dirty = False
@@ -2,6 +2,7 @@ from pathlib import Path
 
 from sqlmodel import Session, and_, select
 
+import tag_index
 from database import engine, get_db
 from logger_util import get_logger
 from models import RFIDTag, Usage
@@ -201,10 +202,45 @@ def create_rfid_tag(
     db.add(tag)
     db.commit()
     db.refresh(tag)
+    tag_index.add(tag)
     logger.debug(f"Created new RFIDTag: {tag}")
     return tag
 
 
+def create_rfid_tags(
+    tags: list[RFIDTag], db: Session = next(get_db())
+) -> list[RFIDTag]:
+    """Store several tags in a single transaction.
+
+    Returns one stored row per input tag: the newly created row, or the
+    existing row with the same rfid_tag and rfid_type. The tag index is not
+    updated here; the caller (tag_persistence) has indexed the tags already.
+    """
+    stored = []
+    created = []
+    for tag in tags:
+        existing = db.exec(
+            select(RFIDTag).where(
+                and_(
+                    RFIDTag.rfid_tag == tag.rfid_tag,
+                    RFIDTag.rfid_type == tag.rfid_type,
+                )
+            )
+        ).first()
+        if existing is None:
+            existing = RFIDTag(
+                rfid_tag=tag.rfid_tag, name=tag.name, rfid_type=tag.rfid_type
+            )
+            db.add(existing)
+            created.append(existing)
+        stored.append(existing)
+    db.commit()
+    for tag in created:
+        db.refresh(tag)
+    logger.debug(f"Created {len(created)} new RFIDTags in one transaction")
+    return stored
+
+
 def update_rfid_tag_by_id(
     record_id: int, updated_tag: RFIDTag, db: Session = next(get_db())
 ) -> RFIDTag | None:
@@ -218,6 +254,7 @@ def update_rfid_tag_by_id(
     db.add(tag)
     db.commit()
     db.refresh(tag)
+    tag_index.replace(tag)
     logger.debug(f"Updated RFIDTag id {record_id} to new values: {updated_tag}")
     return tag
 
@@ -231,8 +268,10 @@ def delete_rfid_tag_by_id(
     if not tag:
         logger.warning(f"RFIDTag not found to delete: {rfid_tag_id}")
         return False
+    record_id = tag.id
     db.delete(tag)
     db.commit()
+    tag_index.remove(record_id)
     logger.debug(f"Deleted RFIDTag: {rfid_tag_id}")
     return True
 
@@ -242,6 +281,7 @@ def delete_all_rfid_tags(db: Session = next(get_db())) -> bool:
     for tag in tags:
         db.delete(tag)
     db.commit()
+    tag_index.clear()
     logger.debug(f"Deleted RFIDTags")
     return True
 
@@ -3,9 +3,9 @@ from typing import Dict, Optional
 
 from crud import (
     get_all_rfid_tags,
-    get_all_rfid_tags_by_tag_id,
     get_rfid_tag_by_id,
 )
+import tag_index
 from logger_util import get_logger
 from models import RFIDTag
 
@@ -56,11 +56,13 @@ def get_figure_from_database(rfid_tag: str) -> Optional[RFIDTag]:
 
 def get_all_figures_by_rfid_tag(rfid_tag: str) -> list[RFIDTag]:
     """
-    Fetch all RFIDTag entries from the database matching the given rfid_tag.
+    Fetch all RFIDTag entries matching the given rfid_tag.
     Returns a list of RFIDTag objects.
+
+    Served from the in-memory tag index (see tag_index), so this is a dict
+    lookup and safe to call from the RFID scan loop.
     """
-    # This requires a new CRUD function, e.g. get_all_rfid_tags_by_tag_id to fetch multiple entries
-    tags = get_all_rfid_tags_by_tag_id(rfid_tag)
+    tags = tag_index.lookup(rfid_tag)
     # if tags:
     #     logger.debug(f"Found {len(tags)} entries for RFID {rfid_tag}")
     # else:
@@ -24,6 +24,7 @@ from .game_utils import (
     check_end_tag,
     filter_players_on_fields,
     get_solution_from_tags,
+    solution_fields,
     wait_for_figure_placement,
 )
 
@@ -99,18 +100,22 @@ def start():
             is_correct = False
             player_solution = "00"
 
-            while time.time() - start_time < waiting_cycles:
-                player_solution = get_solution_from_tags(i, player)
+            # Zehner- und Einerfeld (siehe get_solution_from_tags) bevorzugt abfragen
+            answer_fields = solution_fields(i, len(rfidreaders.tags))
 
-                if int(player_solution) == solution:
-                    is_correct = True
-                    break
+            with rfidreaders.focus_fields(answer_fields):
+                while time.time() - start_time < waiting_cycles:
+                    player_solution = get_solution_from_tags(i, player)
 
-                # Während der Wartezeit weiter blinken, aber nicht blockierend warten
-                leds.switch_on_with_color(leds_position, (0, 255, 0))
-                time.sleep(0.15)
-                leds.switch_on_with_color(leds_position, (0, 0, 0))
-                time.sleep(0.15)
+                    if int(player_solution) == solution:
+                        is_correct = True
+                        break
+
+                    # Während der Wartezeit weiter blinken, aber nicht blockierend warten
+                    leds.switch_on_with_color(leds_position, (0, 255, 0))
+                    time.sleep(0.15)
+                    leds.switch_on_with_color(leds_position, (0, 0, 0))
+                    time.sleep(0.15)
 
             if is_correct:
                 announce(27)
@@ -5,7 +5,6 @@ import copy
 import datetime
 import os
 import pathlib
-import subprocess
 import time
 
 import audio
@@ -155,19 +154,11 @@ def start():
                 # wait 60 seconds longer than recording otherwise continue to next figure - prevent program from freezing
                 waitingtime = (
                     time.time()
-                    + float(
-                        subprocess.run(
-                            [
-                                "soxi",
-                                "-D",
-                                str(figure_dir)
-                                + "/"
-                                + figure_id.rfid_tag
-                                + ".mp3",
-                            ],
-                            stdout=subprocess.PIPE,
-                            check=False,
-                        ).stdout.decode("utf-8")
+                    + (
+                        audio.get_audio_length(
+                            figure_dir, figure_id.rfid_tag + ".mp3"
+                        )
+                        or 0.0
                     )
                     + 60
                 )
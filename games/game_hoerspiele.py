@@ -2,7 +2,6 @@
 # -*- coding: UTF8 -*-
 
 import time
-import subprocess
 import rfidreaders
 import leds
 import audio
@@ -18,8 +17,7 @@ def start(folder, audiofile):
     leds.switch_on_with_color(rfidreaders.tags.index(audiofile), (0, 255, 0))
 
     audio.play_file(folder, f"{audiofile}.mp3")
-    waitingtime = time.time() + float(subprocess.run(
-                    ['soxi', '-D', f'./data/{folder}/{audiofile}.mp3'], stdout=subprocess.PIPE, check=False).stdout.decode('utf-8')) + 10
+    waitingtime = time.time() + (audio.get_audio_length(folder, f"{audiofile}.mp3") or 0.0) + 10
     print(waitingtime)
 
     while True:
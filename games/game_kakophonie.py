@@ -4,6 +4,7 @@ import time
 
 import pygame
 
+import audio_engine
 import crud
 import file_lib
 import leds
@@ -37,20 +38,15 @@ def start():
     rfidreaders.display_active_leds = False
     leds.reset()  # reset leds
 
-    if not pygame.mixer.get_init():
-        pygame.mixer.pre_init(frequency=22050, buffer=512)
-        time.sleep(1)
-        pygame.mixer.init()
-        # pygame.mixer.init(buffer=4096)
-        pygame.mixer.set_num_channels(6)
-
+    # The mixer is shared with the audio engine and stays open between games
+    audio_engine.init()
+    if not phones:
         for s in range(0, 6):
             phones.append(
                 pygame.mixer.Sound("data/phonie/00" + str(s + 1) + ".ogg")
             )
-            phones[s].set_volume(0)
-    else:
-        pygame.mixer.unpause()
+    for p in phones:
+        p.set_volume(0)
 
     for p in phones:
         p.play(loops=-1)
@@ -62,6 +58,7 @@ def start():
         end_found = False
 
         # take a synchronous snapshot from the readers and normalize to a list
+        seen_version = rfidreaders.get_snapshot().version
         snapshot = list(rfidreaders.get_tags_snapshot(True) or [])
 
         # iterate over slots (a slot may be None, a tag object, or a list/tuple of tag objects)
@@ -122,10 +119,12 @@ def start():
             for x in phones:
                 x.set_volume(1.0)
                 x.stop()
-            pygame.mixer.quit()
             leds.blinker()
             leds.reset()
             return
 
+        # sleep until the scanner reports a placed/removed/changed tag
+        rfidreaders.wait_for_change(timeout=1.0, since_version=seen_version)
+
     leds.blink = False
     leds.reset()
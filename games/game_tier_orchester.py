@@ -5,6 +5,7 @@ import time
 
 import pygame
 
+import audio_engine
 import crud
 import file_lib
 import leds
@@ -38,17 +39,11 @@ def start():
     announce(63)
     leds.reset()  # Reset LEDs
 
-    if not pygame.mixer.get_init():
-        pygame.mixer.pre_init(frequency=22050, buffer=512)
-        time.sleep(1)
-        pygame.mixer.init()
-        pygame.mixer.set_num_channels(6)
-
-        for s in range(0, 6):
-            phones.append(pygame.mixer.Sound("data/phonie/00" + str(s + 1) + ".ogg"))
-            phones[s].set_volume(0)
-    else:
-        pygame.mixer.unpause()
+    # The mixer is shared with the audio engine and stays open between games
+    audio_engine.init()
+    phones[:] = [pygame.mixer.Sound("data/phonie/00" + str(s + 1) + ".ogg") for s in range(0, 6)]
+    for p in phones:
+        p.set_volume(0)
 
     # normalize playing_animals to a list of bools and found_animals to a list of optional Paths
     playing_animals: list[bool] = [False] * 6
@@ -58,6 +53,7 @@ def start():
 
     while True:
         # take a synchronous snapshot and normalize to a concrete list
+        seen_version = rfidreaders.get_snapshot().version
         snapshot: list = list(rfidreaders.get_tags_snapshot(True) or [])
         end_found = False
 
@@ -105,11 +101,13 @@ def start():
             for x in phones:
                 x.set_volume(1.0)
                 x.stop()
-            pygame.mixer.quit()
             leds.blinker()
             leds.reset()
             return
 
+        # sleep until the scanner reports a placed/removed/changed tag
+        rfidreaders.wait_for_change(timeout=1.0, since_version=seen_version)
+
     time.sleep(0.2)
     leds.blinker()
     leds.reset()
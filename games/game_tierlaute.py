@@ -72,9 +72,11 @@ def start():
     def action_with_led(player):
         idx = players.index(player) + 1
         leds.switch_on_with_color(idx, (0, 255, 0))  # grün für rate-Spielfigur
-        result = player_action(
-            player, rfidreaders, file_lib, rfid_position, animals_played
-        )
+        # Das Feld der Spielfigur bevorzugt abfragen
+        with rfidreaders.focus_fields([idx - 1]):
+            result = player_action(
+                player, rfidreaders, file_lib, rfid_position, animals_played
+            )
         leds.switch_on_with_color(idx, (0, 0, 0))
         audio.kill_sounds()
         time.sleep(1)
@@ -128,15 +130,9 @@ def player_action(
     )
 
     start_time = time.time()
-    # Ensure audio_duration is numeric. audio.get_audio_length may return None;
-    # coerce to float and fall back to a safe default timeout if necessary.
+    # play_file already looked up the duration (plus WAITTIME_OFFSET); reuse it.
     try:
-        audio_duration = float(
-            audio.get_audio_length(
-                "animal_sounds", f"{expected_value.name}.mp3"
-            )
-            or 0.0
-        )
+        audio_duration = float(duration or 0.0)
     except Exception:
         audio_duration = 0.0
 
@@ -146,6 +142,7 @@ def player_action(
 
     while (time.time() - start_time) < audio_duration:
         # Prüfe RFID-Tags mittels Snapshot; ein Slot kann None, ein Tag-Objekt oder eine Liste/Tuple sein.
+        seen_version = rfidreaders.get_snapshot().version
         snapshot = list(rfidreaders.get_tags_snapshot(True) or [])
         for slot in snapshot:
             if slot is None:
@@ -165,10 +162,13 @@ def player_action(
                 and getattr(tag_obj, "rfid_tag", None)
                 == expected_value.rfid_tag
             ):
-                proc.terminate()
+                proc.stop()
                 time.sleep(0.3)
                 return True
-        time.sleep(0.1)
+        # Warten, bis der Scanner eine Änderung meldet (statt Dauerabfrage)
+        remaining = audio_duration - (time.time() - start_time)
+        if remaining > 0:
+            rfidreaders.wait_for_change(timeout=remaining, since_version=seen_version)
     # erwarteter Wert
     game_utils.announce(26)
     audio.play_file("TTS", "267.mp3")
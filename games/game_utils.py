@@ -1,4 +1,6 @@
+import threading
 import time
+from contextlib import ExitStack, contextmanager
 
 import audio
 import leds
@@ -31,40 +33,84 @@ def check_end_tag():
     has its `name` attribute equal to "ENDE".
     """
     snapshot: list = list(rfidreaders.get_tags_snapshot(True) or [])
+    return any(_is_end_tag(entry) for entry in snapshot)
 
-    for entry in snapshot:
-        if entry is None:
-            continue
-        # If a slot contains multiple items (list/tuple), inspect them
-        if isinstance(entry, (list, tuple)):
-            for it in entry:
-                if it is None:
-                    continue
-                if getattr(it, "name", None) == "ENDE":
-                    return True
-        else:
-            if getattr(entry, "name", None) == "ENDE":
-                return True
 
-    return False
+def _is_end_tag(entry) -> bool:
+    """True if a slot entry (tag object or list/tuple of them) contains ENDE."""
+    if entry is None:
+        return False
+    # If a slot contains multiple items (list/tuple), inspect them
+    if isinstance(entry, (list, tuple)):
+        return any(getattr(it, "name", None) == "ENDE" for it in entry)
+    return getattr(entry, "name", None) == "ENDE"
+
+
+@contextmanager
+def end_tag_event():
+    """Yield a threading.Event that the RFID scanner sets when ENDE is placed.
+
+    Pass it as `cancel` to audio playback so a running clip stops as soon as
+    the scanner reports the tag, instead of after the clip has finished.
+    """
+    ended = threading.Event()
+
+    def on_tag_event(event):
+        if _is_end_tag(event.new):
+            ended.set()
+
+    unsubscribe = rfidreaders.subscribe(on_tag_event)
+    try:
+        yield ended
+    finally:
+        unsubscribe()
 
 
 def announce(msg_id, path="TTS"):
-    """Play a message by its ID from the given path and check for ENDE tag."""
-    audio.play_full(path, msg_id)
-    if check_end_tag():
+    """Play a message by its ID from the given path; stop and restart on ENDE."""
+    with end_tag_event() as ended:
+        audio.play_full(path, msg_id, cancel=ended)
+    if ended.is_set() or check_end_tag():
         audio.play_file(path, "054.mp3")
         request_restart()
 
 
 def announce_file(msg_id, path="TTS"):
-    """Play a message by its ID from the given path and check for ENDE tag."""
-    audio.play_file(path, msg_id)
-    if check_end_tag():
+    """Play a message by its file name from the given path; stop and restart on ENDE."""
+    with end_tag_event() as ended:
+        audio.play_file(path, msg_id, cancel=ended)
+    if ended.is_set() or check_end_tag():
         audio.play_file(path, "054.mp3")
         request_restart()
 
 
+def announce_sequence(clips, wait=True):
+    """Play clips back to back; stop and restart as soon as ENDE is placed.
+
+    `clips` are (folder, audiofile) pairs as for audio.play_sequence. With
+    wait=False the sequence keeps playing in the background and a function
+    is returned that waits for it and then handles a detected ENDE tag.
+    """
+    subscription = ExitStack()
+    ended = subscription.enter_context(end_tag_event())
+    sequence = audio.play_sequence(clips, wait=wait, cancel=ended)
+
+    def finish():
+        try:
+            if not wait and sequence is not None:
+                sequence.wait()
+        finally:
+            subscription.close()
+        if ended.is_set():
+            audio.play_file("TTS", "054.mp3")
+            request_restart()
+
+    if wait:
+        finish()
+        return None
+    return finish
+
+
 def announce_score(score_players: dict):
     """Play a message by its ID from the given path and check for ENDE tag."""
     translator = Translator(
@@ -95,6 +141,14 @@ def announce_score(score_players: dict):
         if not isinstance(player, RFIDTag):
             continue
         slot_idx = _find_player_slot_index(player, snapshot)
+        # Name and score play as one sequence while the player's LED blinks
+        finish = announce_sequence(
+            [
+                ("TTS", translator.translate(f"standard_tags.{player.name.lower()}")),
+                ("TTS", 68 + score),
+            ],
+            wait=False,
+        )
         if slot_idx is not None:
             blink_led(
                 slot_idx + 1,
@@ -102,10 +156,7 @@ def announce_score(score_players: dict):
                 on_time=0.1,
                 off_time=0.1,
             )
-        audio.play_file(
-            "TTS", translator.translate(f"standard_tags.{player.name.lower()}")
-        )
-        announce(68 + score)
+        finish()
 
 
 def wait_for_figure_placement(fields):
@@ -180,6 +231,15 @@ def blink_led(field_index, times=5, on_time=0.5, off_time=0.5):
         time.sleep(off_time)
 
 
+def solution_fields(i, field_count):
+    """Fields (tens, units) holding the answer of the player on field `i`.
+
+    The tens digit lies on the next field, the units digit on the previous
+    one; both wrap around the ring of readers.
+    """
+    return (i + 1) % field_count, (i - 1) % field_count
+
+
 def get_solution_from_tags(i, players):
     """Calculate the solution from the tens and units tags.
 
@@ -204,9 +264,11 @@ def get_solution_from_tags(i, players):
             return None
         return slot
 
-    # get slot entries for tens and units (guarding index errors)
-    tens_slot = snapshot[i + 1] if snapshot and len(snapshot) > i + 1 else None
-    units_slot = snapshot[i - 1] if snapshot and len(snapshot) > i - 1 else None
+    # get slot entries for tens and units
+    tens_slot = units_slot = None
+    if snapshot:
+        tens_field, units_field = solution_fields(i, len(snapshot))
+        tens_slot, units_slot = snapshot[tens_field], snapshot[units_field]
 
     tens_tag = _first_tag_in_slot(tens_slot)
     units_tag = _first_tag_in_slot(units_slot)
@@ -265,27 +327,35 @@ def play_rounds(players, num_rounds, player_action) -> dict:
         audio.play_file("TTS", "059.mp3")
         return dict()
 
-    audio.play_file("TTS", f"{5 + players_length:03d}.mp3")
+    # Prompts between two player actions are collected and played as one
+    # gapless sequence (e.g. round end + next round start + player turn).
+    pending = [("TTS", f"{5 + players_length:03d}.mp3")]
 
     for round_num in range(1, num_rounds + 1):
         # audio.espeaker(f"Starte Runde {round_num}...")
-        audio.play_file(
-            "TTS", translator.translate(f"game.start_round_{round_num}")
+        pending.append(
+            ("TTS", translator.translate(f"game.start_round_{round_num}"))
         )
 
         for player in players:
             if player is not None:
-                audio.play_file(
-                    "TTS",
-                    translator.translate(f"turn_tags.{player.name.lower()}"),
+                pending.append(
+                    (
+                        "TTS",
+                        translator.translate(f"turn_tags.{player.name.lower()}"),
+                    )
                 )
+                announce_sequence(pending)
+                pending = []
                 if player_action(player):
                     score_players[player] += 1
 
-        audio.play_file(
-            "TTS", translator.translate(f"game.end_round_{round_num}")
+        pending.append(
+            ("TTS", translator.translate(f"game.end_round_{round_num}"))
         )
 
+    announce_sequence(pending)
+
     leds.blinker()
 
     return score_players
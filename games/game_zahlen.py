@@ -88,6 +88,7 @@ def player_action(
     while time.time() - start_time < total_wait_seconds:
         relevant_tags = []
         # Request a fresh snapshot (synchronous scan) and flatten nested entries.
+        seen_version = rfidreaders.get_snapshot().version
         current_tags = rfidreaders.get_tags_snapshot(True)
         flat_items = []
         if current_tags:
@@ -114,7 +115,7 @@ def player_action(
                 game_utils.announce(27)
                 return True
 
-        time.sleep(0.3)
+        rfidreaders.wait_for_change(timeout=0.3, since_version=seen_version)
     # Wrong answer
     game_utils.announce(26)
     # your solution is
@@ -0,0 +1,149 @@
+"""
+This helper benchmarks the RFID scan engine on simulated PN532 readers
+(see helper/pn532_sim.py), so scanner changes can be measured without a Raspberry Pi.
+
+It reports the sweep time with empty fields and with tags placed, the
+latency from placing a tag until the scanner publishes it, and the CPU time
+the scanner used.
+
+    python helper/benchmark_scanner.py --sweeps 50 --trials 20
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_tmp_dir = tempfile.mkdtemp(prefix="hoorch-bench-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmp_dir}/bench.db")
+
+from sqlmodel import SQLModel  # noqa: E402
+
+import mifare_key_cache  # noqa: E402
+import tag_index  # noqa: E402
+from database import engine  # noqa: E402
+from models import RFIDTag  # noqa: E402
+from pn532_sim import SimBus, SimTag, load_rfidreaders  # noqa: E402
+
+KNOWN_TAGS = [
+    SimTag.mifare([4, 216, 28, 234], ["figures:Ritter"]),
+    SimTag.mifare([4, 200, 28, 234], ["figures:Königin"]),
+    SimTag.ntag213([4, 7, 26, 160, 1, 2, 3], ["animals:Hund"]),
+]
+
+
+def percentiles(samples):
+    if not samples:
+        return "n/a"
+    ordered = sorted(samples)
+    p = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]  # noqa: E731
+    return (
+        f"n={len(ordered)} mean={statistics.mean(ordered) * 1000:.1f}ms "
+        f"p50={p(0.5) * 1000:.1f}ms p90={p(0.9) * 1000:.1f}ms "
+        f"max={ordered[-1] * 1000:.1f}ms"
+    )
+
+
+def measure_sweeps(rfid, sweeps):
+    durations = []
+    for _ in range(sweeps):
+        start = time.perf_counter()
+        rfid.do_scan_cycle()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def measure_detection(rfid, bus, trials, seed):
+    """Place tags at random moments while the scanner runs; time until published."""
+    rng = random.Random(seed)
+    latencies = []
+    detected = threading.Event()
+    slot_count = len(rfid.reader_pins)
+
+    def on_event(event):
+        if event.kind == rfid.TagEventKind.PLACED and event.slot in bus.placed_at:
+            latencies.append(time.perf_counter() - bus.placed_at[event.slot])
+            detected.set()
+
+    stop = threading.Event()
+
+    def scan_loop():
+        while not stop.is_set():
+            rfid.do_scan_cycle()
+
+    unsubscribe = rfid.subscribe(on_event)
+    scanner = threading.Thread(target=scan_loop, daemon=True)
+    scanner.start()
+    try:
+        for _ in range(trials):
+            slot = rng.randrange(slot_count)
+            time.sleep(rng.uniform(0.0, 0.3))
+            detected.clear()
+            bus.place(slot, rng.choice(KNOWN_TAGS))
+            if not detected.wait(timeout=10.0):
+                print(f"  tag on reader {slot + 1} not detected within 10 s")
+            bus.remove(slot)
+            # let the scanner forget the tag before the next trial
+            rfid.reset_tags()
+    finally:
+        stop.set()
+        scanner.join()
+        unsubscribe()
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sweeps", type=int, default=30)
+    parser.add_argument("--trials", type=int, default=20)
+    parser.add_argument("--time-scale", type=float, default=1.0,
+                        help="multiplier for simulated PN532 command latencies")
+    parser.add_argument("--failure-rate", type=float, default=0.0,
+                        help="probability that any simulated command fails")
+    parser.add_argument("--no-persistent", action="store_true",
+                        help="power-cycle every reader on every pass")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    SQLModel.metadata.create_all(engine)
+    mifare_key_cache.set_path(os.path.join(_tmp_dir, "mifare_keys.json"))
+    tag_index.load(
+        RFIDTag(id=i + 1, rfid_tag=tag.readable_id, name=f"tag{i}", rfid_type="figures")
+        for i, tag in enumerate(KNOWN_TAGS)
+    )
+
+    bus = SimBus(time_scale=args.time_scale, seed=args.seed)
+    if args.failure_rate:
+        bus.inject_failure(rate=args.failure_rate)
+    rfid = load_rfidreaders(bus)
+    rfid.persistent_readers = not args.no_persistent
+
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+
+    rfid.do_scan_cycle()  # initialize the readers
+    print("Sweep, empty fields:   ", percentiles(measure_sweeps(rfid, args.sweeps)))
+
+    for slot, tag in enumerate(KNOWN_TAGS):
+        bus.place(slot * 2, tag)
+    print("Sweep, tags placed:    ", percentiles(measure_sweeps(rfid, args.sweeps)))
+    for slot in range(len(KNOWN_TAGS)):
+        bus.remove(slot * 2)
+    rfid.reset_tags()
+
+    print("Detection latency:     ",
+          percentiles(measure_detection(rfid, bus, args.trials, args.seed)))
+
+    cpu, wall = time.process_time() - cpu_start, time.perf_counter() - wall_start
+    print(f"CPU time:               {cpu:.2f}s of {wall:.2f}s wall ({100 * cpu / wall:.1f}%)")
+    print("Simulated commands:    ", dict(sorted(bus.calls.items())))
+    print("Reader health:         ", rfid.get_reader_health())
+
+
+if __name__ == "__main__":
+    main()
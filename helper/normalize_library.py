@@ -0,0 +1,39 @@
+"""
+Analyze the loudness of every audio file under data/ and store the playback
+gains in the audio index (see audio_index.py). audio.init() runs the same
+job in the background; this helper does it in the foreground, e.g. after
+copying a new sound library onto the box.
+
+    python helper/normalize_library.py [--root data]
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import audio_index  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--root", default=str(audio_index.data_path))
+    args = parser.parse_args()
+
+    audio_index.build(args.root, loudness=True)
+    gains = [
+        audio_index.get_gain(os.path.join(dirpath, name))
+        for dirpath, _, names in os.walk(args.root)
+        for name in names
+        if name.lower().endswith(audio_index.AUDIO_SUFFIXES)
+        and not audio_index.is_hidden(os.path.join(dirpath, name))
+    ]
+    attenuated = [g for g in gains if g < 0]
+    print(f"{len(gains)} files, {len(attenuated)} attenuated to {audio_index.TARGET_LOUDNESS} LUFS")
+    if attenuated:
+        print(f"gain range {min(attenuated):.1f} .. {max(attenuated):.1f} dB")
+
+
+if __name__ == "__main__":
+    main()
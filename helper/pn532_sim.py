@@ -0,0 +1,358 @@
+"""
+Hardware-free simulation of the six PN532 readers for tests and benchmarks.
+
+`SimBus` holds the simulated RF fields: which tag lies on which reader,
+how long each PN532 command takes and which failures to inject. `install()`
+registers stand-ins for `board`, `busio`, `digitalio` and `adafruit_pn532`
+in `sys.modules`, and `load_rfidreaders()` imports a private copy of the real
+`rfidreaders` module on top of them, so `do_scan_cycle()`, the NTAG/MIFARE
+read paths and the focus logic run unchanged on a Linux dev machine.
+
+    bus = SimBus()
+    rfid = load_rfidreaders(bus)
+    bus.place(0, SimTag.ntag213([4, 1, 2, 3, 5, 6, 7], ["figures:Ritter"]))
+    rfid.do_scan_cycle()
+
+Latencies are given in seconds and multiplied by `SimBus.time_scale`.
+"""
+
+import importlib.util
+import os
+import random
+import sys
+import threading
+import time
+import types
+from contextlib import contextmanager
+from typing import Dict, Iterable, Optional
+
+import ndef
+
+MIFARE_CMD_AUTH_A = 0x60
+MIFARE_CMD_AUTH_B = 0x61
+PN532_COMMAND_INDATAEXCHANGE = 0x40
+NTAG_CMD_READ = 0x30
+NTAG_CMD_FAST_READ = 0x3A
+
+# CS pins in the order rfidreaders assigns them to readers 1..6
+READER_PINS = ("D24", "D22", "D4", "D26", "D27", "D5")
+
+# Rough PN532-over-SPI timings; read_passive_target without a tag always
+# waits for its full timeout, like the real chip.
+DEFAULT_LATENCY = {
+    "firmware_version": 0.004,
+    "SAM_configuration": 0.004,
+    "read_passive_target": 0.018,
+    "mifare_classic_authenticate_block": 0.008,
+    "mifare_classic_read_block": 0.006,
+    "ntag2xx_read_block": 0.006,
+    "call_function": 0.006,
+    "per_byte": 0.00008,  # extra transfer time per response byte
+}
+
+DEFAULT_MIFARE_KEY = (MIFARE_CMD_AUTH_A, b"\xff\xff\xff\xff\xff\xff")
+
+
+class SimError(RuntimeError):
+    """Raised by a simulated reader when a failure is injected."""
+
+
+def ndef_tlv(texts: Iterable[str]) -> bytearray:
+    """Encode text records as an NDEF TLV followed by the terminator TLV."""
+    payload = b"".join(ndef.message_encoder(ndef.TextRecord(t) for t in texts))
+    if len(payload) < 0xFF:
+        header = bytes([0x03, len(payload)])
+    else:
+        header = bytes([0x03, 0xFF, len(payload) >> 8, len(payload) & 0xFF])
+    return bytearray(header + payload + b"\xfe")
+
+
+class SimTag:
+    """A tag with a UID and a flat memory image (NTAG pages / MIFARE blocks)."""
+
+    def __init__(self, uid, memory: bytearray, key=None, fast_read=True):
+        self.uid = bytearray(uid)
+        self.memory = memory
+        self.key = key
+        self.fast_read = fast_read
+
+    @property
+    def readable_id(self) -> str:
+        return "-".join(str(number) for number in self.uid[:4])
+
+    @classmethod
+    def ntag213(cls, uid, texts=(), fast_read=True) -> "SimTag":
+        """7-byte UID tag, NDEF data from page 4 on (180 bytes of pages)."""
+        memory = bytearray(45 * 4)
+        memory[0:7] = bytes(uid)
+        data = ndef_tlv(texts) if texts else bytearray()
+        memory[16 : 16 + len(data)] = data
+        return cls(uid, memory, fast_read=fast_read)
+
+    @classmethod
+    def ntag2(cls, uid, text: str) -> "SimTag":
+        """Legacy NTAG2 tag: read from page 0, text NDEF starting at byte 2."""
+        memory = bytearray(45 * 4)
+        data = ndef_tlv([text])
+        memory[0:2] = bytes(uid[:2])
+        memory[2 : 2 + len(data) - 2] = data[2:]
+        return cls(uid, memory)
+
+    @classmethod
+    def mifare(cls, uid, texts=(), key=DEFAULT_MIFARE_KEY) -> "SimTag":
+        """4-byte UID MIFARE Classic 1K, NDEF data from block 4 on."""
+        memory = bytearray(64 * 16)
+        data = ndef_tlv(texts) if texts else bytearray()
+        memory[64 : 64 + len(data)] = data
+        return cls(uid, memory, key=key)
+
+
+class SimPin:
+    """Stand-in for digitalio.DigitalInOut."""
+
+    def __init__(self, pin):
+        self.pin = pin
+        self.direction = None
+        self.value = True
+
+
+class SimBus:
+    """Shared state of all simulated readers."""
+
+    def __init__(self, latency: Optional[Dict[str, float]] = None, time_scale=1.0, seed=0):
+        self.latency = dict(DEFAULT_LATENCY)
+        if latency:
+            self.latency.update(latency)
+        self.time_scale = time_scale
+        self.random = random.Random(seed)
+        self.fields: Dict[int, SimTag] = {}
+        self.placed_at: Dict[int, float] = {}
+        # (slot or None, command or None) -> failure probability
+        self.failures: Dict[tuple, float] = {}
+        self.dead = set()  # slots whose reader does not answer at all
+        self.calls: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    # --- Tag placement ---------------------------------------------------
+
+    def place(self, slot: int, tag: Optional[SimTag]) -> None:
+        """Put `tag` on the zero-based reader `slot` (None removes it)."""
+        with self._lock:
+            if tag is None:
+                self.fields.pop(slot, None)
+                self.placed_at.pop(slot, None)
+            else:
+                self.fields[slot] = tag
+                self.placed_at[slot] = time.perf_counter()
+
+    def remove(self, slot: int) -> None:
+        self.place(slot, None)
+
+    def run_script(self, steps) -> threading.Thread:
+        """Apply `(delay_seconds, slot, tag_or_None)` steps in a background thread.
+
+        Delays are relative to the start of the script and not time-scaled.
+        """
+
+        def run():
+            start = time.perf_counter()
+            for delay, slot, tag in sorted(steps, key=lambda s: s[0]):
+                remaining = start + delay - time.perf_counter()
+                if remaining > 0:
+                    time.sleep(remaining)
+                self.place(slot, tag)
+
+        thread = threading.Thread(target=run, name="pn532-sim-script", daemon=True)
+        thread.start()
+        return thread
+
+    # --- Failure injection -----------------------------------------------
+
+    def inject_failure(self, slot=None, command=None, rate=1.0) -> None:
+        """Make `command` (None = any) on `slot` (None = any) raise with probability `rate`."""
+        self.failures[(slot, command)] = rate
+
+    def clear_failures(self) -> None:
+        self.failures.clear()
+        self.dead.clear()
+
+    def _check_failure(self, slot: int, command: str) -> None:
+        if slot in self.dead:
+            raise SimError(f"reader {slot + 1} does not respond")
+        for key in ((slot, command), (slot, None), (None, command), (None, None)):
+            rate = self.failures.get(key)
+            if rate and self.random.random() < rate:
+                raise SimError(f"injected {command} failure on reader {slot + 1}")
+
+    def _command(self, slot: int, command: str, response_bytes=0, latency=None) -> None:
+        with self._lock:
+            self.calls[command] = self.calls.get(command, 0) + 1
+        if latency is None:
+            latency = self.latency.get(command, 0.0)
+        delay = latency + response_bytes * self.latency["per_byte"]
+        if delay > 0:
+            time.sleep(delay * self.time_scale)
+        self._check_failure(slot, command)
+
+    def tag_on(self, slot: int) -> Optional[SimTag]:
+        return self.fields.get(slot)
+
+
+class SimPN532:
+    """Stand-in for adafruit_pn532.spi.PN532_SPI talking to a SimBus."""
+
+    bus: SimBus = None  # set by install()
+
+    def __init__(self, spi, cs_pin, *, irq=None, reset=None, debug=False):
+        self.slot = READER_PINS.index(cs_pin.pin.name)
+        self._selected: Optional[SimTag] = None
+        self._authenticated = False
+        self.bus._command(self.slot, "firmware_version")
+
+    @property
+    def firmware_version(self):
+        self.bus._command(self.slot, "firmware_version")
+        return (0x32, 1, 6, 7)
+
+    def SAM_configuration(self):
+        self.bus._command(self.slot, "SAM_configuration")
+
+    def power_down(self):
+        return True
+
+    def read_passive_target(self, card_baud=0, timeout=1):
+        tag = self.bus.tag_on(self.slot)
+        if tag is None:
+            self._selected = None
+            self.bus._command(self.slot, "read_passive_target", latency=timeout)
+            return None
+        self.bus._command(self.slot, "read_passive_target", len(tag.uid))
+        self._selected = tag
+        self._authenticated = False
+        return bytearray(tag.uid)
+
+    def _present(self) -> Optional[SimTag]:
+        tag = self._selected
+        if tag is None or self.bus.tag_on(self.slot) is not tag:
+            return None
+        return tag
+
+    def mifare_classic_authenticate_block(self, uid, block_number, key_number, key):
+        self.bus._command(self.slot, "mifare_classic_authenticate_block")
+        tag = self._present()
+        self._authenticated = bool(
+            tag is not None
+            and tag.key is not None
+            and bytes(uid) == bytes(tag.uid)
+            and (key_number, bytes(key)) == tag.key
+        )
+        return self._authenticated
+
+    def mifare_classic_read_block(self, block_number):
+        self.bus._command(self.slot, "mifare_classic_read_block", 16)
+        tag = self._present()
+        if tag is None or not self._authenticated:
+            return None
+        return bytearray(tag.memory[block_number * 16 : block_number * 16 + 16])
+
+    def ntag2xx_read_block(self, block_number):
+        self.bus._command(self.slot, "ntag2xx_read_block", 16)
+        tag = self._present()
+        if tag is None:
+            return None
+        return bytearray(tag.memory[block_number * 4 : block_number * 4 + 4])
+
+    def call_function(self, command, response_length=0, params=(), timeout=1):
+        self.bus._command(self.slot, "call_function", response_length)
+        params = list(params)
+        tag = self._present()
+        if command != PN532_COMMAND_INDATAEXCHANGE or tag is None:
+            return bytearray([0x01])
+        op = params[1]
+        if op == NTAG_CMD_FAST_READ and tag.fast_read:
+            start, end = params[2] * 4, (params[3] + 1) * 4
+        elif op == NTAG_CMD_READ:
+            start, end = params[2] * 4, params[2] * 4 + 16
+        else:
+            # NAK: the tag falls back to IDLE and must be selected again
+            self._selected = None
+            return bytearray([0x01])
+        data = tag.memory[start:end]
+        return bytearray([0x00]) + data[: response_length - 1]
+
+
+def _fake_modules(bus: SimBus) -> Dict[str, types.ModuleType]:
+    class Pin:
+        def __init__(self, name):
+            self.name = name
+
+    board = types.ModuleType("board")
+    for name in READER_PINS + ("SCK", "MOSI", "MISO"):
+        setattr(board, name, Pin(name))
+
+    busio = types.ModuleType("busio")
+    busio.SPI = lambda *args, **kwargs: types.SimpleNamespace(
+        try_lock=lambda: True, unlock=lambda: None, configure=lambda **kw: None
+    )
+
+    digitalio = types.ModuleType("digitalio")
+    digitalio.DigitalInOut = SimPin
+    digitalio.Direction = types.SimpleNamespace(INPUT="input", OUTPUT="output")
+
+    pn532_pkg = types.ModuleType("adafruit_pn532")
+    pn532_core = types.ModuleType("adafruit_pn532.adafruit_pn532")
+    pn532_core.MIFARE_CMD_AUTH_A = MIFARE_CMD_AUTH_A
+    pn532_core.MIFARE_CMD_AUTH_B = MIFARE_CMD_AUTH_B
+    pn532_spi = types.ModuleType("adafruit_pn532.spi")
+    pn532_spi.PN532_SPI = type("PN532_SPI", (SimPN532,), {"bus": bus})
+    pn532_pkg.adafruit_pn532 = pn532_core
+    pn532_pkg.spi = pn532_spi
+
+    return {
+        "board": board,
+        "busio": busio,
+        "digitalio": digitalio,
+        "adafruit_pn532": pn532_pkg,
+        "adafruit_pn532.adafruit_pn532": pn532_core,
+        "adafruit_pn532.spi": pn532_spi,
+    }
+
+
+@contextmanager
+def install(bus: SimBus):
+    """Temporarily register the simulated hardware modules in sys.modules."""
+    fakes = _fake_modules(bus)
+    saved = {name: sys.modules.get(name) for name in fakes}
+    sys.modules.update(fakes)
+    try:
+        yield fakes
+    finally:
+        for name, module in saved.items():
+            if module is None:
+                sys.modules.pop(name, None)
+            else:
+                sys.modules[name] = module
+
+
+def load_rfidreaders(bus: SimBus, module_name="rfidreaders_sim"):
+    """Import a private copy of the real rfidreaders module wired to `bus`.
+
+    The copy is not registered as `rfidreaders`, so mocks of that module
+    (e.g. in the test suite) stay untouched. LED output is disabled and the
+    reader power-up delays are scaled by `bus.time_scale`; the SPI bus is
+    set up as `init()` would, but no scan thread is started.
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    path = os.path.join(root, "rfidreaders.py")
+    with install(bus):
+        spec = importlib.util.spec_from_file_location(module_name, path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        module.spi = module.busio.SPI(None, None, None)
+    module.display_active_leds = False
+    module.display_reader_init_status = False
+    # The power-cycle delays are part of what the scanner pays per reader
+    # init; keep them, scaled like every other simulated latency
+    module.post_init_delay *= bus.time_scale
+    module.power_on_delay *= bus.time_scale
+    return module
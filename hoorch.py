@@ -20,6 +20,7 @@ import games
 import integrity_check
 import leds
 import rfidreaders
+import tag_persistence
 import tagwriter
 from logger_util import get_logger
 from models import RFIDTag, Usage
@@ -103,8 +104,10 @@ def initial_hardware_test():
         leds.switch_on_with_color(i, (255, 0, 0))
         audio.espeaker(f"Lege eine Karte auf Leser {i + 1}")
         while True:
+            seen_version = rfidreaders.get_snapshot().version
             if rfidreaders.tags[i] is not None:
                 break
+            rfidreaders.wait_for_change(timeout=1.0, slots=[i], since_version=seen_version)
 
     leds.reset()
 
@@ -156,6 +159,7 @@ def main():
             logger.info("Shutdown Timer abgelaufen. System wird heruntergefahren.")
             audio.play_full("TTS", 196)
             leds.reset()
+            leds.flush(timeout=0.5)  # send the reset before the system goes down
             os.system("sudo shutdown -P now")
             break
 
@@ -164,6 +168,7 @@ def main():
         ) and file_lib.check_tag_attribute(rfidreaders.tags, "ENDE", "name"):
             audio.play_full("TTS", 3)
             leds.reset()
+            leds.flush(timeout=0.5)  # send the reset before the system goes down
             os.system("sudo shutdown -P now")
             break
 
@@ -201,7 +206,9 @@ def main():
         if len(game_tags) > 0 and game_tags[0].name in games.games:
             logger.info(f"Game {game_tags[0].name} starten.")
             leds.reset()
-            games.games[game_tags[0].name].start()
+            # The game owns the LEDs; the scanner's reader LEDs stay off meanwhile
+            with leds.owned_by(leds.GAME):
+                games.games[game_tags[0].name].start()
             audio.play_full("TTS", 54)  # Das Spiel ist zu Ende
             # report_stats.send_and_update_stats()
             shutdown_counter = time.monotonic() + int(
@@ -258,6 +265,12 @@ if __name__ == "__main__":
             except Exception:
                 pass
 
+            # Write tags that are still queued for the database
+            try:
+                tag_persistence.flush()
+            except Exception:
+                pass
+
             # Kill any playing sounds
             try:
                 audio.kill_sounds()
@@ -267,6 +280,8 @@ if __name__ == "__main__":
             # Reset LEDs to a safe state
             try:
                 leds.reset()
+                # reset() only queues the frame; send it before the process exits
+                leds.flush(timeout=0.5)
             except Exception:
                 pass
 
@@ -281,6 +296,7 @@ if __name__ == "__main__":
         logger.info("KeyboardInterrupt received, shutting down")
         try:
             leds.reset()
+            leds.flush(timeout=0.5)
         except Exception:
             pass
         try:
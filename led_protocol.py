@@ -0,0 +1,66 @@
+"""
+Wire format between the LED client (leds.py) and services/leds_server.py.
+
+The stream carries two kinds of messages:
+
+- JSON commands, one object per line (`{"cmd": "blink", ...}\n`).
+- Binary frames that set every pixel at once. A frame starts with the byte
+  FRAME_MAGIC, which never starts a JSON line, followed by a header with a
+  sequence number, an optional fade duration in milliseconds and the pixel
+  count, then three bytes (R, G, B) per pixel. A full frame for the 7-pixel
+  strip is 27 bytes and is decoded without any text parsing.
+"""
+
+import struct
+from collections import namedtuple
+
+FRAME_MAGIC = 0xF1
+_HEADER = struct.Struct(">BHHB")  # magic, sequence number, fade in ms, pixel count
+MAX_FADE_MS = 0xFFFF
+
+Frame = namedtuple("Frame", "seq fade_ms pixels")
+
+
+def encode_frame(pixels, seq: int, fade_ms: int = 0) -> bytes:
+    """Binary frame message for `pixels` (a list of (r, g, b) tuples)."""
+    data = bytearray(
+        _HEADER.pack(FRAME_MAGIC, seq & 0xFFFF, max(0, min(MAX_FADE_MS, int(fade_ms))), len(pixels))
+    )
+    for r, g, b in pixels:
+        data += bytes((r & 0xFF, g & 0xFF, b & 0xFF))
+    return bytes(data)
+
+
+def seq_newer(seq: int, last: int) -> bool:
+    """True if `seq` comes after `last` (16-bit, wrapping)."""
+    return 0 < (seq - last) & 0xFFFF < 0x8000
+
+
+def parse(buffer: bytearray) -> list:
+    """Remove all complete messages from `buffer` and return them.
+
+    JSON commands are returned as the raw line (bytes), binary frames as
+    Frame tuples. Incomplete data stays in the buffer.
+    """
+    messages = []
+    while buffer:
+        if buffer[0] == FRAME_MAGIC:
+            if len(buffer) < _HEADER.size:
+                break
+            _, seq, fade_ms, count = _HEADER.unpack_from(buffer)
+            end = _HEADER.size + 3 * count
+            if len(buffer) < end:
+                break
+            body = buffer[_HEADER.size:end]
+            pixels = [tuple(body[i:i + 3]) for i in range(0, len(body), 3)]
+            messages.append(Frame(seq, fade_ms, pixels))
+            del buffer[:end]
+        else:
+            newline = buffer.find(b"\n")
+            if newline < 0:
+                break
+            line = bytes(buffer[:newline]).strip()
+            del buffer[:newline + 1]
+            if line:
+                messages.append(line)
+    return messages
@@ -1,65 +1,277 @@
 #!/usr/bin/env python3
 # -*- coding: UTF8 -*-
 
+"""
+Client of the LED server (services/leds_server.py).
+
+All messages are sent over one persistent AF_UNIX connection. Sending only
+puts the message into a queue and returns; a sender thread writes everything
+queued so far in one `sendall()` and reconnects if the server was restarted.
+
+Static updates (`reset()`, `switch_all_on_with_color()`,
+`switch_on_with_color()`, `set_frame()`) are sent as one binary frame message
+that sets every pixel at once (see led_protocol.py); animations are sent as
+JSON commands.
+
+The module mirrors the frame it last sent. A static update that would not
+change that frame is not sent at all, so repeated updates from the scanner
+cost neither IPC nor server work. Animations make the mirror unknown until
+the next static update.
+
+The strip has an owner: while a game has claimed it (`claim(GAME)` or
+`with owned_by(GAME):`), updates sent with `owner=SCANNER` are dropped, so
+the scanner's "active reader" LEDs do not overwrite the game's LEDs.
+"""
+
 import json
+import queue
 import socket
+import threading
+import time
+from contextlib import contextmanager
+
+import led_protocol
 
 SOCK_FILE = "/tmp/hoorch_led.sock"
 num_pixels = 6
+STRIP_PIXELS = 7  # pixels driven by the LED server
 
+SCANNER = "scanner"
+GAME = "game"
 
-def send_led_command(cmd, **kwargs):
+MAX_QUEUED = 256  # commands waiting for the sender at most; the oldest are dropped
+RECONNECT_DELAY = 1.0  # seconds between connection attempts while the server is down
+
+_queue: "queue.Queue[bytes]" = queue.Queue(maxsize=MAX_QUEUED)
+_sock = None
+_sender = None
+_sender_lock = threading.Lock()
+_next_connect = 0.0
+_connected_once = True  # only report the first error of an outage
+
+_state_lock = threading.Lock()
+_mirror = None  # frame last sent (tuple of colors), None = unknown
+_owner = None  # None = nobody claimed the strip
+_seq = 0  # sequence number of the last frame sent
+
+
+def _ensure_sender():
+    global _sender
+    with _sender_lock:
+        if _sender is None or not _sender.is_alive():
+            _sender = threading.Thread(target=_sender_loop, name="led-ipc", daemon=True)
+            _sender.start()
+
+
+def _connect():
+    global _sock, _next_connect, _connected_once
+    now = time.monotonic()
+    if now < _next_connect:
+        return None
     try:
         s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
         s.connect(SOCK_FILE)
-        cmdobj = dict(cmd=cmd)
-        cmdobj.update(kwargs)
-        s.sendall(json.dumps(cmdobj).encode())
+    except OSError as e:
         s.close()
-    except Exception as e:
-        print(f"LED-IPC ERROR: {e} (cmd={cmd} kwargs={kwargs})")
+        _next_connect = now + RECONNECT_DELAY
+        if _connected_once:
+            print(f"LED-IPC ERROR: {e} (server not reachable, retrying)")
+            _connected_once = False
+        return None
+    _sock = s
+    _connected_once = True
+    invalidate()  # the server may have been restarted with a different frame
+    return s
+
+
+def _close():
+    global _sock
+    if _sock is not None:
+        try:
+            _sock.close()
+        except OSError:
+            pass
+        _sock = None
+
+
+def _send(data: bytes) -> bool:
+    # A broken connection (server restarted) is noticed on send: reconnect once
+    for _ in range(2):
+        s = _sock or _connect()
+        if s is None:
+            return False
+        try:
+            s.sendall(data)
+            return True
+        except OSError:
+            _close()
+    return False
+
+
+def _sender_loop():
+    while True:
+        lines = [_queue.get()]
+        while True:
+            try:
+                lines.append(_queue.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            _send(b"".join(lines))
+        finally:
+            for _ in lines:
+                _queue.task_done()
+
+
+def _enqueue(data: bytes):
+    _ensure_sender()
+    while True:
+        try:
+            _queue.put_nowait(data)
+            return
+        except queue.Full:
+            # Server too slow or down: newer LED states win
+            try:
+                _queue.get_nowait()
+                _queue.task_done()
+            except queue.Empty:
+                pass
+
+
+def send_led_command(cmd, **kwargs):
+    """Queue a JSON command for the LED server (non-blocking)."""
+    cmdobj = dict(cmd=cmd)
+    cmdobj.update(kwargs)
+    _enqueue(json.dumps(cmdobj).encode() + b"\n")
+
 
+def flush(timeout=None):
+    """Wait until every queued command was sent (or dropped)."""
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while _queue.unfinished_tasks:
+        if deadline is not None and time.monotonic() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
 
-def reset():
+
+def claim(owner=GAME):
+    """Give the strip to `owner`; updates of other owners are dropped."""
+    global _owner
+    with _state_lock:
+        _owner = owner
+
+
+def release(owner=GAME):
+    """Release the strip if `owner` holds it."""
+    global _owner
+    with _state_lock:
+        if _owner == owner:
+            _owner = None
+
+
+def current_owner():
+    return _owner
+
+
+@contextmanager
+def owned_by(owner=GAME):
+    claim(owner)
+    try:
+        yield
+    finally:
+        release(owner)
+
+
+def invalidate():
+    """Forget the mirrored frame, so the next update is sent in any case."""
+    global _mirror
+    with _state_lock:
+        _mirror = None
+
+
+def _allowed(owner):
+    return _owner is None or _owner == owner
+
+
+def set_frame(pixels, fade=0.0, owner=GAME):
+    """Set every pixel of the strip at once (missing pixels are off).
+
+    The frame is sent as one binary message, optionally cross-fading from the
+    current frame for `fade` seconds. Returns False if it was not sent because
+    it is redundant or `owner` may not draw.
+    """
+    global _mirror, _seq
+    frame = [tuple(c) for c in pixels[:STRIP_PIXELS]]
+    frame = tuple(frame + [(0, 0, 0)] * (STRIP_PIXELS - len(frame)))
+    with _state_lock:
+        if not _allowed(owner) or frame == _mirror:
+            return False
+        _mirror = frame
+        _seq = (_seq + 1) & 0xFFFF
+        # Queue under the lock so the queue order matches the mirror
+        _enqueue(led_protocol.encode_frame(frame, _seq, fade * 1000))
+    return True
+
+
+def _send_animation(owner, cmd, **kwargs):
+    global _mirror
+    with _state_lock:
+        if not _allowed(owner):
+            return False
+        _mirror = None
+        send_led_command(cmd, **kwargs)
+    return True
+
+
+def _random_color():
+    from random import randint
+
+    return (randint(0, 255), randint(0, 255), randint(0, 255))
+
+
+def reset(owner=GAME):
     """Alle LEDs aus."""
-    send_led_command("off")
+    set_frame([], owner=owner)
 
 
-def switch_all_on_with_color(color=None):
+def switch_all_on_with_color(color=None, owner=GAME):
     """Alle LEDs auf eine Farbe setzen. Ohne Angabe zufällige Farbe."""
     if color is None:
-        from random import randint
-
-        color = (randint(0, 255), randint(0, 255), randint(0, 255))
-    send_led_command("color", color=list(color))  # Farbtupel als Liste
+        color = _random_color()
+    color = tuple(color)
+    set_frame([color] * STRIP_PIXELS, owner=owner)
 
 
-def switch_on_with_color(number, color=None):
+def switch_on_with_color(number, color=None, owner=GAME):
     """Einzelne LEDs oder Liste/Tuple ansteuern (z.B. switch_on_with_color([0,3,5], (128,255,0)))"""
     if color is None:
-        from random import randint
-
-        color = (randint(0, 255), randint(0, 255), randint(0, 255))
+        color = _random_color()
+    color = tuple(color)
     if isinstance(number, int):
         leds = [number]
     else:
         leds = list(number)
-    send_led_command("multi", leds=leds, color=list(color))
+    frame = [(0, 0, 0)] * STRIP_PIXELS
+    for led in leds:
+        if 0 <= led < STRIP_PIXELS:
+            frame[led] = color
+    set_frame(frame, owner=owner)
 
 
-def rainbow_cycle(wait=0.01):
+def rainbow_cycle(wait=0.01, owner=GAME):
     """Starte Rainbow-Effect (optional: Dauer zwischen Steps, default 10ms)"""
-    send_led_command("rainbow", wait=wait)
+    _send_animation(owner, "rainbow", wait=wait)
 
 
-def rotate_one_round(time_per_led=0.2):
+def rotate_one_round(time_per_led=0.2, owner=GAME):
     """Rotiert eine Farbe rundherum."""
-    send_led_command("rotate", delay=time_per_led)
+    _send_animation(owner, "rotate", delay=time_per_led)
 
 
-def blinker():
+def blinker(owner=GAME):
     """Starte oder stoppe Blinken (toggle)."""
-    send_led_command("blink")
+    _send_animation(owner, "blink")
 
 
 def testr():
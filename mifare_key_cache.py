@@ -0,0 +1,111 @@
+"""
+Persistent LRU cache of the MIFARE Classic key that worked for a card UID.
+
+`rfidreaders.authenticate_sector` tries the cached (auth command, key) pair
+first and only probes all KEY_CANDIDATES on a miss, which saves a failed
+authentication (and its RF round-trips and back-off) for every card that does
+not use the first candidate key. The cache is a small JSON file stored next
+to the tag database and bounded to `max_entries` UIDs.
+"""
+
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from logger_util import get_logger
+
+logger = get_logger(__name__, "logs/rfid.log")
+
+CACHE_FILENAME = "mifare_keys.json"
+max_entries = 256
+
+_cache: Optional[OrderedDict] = None  # uid -> (auth_cmd, key bytes)
+_cache_path: Optional[str] = None
+_lock = threading.Lock()
+
+
+def default_path() -> str:
+    """Return the cache file path in the directory of the SQLite tag database."""
+    from database import engine
+
+    db_file = engine.url.database
+    base_dir = os.path.dirname(os.path.abspath(db_file)) if db_file else "."
+    return os.path.join(base_dir, CACHE_FILENAME)
+
+
+def uid_key(uid) -> str:
+    return bytes(uid).hex()
+
+
+def _load() -> OrderedDict:
+    global _cache, _cache_path
+    if _cache is not None:
+        return _cache
+    if _cache_path is None:
+        _cache_path = default_path()
+    entries = OrderedDict()
+    try:
+        with open(_cache_path, "r", encoding="utf-8") as f:
+            for uid, (auth_cmd, key_hex) in json.load(f).items():
+                entries[uid] = (int(auth_cmd), bytes.fromhex(key_hex))
+    except FileNotFoundError:
+        pass
+    except (ValueError, TypeError) as e:
+        logger.warning("Ignoring unreadable MIFARE key cache %s: %s", _cache_path, e)
+    _cache = entries
+    return _cache
+
+
+def _save(entries: OrderedDict) -> None:
+    data = {uid: [auth_cmd, key.hex()] for uid, (auth_cmd, key) in entries.items()}
+    tmp_path = f"{_cache_path}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, _cache_path)
+    except OSError as e:
+        logger.warning("Could not write MIFARE key cache %s: %s", _cache_path, e)
+
+
+def set_path(path: Optional[str]) -> None:
+    """Use a different cache file (None = default next to the database)."""
+    global _cache, _cache_path
+    with _lock:
+        _cache = None
+        _cache_path = path
+
+
+def get(uid) -> Optional[Tuple[int, bytes]]:
+    """Return the cached (auth_cmd, key) for a card UID, or None."""
+    with _lock:
+        entries = _load()
+        entry = entries.get(uid_key(uid))
+        if entry is not None:
+            entries.move_to_end(uid_key(uid))
+        return entry
+
+
+def put(uid, auth_cmd: int, key: bytes) -> None:
+    """Remember the working (auth_cmd, key) for a card UID."""
+    entry = (int(auth_cmd), bytes(key))
+    with _lock:
+        entries = _load()
+        k = uid_key(uid)
+        if entries.get(k) == entry:
+            entries.move_to_end(k)
+            return
+        entries[k] = entry
+        entries.move_to_end(k)
+        while len(entries) > max_entries:
+            entries.popitem(last=False)
+        _save(entries)
+
+
+def forget(uid) -> None:
+    """Drop a UID whose cached key stopped working."""
+    with _lock:
+        entries = _load()
+        if entries.pop(uid_key(uid), None) is not None:
+            _save(entries)
@@ -0,0 +1,186 @@
+"""
+Streaming story recorder.
+
+Raw 16-bit mono PCM is read from `arecord` in small chunks inside this
+process. Each chunk is processed as it arrives: the first `trim_length`
+seconds (the "3 2 1 Los" click) are dropped and a slowly adapting gain pulls
+the speech level towards the `loudness` target with a peak limit. The chunks
+are piped straight into an ffmpeg MP3 encoder that applies the 80 Hz
+highpass, so the story is encoded while it is being told. When the figure is
+lifted only the last buffered chunk has to be flushed and the finished file
+is moved into place; there is no extra pass over the recording.
+
+The gain stage uses the `audioop` module; if it is not available, ffmpeg's
+streaming `dynaudnorm` filter takes over the level adjustment.
+"""
+
+import math
+import os
+import subprocess
+import threading
+import warnings
+from pathlib import Path
+from typing import Optional
+
+from logger_util import get_logger
+
+try:
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        import audioop
+except ImportError:  # removed in Python 3.13
+    audioop = None
+
+logger = get_logger(__name__, "logs/audio.log")
+
+SAMPLE_WIDTH = 2  # bytes per sample (S16_LE)
+CHUNK_SECONDS = 0.1
+SILENCE_DB = -50.0  # chunks below this level do not update the loudness estimate
+MAX_GAIN_DB = 20.0
+MIN_GAIN_DB = -6.0
+GAIN_STEP_DB = 0.5  # max gain change per chunk, avoids audible pumping
+PEAK_LIMIT = int(32767 * 0.89)  # about -1 dBFS
+
+
+def _db(value: float) -> float:
+    return 20 * math.log10(max(value, 1e-9))
+
+
+class LevelControl:
+    """Chunk-wise gain towards a target level (approximates loudnorm in one pass)."""
+
+    def __init__(self, target_db: float):
+        self.target_db = target_db
+        self.level_db: Optional[float] = None
+        self.gain_db = 0.0
+
+    def process(self, chunk: bytes) -> bytes:
+        level = _db(audioop.rms(chunk, SAMPLE_WIDTH) / 32768)
+        if level > SILENCE_DB:
+            if self.level_db is None:
+                self.level_db = level
+            else:
+                self.level_db = 0.95 * self.level_db + 0.05 * level
+        if self.level_db is not None:
+            wanted = min(MAX_GAIN_DB, max(MIN_GAIN_DB, self.target_db - self.level_db))
+            step = max(-GAIN_STEP_DB, min(GAIN_STEP_DB, wanted - self.gain_db))
+            self.gain_db += step
+
+        gain = 10 ** (self.gain_db / 20)
+        peak = audioop.max(chunk, SAMPLE_WIDTH)
+        if peak * gain > PEAK_LIMIT:
+            gain = PEAK_LIMIT / peak
+        return audioop.mul(chunk, SAMPLE_WIDTH, gain)
+
+
+class StoryRecorder:
+    """Record from the microphone into an MP3 file in one streaming pass."""
+
+    def __init__(
+        self,
+        target: Path,
+        device: str = "plughw:0,0",
+        rate: int = 48000,
+        trim_length: float = 0.2,
+        loudness: int = -24,
+        bitrate: str = "192k",
+    ):
+        self.target = Path(target)
+        self.partial = self.target.with_name(f".{self.target.name}.part")
+        self.device = device
+        self.rate = rate
+        self.trim_bytes = int(trim_length * rate) * SAMPLE_WIDTH
+        self.level = LevelControl(loudness) if audioop is not None else None
+        self.bitrate = bitrate
+        self._capture: Optional[subprocess.Popen] = None
+        self._encoder: Optional[subprocess.Popen] = None
+        self._pump: Optional[threading.Thread] = None
+        self.bytes_recorded = 0
+
+    def _encoder_cmd(self) -> list:
+        audio_filter = "highpass=f=80"
+        if self.level is None:
+            audio_filter += ",dynaudnorm"
+        return [
+            "ffmpeg", "-y", "-loglevel", "error",
+            "-f", "s16le", "-ar", str(self.rate), "-ac", "1", "-i", "pipe:0",
+            "-filter:a", audio_filter,
+            "-c:a", "libmp3lame", "-b:a", self.bitrate,
+            "-f", "mp3", str(self.partial),
+        ]
+
+    def start(self) -> None:
+        self._encoder = subprocess.Popen(
+            self._encoder_cmd(), stdin=subprocess.PIPE, stdout=subprocess.DEVNULL
+        )
+        self._capture = subprocess.Popen(
+            [
+                "arecord", "-q", "-D", self.device, "-t", "raw",
+                "-f", "S16_LE", "-c", "1", "-r", str(self.rate),
+            ],
+            stdout=subprocess.PIPE,
+        )
+        self._pump = threading.Thread(target=self._run, name="story-recorder", daemon=True)
+        self._pump.start()
+        logger.info("Recording to %s", self.target)
+
+    def _run(self) -> None:
+        chunk_bytes = int(CHUNK_SECONDS * self.rate) * SAMPLE_WIDTH
+        to_skip = self.trim_bytes
+        try:
+            while True:
+                chunk = self._capture.stdout.read(chunk_bytes)
+                if not chunk:
+                    break
+                if len(chunk) % SAMPLE_WIDTH:
+                    chunk = chunk[: -(len(chunk) % SAMPLE_WIDTH)]
+                if to_skip:
+                    skipped = min(to_skip, len(chunk))
+                    chunk = chunk[skipped:]
+                    to_skip -= skipped
+                    if not chunk:
+                        continue
+                if self.level is not None:
+                    chunk = self.level.process(chunk)
+                self._encoder.stdin.write(chunk)
+                self.bytes_recorded += len(chunk)
+        except (OSError, ValueError) as e:
+            logger.error("Recording pipeline failed: %s", e)
+        finally:
+            try:
+                self._encoder.stdin.close()
+            except OSError:
+                pass
+
+    def stop(self, timeout: float = 10.0) -> Optional[Path]:
+        """Stop capturing, finish encoding and move the file into place.
+
+        Returns the story path, or None if nothing could be recorded.
+        """
+        if self._capture is None:
+            return None
+        self._capture.terminate()
+        try:
+            self._capture.wait(timeout)
+        except subprocess.TimeoutExpired:
+            logger.error("arecord did not stop in time for %s, killing it", self.target)
+            self._capture.kill()
+            self._capture.wait()
+        # The pump sees EOF once the capture is gone and closes the encoder input
+        self._pump.join(timeout)
+        try:
+            self._encoder.wait(timeout)
+        except subprocess.TimeoutExpired:
+            self._encoder.kill()
+            self._encoder.wait()
+            logger.error("Encoder did not finish in time for %s", self.target)
+        self._capture = None
+
+        if self._encoder.returncode != 0 or not self.partial.is_file():
+            logger.error("Recording of %s failed (encoder exit %s)", self.target, self._encoder.returncode)
+            self.partial.unlink(missing_ok=True)
+            return None
+        os.replace(self.partial, self.target)
+        seconds = self.bytes_recorded / (self.rate * SAMPLE_WIDTH)
+        logger.info("Recorded %.1f s to %s", seconds, self.target)
+        return self.target
@@ -5,8 +5,11 @@ import logging
 import os
 import threading
 import time
+from collections import deque
 from contextlib import contextmanager
+from dataclasses import dataclass
 from enum import Enum
+from typing import Any, Callable, Optional
 
 # import unicodedata
 import board
@@ -17,13 +20,14 @@ from adafruit_pn532.spi import PN532_SPI
 
 # import digitalio
 from digitalio import DigitalInOut, Direction
-from sqlmodel import Session
 
-import crud
 import file_lib
 import leds
+import mifare_key_cache
 import models
-from database import engine
+import scan_metrics
+import tag_index
+import tag_persistence
 from logger_util import get_logger
 
 sleeping_time = 0.1
@@ -72,6 +76,51 @@ tags_lock = threading.Lock()
 # Lock to serialize explicit scan cycles (used when a caller requests an immediate scan)
 scan_lock = threading.Lock()
 
+
+# Tag change notifications: every write to `tags` goes through _store_tag(), which
+# bumps `tags_version`, records a TagEvent and wakes up wait_for_change() callers.
+class TagEventKind(Enum):
+    PLACED = "placed"
+    REMOVED = "removed"
+    CHANGED = "changed"
+
+
+@dataclass(frozen=True)
+class TagEvent:
+    kind: TagEventKind
+    slot: int  # zero-based reader index (LED number is slot + 1)
+    old: Any
+    new: Any
+    version: int
+    timestamp: float
+
+
+tags_version = 0
+tags_changed = threading.Condition(tags_lock)
+recent_events = deque(maxlen=64)
+subscribers = []
+
+
+# Scanner-owned double buffer: the scanner publishes an immutable TagSnapshot and
+# swaps it into `current_snapshot` with a single assignment. Readers just grab the
+# reference, so they never take a lock or wait for a scan.
+@dataclass(frozen=True)
+class TagSnapshot:
+    tags: tuple
+    version: int  # tags_version of this content; grows with every tag change
+    timestamp: float  # time.time() of the scan pass that produced the snapshot
+
+    def age(self) -> float:
+        return time.time() - self.timestamp
+
+    def as_list(self) -> list:
+        return list(self.tags)
+
+
+current_snapshot = TagSnapshot(tuple(tags), 0, 0.0)
+# True while continuous_read() keeps rescheduling itself in the background
+scanner_running = False
+
 endofmessage = "#"  # chr(35)
 
 read_continuously = True
@@ -89,6 +138,13 @@ KEY_CANDIDATES = [
     (MIFARE_CMD_AUTH_B, b"\xff\xff\xff\xff\xff\xff"),
 ]
 
+# NTAG21x bulk reads through PN532 InDataExchange: READ returns 4 pages (16 bytes)
+# per command, FAST_READ a whole page range in one transaction.
+PN532_COMMAND_INDATAEXCHANGE = 0x40
+NTAG_CMD_READ = 0x30
+NTAG_CMD_FAST_READ = 0x3A
+NTAG_PAGE_SIZE = 4
+
 
 # Optional hardware power control pins. If you have hardware switches / MOSFETs
 # to cut VCC for each PN532, populate this list with DigitalInOut(board.DX)
@@ -99,6 +155,12 @@ use_power_control = False
 # Timing tuning
 power_on_delay = 0.12  # seconds to wait after powering a PN532 before init
 post_init_delay = 0.03  # small pause after SAM_configuration
+# read_passive_target polling per reader and pass. A freshly powered reader needs
+# a few retries until the RF field is stable; a persistent session does not.
+read_attempts = 3
+read_timeout = 0.15
+persistent_read_attempts = 1
+persistent_read_timeout = 0.05
 round_duration = 0.3  # seconds: requested max round duration
 # How long to remember a detected tag (seconds). Default value; games can override.
 tag_memory_seconds = 6.5
@@ -119,6 +181,27 @@ reader_init_status_already_shown = [False] * len(reader_pins)
 READER_INIT_LED_DELAY = 0.15
 
 
+# Persistent reader sessions: keep each initialized PN532 object alive across
+# scan cycles instead of power-cycling every reader on every pass. A reader is
+# only shut down and re-initialized after `max_reader_failures` consecutive
+# errors; a reader whose init failed is retried after `reader_reinit_interval`.
+persistent_readers = True
+max_reader_failures = 3
+reader_reinit_interval = 2.0
+
+
+class ReaderHealth(Enum):
+    UNKNOWN = "unknown"
+    OK = "ok"
+    DEGRADED = "degraded"  # recent errors, session kept alive
+    FAILED = "failed"  # session dropped, waiting for re-init
+
+
+reader_health = [ReaderHealth.UNKNOWN] * len(reader_pins)
+reader_failures = [0] * len(reader_pins)
+reader_retry_at = [0.0] * len(reader_pins)
+
+
 def _show_reader_init_status(index, color: ReaderInitLedColor):
     """Show LED status for the first initialization/self-test of a reader."""
     if not display_reader_init_status:
@@ -127,7 +210,7 @@ def _show_reader_init_status(index, color: ReaderInitLedColor):
     led_number = index + 1
 
     try:
-        leds.switch_on_with_color(led_number, color.value)
+        leds.switch_on_with_color(led_number, color.value, owner=leds.SCANNER)
         time.sleep(READER_INIT_LED_DELAY)
     except Exception as e:
         logger.debug("Could not show init LED status for reader %d: %s", index + 1, e)
@@ -166,11 +249,81 @@ def temporary_tag_memory(seconds: float):
         tag_memory_seconds = old
 
 
+# Adaptive focus scheduling. Games declare the fields (zero-based reader slots)
+# they are waiting on; each sweep then polls those fields `focus_polls_per_sweep`
+# times while the idle fields take turns, so every idle field is polled about
+# every `idle_poll_interval` sweeps. Without fields of interest all readers are
+# polled once per sweep in fixed order.
+focus_polls_per_sweep = 3
+idle_poll_interval = 3
+fields_of_interest = ()
+_idle_cursor = 0
+
+
+def set_fields_of_interest(slots):
+    """Poll the given zero-based reader slots more often than the others."""
+    global fields_of_interest
+    fields_of_interest = tuple(
+        sorted({int(s) for s in slots if 0 <= int(s) < len(reader_pins)})
+    )
+
+
+def clear_fields_of_interest():
+    """Return to polling all readers equally."""
+    set_fields_of_interest(())
+
+
+@contextmanager
+def focus_fields(slots):
+    """Context manager to poll some fields more often for the duration of a block.
+
+    Usage:
+        with focus_fields([player_slot]):
+            # wait for the player's answer
+            ...
+    """
+    global fields_of_interest
+    old = fields_of_interest
+    try:
+        set_fields_of_interest(slots)
+        yield
+    finally:
+        fields_of_interest = old
+
+
+def build_sweep_order():
+    """Return the reader indices to poll in the next sweep."""
+    global _idle_cursor
+    interest = list(fields_of_interest)
+    if not interest:
+        return list(range(len(reader_pins)))
+
+    idle = [i for i in range(len(reader_pins)) if i not in interest]
+    idle_per_sweep = -(-len(idle) // max(1, idle_poll_interval))  # ceil
+    idle_now = []
+    for _ in range(min(idle_per_sweep, len(idle))):
+        idle_now.append(idle[_idle_cursor % len(idle)])
+        _idle_cursor += 1
+
+    # Interleave: interesting fields, then one idle field, repeated
+    order = []
+    for k in range(max(1, focus_polls_per_sweep)):
+        order.extend(interest)
+        if k < len(idle_now):
+            order.append(idle_now[k])
+    order.extend(idle_now[max(1, focus_polls_per_sweep) :])
+    return order
+
+
 # Global shared round window end: when the first detection in a round occurs,
 # all subsequent detections in that same round use the same expiry time so
 # tags share a common validity window.
 round_window_end = 0.0
 
+# Index of the reader do_scan_cycle() is currently working on; used to label
+# scan_metrics observations from helpers that only get the reader object.
+scanning_reader_index = None
+
 # Wenn eine Mifare-Karte auf einem Reader erkannt wurde, fokussieren wir
 # weitere Leseversuche auf genau diesen Reader, bis die Karte erfolgreich
 # eingelesen wurde oder nicht mehr präsent ist.
@@ -201,6 +354,7 @@ def init_reader(index):
         reader_init_status[index] = "initializing"
         _show_reader_init_status(index, ReaderInitLedColor.INITIALIZING)
 
+    init_start = time.perf_counter()
     _power_set(index, True)
     time.sleep(power_on_delay)
 
@@ -215,8 +369,11 @@ def init_reader(index):
         reader.SAM_configuration()
         time.sleep(post_init_delay)
         readers[index] = reader
+        scan_metrics.observe(index + 1, "init", time.perf_counter() - init_start)
 
         reader_init_status[index] = "ok"
+        reader_health[index] = ReaderHealth.OK
+        reader_failures[index] = 0
         if show_first_init_status:
             _show_reader_init_status(index, ReaderInitLedColor.OK)
             reader_init_status_already_shown[index] = True
@@ -225,7 +382,11 @@ def init_reader(index):
         return reader
 
     except Exception as e:
+        scan_metrics.observe(index + 1, "init", time.perf_counter() - init_start)
+        scan_metrics.count_error(index + 1, "init")
         reader_init_status[index] = "error"
+        reader_health[index] = ReaderHealth.FAILED
+        reader_retry_at[index] = time.time() + reader_reinit_interval
         if show_first_init_status:
             _show_reader_init_status(index, ReaderInitLedColor.ERROR)
             reader_init_status_already_shown[index] = True
@@ -253,24 +414,232 @@ def shutdown_reader(index):
         time.sleep(0.02)
 
 
-def get_tags_snapshot(trigger_scan: bool = False):
-    """Return a shallow copy of the tags list in a thread-safe manner.
+def in_backoff(index):
+    """True while a failed reader waits for its next re-initialization."""
+    return (
+        persistent_readers
+        and readers[index] is None
+        and reader_retry_at[index] > time.time()
+    )
+
+
+def acquire_reader(index):
+    """Return a ready reader for `index`.
+
+    With `persistent_readers` the existing session is reused; otherwise (or if
+    there is no session yet) the reader is powered on and initialized. Returns
+    None if the reader is unavailable.
+    """
+    if persistent_readers and readers[index] is not None:
+        return readers[index]
+    if in_backoff(index):
+        return None
+    return init_reader(index)
+
+
+def release_reader(index):
+    """Finish a scan pass on a reader; only powers it down without persistent sessions."""
+    if not persistent_readers:
+        shutdown_reader(index)
+
 
-    If `trigger_scan` is True, attempt to run a single synchronous scan cycle
-    before returning the snapshot so the caller gets an up-to-date view.
-    Scans are serialized with `scan_lock` to avoid concurrent scanning.
-    If a scan is already in progress, this function will wait for it to finish
-    (without starting a new one) and then return the snapshot.
+def _reader_succeeded(index):
+    reader_failures[index] = 0
+    reader_health[index] = ReaderHealth.OK
+
+
+def _reader_failed(index):
+    """Count a reader error and drop the persistent session after repeated failures."""
+    scan_metrics.count_error(index + 1, "poll")
+    reader_failures[index] += 1
+    if not persistent_readers:
+        reader_health[index] = ReaderHealth.DEGRADED
+    elif reader_failures[index] >= max_reader_failures:
+        logger.warning(
+            "Reader %d failed %d times in a row; re-initializing",
+            index + 1,
+            reader_failures[index],
+        )
+        reader_health[index] = ReaderHealth.FAILED
+        reader_failures[index] = 0
+        shutdown_reader(index)
+    else:
+        reader_health[index] = ReaderHealth.DEGRADED
+
+
+def get_reader_health():
+    """Return a list with the health state name of each reader."""
+    return [h.value for h in reader_health]
+
+
+def _store_tag(index, value) -> Optional[TagEvent]:
+    """Set tags[index] and record the change. Must be called with `tags_lock` held.
+
+    Returns the TagEvent for the change, or None if the slot content did not change.
+    Pass the event to _notify() after releasing the lock.
+    """
+    global tags_version
+    old = tags[index]
+    tags[index] = value
+    if old == value:
+        return None
+
+    if old is None:
+        kind = TagEventKind.PLACED
+    elif value is None:
+        kind = TagEventKind.REMOVED
+    else:
+        kind = TagEventKind.CHANGED
+
+    tags_version += 1
+    event = TagEvent(kind, index, old, value, tags_version, time.time())
+    recent_events.append(event)
+    _publish_snapshot()
+    return event
+
+
+def _publish_snapshot():
+    """Swap in a new TagSnapshot of `tags`. Must be called with `tags_lock` held."""
+    global current_snapshot
+    current_snapshot = TagSnapshot(tuple(tags), tags_version, time.time())
+    tags_changed.notify_all()
+
+
+def _notify(event: Optional[TagEvent]):
+    """Deliver a tag event to the subscribed callbacks (runs on the scanner thread)."""
+    if event is None:
+        return
+    for callback, slots in list(subscribers):
+        if slots is not None and event.slot not in slots:
+            continue
+        try:
+            callback(event)
+        except Exception as e:
+            logger.error("Tag event callback %r failed: %s", callback, e)
+
+
+def subscribe(
+    callback: Callable[[TagEvent], None], slots=None
+) -> Callable[[], None]:
+    """Call `callback(event)` for every tag change, optionally only for some slots.
+
+    Callbacks run on the scanner thread and must return quickly. Returns a
+    function that removes the subscription again.
+    """
+    entry = (callback, None if slots is None else frozenset(slots))
+    subscribers.append(entry)
+
+    def unsubscribe():
+        try:
+            subscribers.remove(entry)
+        except ValueError:
+            pass
+
+    return unsubscribe
+
+
+def wait_for_change(
+    timeout: Optional[float] = None, slots=None, since_version: Optional[int] = None
+) -> list[TagEvent]:
+    """Block until a tag is placed, removed or changed, or until `timeout` expires.
+
+    `slots` restricts the wait to the given zero-based reader indices.
+    `since_version` is the version of the snapshot the caller last checked
+    (read it with get_snapshot().version before looking at the tags); changes
+    after it return immediately, so nothing published between the check and
+    this call is missed. Without it only changes after the call count.
+    Returns the events newer than that version (empty list on timeout).
+    """
+    slot_filter = None if slots is None else frozenset(slots)
+    deadline = None if timeout is None else time.monotonic() + timeout
+
+    with tags_changed:
+        start_version = tags_version if since_version is None else since_version
+        while True:
+            events = [
+                e
+                for e in recent_events
+                if e.version > start_version
+                and (slot_filter is None or e.slot in slot_filter)
+            ]
+            if events:
+                return events
+            if deadline is None:
+                tags_changed.wait()
+                continue
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return []
+            tags_changed.wait(remaining)
+
+
+def get_snapshot() -> TagSnapshot:
+    """Return the latest published TagSnapshot (O(1), never blocks)."""
+    return current_snapshot
+
+
+def _is_fresh(snapshot: TagSnapshot, min_version, max_age) -> bool:
+    if min_version is not None and snapshot.version < min_version:
+        return False
+    if max_age is not None and snapshot.age() > max_age:
+        return False
+    return True
+
+
+def wait_for_snapshot(
+    min_version: Optional[int] = None,
+    max_age: Optional[float] = None,
+    timeout: Optional[float] = 2.0,
+) -> TagSnapshot:
+    """Wait until a snapshot with at least `min_version` and at most `max_age`
+    seconds old is published, or until `timeout` expires.
+
+    Returns the latest snapshot either way; check `version`/`age()` if it matters.
+    """
+    snapshot = current_snapshot
+    if _is_fresh(snapshot, min_version, max_age):
+        return snapshot
+
+    deadline = None if timeout is None else time.monotonic() + timeout
+    with tags_changed:
+        while not _is_fresh(current_snapshot, min_version, max_age):
+            if deadline is None:
+                tags_changed.wait()
+                continue
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            tags_changed.wait(remaining)
+        return current_snapshot
+
+
+def get_tags_snapshot(
+    trigger_scan: bool = False,
+    min_version: Optional[int] = None,
+    max_age: Optional[float] = None,
+):
+    """Return a copy of the tags list from the latest published snapshot.
+
+    While the background scanner runs this returns immediately without taking
+    locks or scanning. Pass `min_version` and/or `max_age` to wait (up to 2 s)
+    for a fresher snapshot instead.
+
+    If the background scanner is not running and `trigger_scan` is True, a
+    single synchronous scan cycle is run first (serialized with `scan_lock`),
+    so callers outside the game loop still get an up-to-date view.
 
     Note: `do_scan_cycle()` may be defined later in the module; use a lookup
     from globals() so calling this function before that definition does not
     raise a NameError.
     """
+    if min_version is not None or max_age is not None:
+        return wait_for_snapshot(min_version, max_age).as_list()
+
     sc = globals().get("do_scan_cycle")
-    global last_update
-    if last_update + tag_memory_seconds > time.time():
-        return [t for t in tags]
-    if trigger_scan and sc is not None:
+    if scanner_running or not trigger_scan or sc is None:
+        return current_snapshot.as_list()
+
+    if last_update is None or last_update + tag_memory_seconds <= time.time():
         # Try to start a scan if none is running; otherwise wait for the running one.
         acquired = scan_lock.acquire(blocking=False)
         if acquired:
@@ -282,15 +651,15 @@ def get_tags_snapshot(trigger_scan: bool = False):
             # Another scan is in progress; wait until it finishes
             with scan_lock:
                 pass
-    with tags_lock:
-        return [t for t in tags]
+    return current_snapshot.as_list()
 
 
 def init():
     # Prepare internal tag database and start SPI bus only.
     # We no longer instantiate all PN532 objects at startup. Each reader will be
-    # powered/initialized on demand per round (init_reader/shutdown_reader).
-    file_lib.load_all_tags()
+    # powered/initialized on demand (acquire_reader) and, with persistent_readers,
+    # kept alive until it fails repeatedly.
+    tag_index.load()
     global last_update
     last_update = time.time()
     logger.info("Initializing the RFID readers (lazy-per-reader init)")
@@ -305,6 +674,11 @@ def init():
     tags[:] = [None] * len(reader_pins)
     tag_timer[:] = [0] * len(reader_pins)
     led_timer[:] = [0] * len(reader_pins)
+    reader_health[:] = [ReaderHealth.UNKNOWN] * len(reader_pins)
+    reader_failures[:] = [0] * len(reader_pins)
+    reader_retry_at[:] = [0.0] * len(reader_pins)
+    with tags_lock:
+        _publish_snapshot()
 
     # Prepare hardware power control pins (if configured)
     if use_power_control:
@@ -354,18 +728,20 @@ def extract_mifare_card(reader, tag_uid):
 
 
 def do_scan_cycle():
-    """Perform a single scan cycle: power-cycle each reader once and update tags/timers/LEDs.
+    """Perform a single scan cycle: poll each reader once and update tags/timers/LEDs.
 
     This function is intended to be called either by the periodic `continuous_read()`
-    loop or synchronously by callers that request an immediate scan via
-    `get_tags_snapshot(trigger_scan=True)`. The caller is responsible for
+    loop or synchronously via `get_tags_snapshot(trigger_scan=True)` when the
+    background scanner is not running. The caller is responsible for
     serializing access with `scan_lock` if necessary.
     """
-    # Poll readers by powering/initializing each one in turn, then shutting it down.
+    # Poll readers one after another. Without persistent sessions each reader is
+    # powered/initialized and shut down again per pass.
     # Readers are allowed to report tags in the same round; we track validity per reader
     # via `tag_timer` and `tags` rather than using a single global active reader lock.
     now = time.time()
-    global last_update, focused_reader_index
+    sweep_start = time.perf_counter()
+    global last_update, focused_reader_index, scanning_reader_index
 
     if focused_reader_index is not None and (
         focused_reader_index < 0 or focused_reader_index >= len(reader_pins)
@@ -375,21 +751,30 @@ def do_scan_cycle():
     if focused_reader_index is not None:
         reader_indices = [focused_reader_index]
     else:
-        reader_indices = list(range(len(reader_pins)))
+        reader_indices = build_sweep_order()
 
-    # Iterate over reader indices and perform a single power-cycle read per reader.
+    # Iterate over reader indices and perform a single read per reader.
     for index in reader_indices:
+        scanning_reader_index = index
         # Clear stale tag for this reader if its tag memory expired
         if tags[index] is not None and tag_timer[index] < time.time():
             # Protect changes with the lock so readers/games seeing tags get a consistent view
             with tags_lock:
-                tags[index] = None
+                event = _store_tag(index, None)
                 # also clear associated timers to be explicit
                 tag_timer[index] = 0
                 led_timer[index] = 0
+            _notify(event)
 
-        # Initialize (power on + create PN532 object) for this reader
-        r = init_reader(index)
+        # A failed reader waiting out its backoff is powered down already
+        if in_backoff(index):
+            if focused_reader_index == index:
+                focused_reader_index = None
+            continue
+
+        # Reuse the persistent session or initialize (power on + create PN532 object)
+        fresh = readers[index] is None or not persistent_readers
+        r = acquire_reader(index)
         if r is None:
             # Could not initialize; skip and ensure it's powered down
             shutdown_reader(index)
@@ -397,6 +782,11 @@ def do_scan_cycle():
                 focused_reader_index = None
             continue
 
+        if fresh:
+            attempts, timeout = read_attempts, read_timeout
+        else:
+            attempts, timeout = persistent_read_attempts, persistent_read_timeout
+
         mifare = False
         ntag213 = False
         tag_name = None
@@ -417,16 +807,19 @@ def do_scan_cycle():
             except Exception:
                 pass
 
-            max_attempts = 3
-            for attempt in range(1, max_attempts + 1):
-                try:
-                    tag_uid = r.read_passive_target(timeout=0.15)
-                except Exception:
-                    tag_uid = None
-                if tag_uid:
-                    break
-                # small backoff between attempts to allow tag/reader to settle
-                time.sleep(0.04)
+            read_errors = 0
+            with scan_metrics.timed(index + 1, "poll"):
+                for attempt in range(1, attempts + 1):
+                    try:
+                        tag_uid = r.read_passive_target(timeout=timeout)
+                    except Exception:
+                        tag_uid = None
+                        read_errors += 1
+                    if tag_uid:
+                        break
+                    # small backoff between attempts to allow tag/reader to settle
+                    if attempt < attempts:
+                        time.sleep(0.04)
 
             # Deselect this reader's CS immediately after attempts to avoid leaving it active
             try:
@@ -437,26 +830,45 @@ def do_scan_cycle():
             # proceed — if no tag_uid was found, tag_uid will be None and the logic below handles that
         except Exception as e:
             # On read/setup error skip this reader iteration
-            shutdown_reader(index)
+            _reader_failed(index)
+            release_reader(index)
+            if focused_reader_index == index:
+                focused_reader_index = None
+            continue
+
+        if read_errors == attempts:
+            # Every poll raised: the reader (not the tag) is in trouble
+            _reader_failed(index)
+            release_reader(index)
             if focused_reader_index == index:
                 focused_reader_index = None
             continue
+        _reader_succeeded(index)
 
         if tag_uid:
             # Convert tag_uid (bytearray) to a readable ID string (e.g., "4-7-26-160")
             id_readable = "-".join(str(number) for number in tag_uid[:4])
 
-            tags[index] = id_readable
-
             # Check type by UID length
             if len(tag_uid) == 4:
                 mifare = True
             elif len(tag_uid) == 7:
                 ntag213 = True
+            scan_metrics.count_detection(
+                index + 1, "mifare" if mifare else "ntag213" if ntag213 else "ntag2"
+            )
 
-            # Lookup in database
+            # Lookup in the in-memory tag index (no SQL on the polling path)
             tag_name = file_lib.get_all_figures_by_rfid_tag(id_readable)
 
+            # Show the raw UID on an empty slot while an unknown tag is read.
+            # Known tags are stored directly below, so they cause a single event;
+            # occupied slots keep their tag so a re-detection causes no event.
+            if not tag_name and tags[index] is None:
+                with tags_lock:
+                    event = _store_tag(index, id_readable)
+                _notify(event)
+
             # Nur neue Mifare-Karten ohne DB-Eintrag auf diesen Reader fokussieren,
             # bis das eigentliche Einlesen erfolgreich war oder die Karte entfernt wurde.
             if mifare and not tag_name:
@@ -471,8 +883,8 @@ def do_scan_cycle():
                     tag_name = read_from_ntag2(r)
 
                 if tag_name == "#error#":
-                    # On error, do not set any timers; shutdown and continue
-                    shutdown_reader(index)
+                    # On error, do not set any timers; release the reader and continue
+                    release_reader(index)
                     if focused_reader_index == index:
                         focused_reader_index = None
                     continue
@@ -486,8 +898,9 @@ def do_scan_cycle():
         # Update tag storage/timers. If no tag and previous tag_timer expired, clear.
         if tag_name is None and tag_timer[index] < time.time():
             with tags_lock:
-                tags[index] = None
+                event = _store_tag(index, None)
                 tag_timer[index] = 0
+            _notify(event)
 
         if tag_name is not None:
             # If this is the first detection in this loop, set the shared LED expiry window
@@ -503,7 +916,8 @@ def do_scan_cycle():
                 # For LED display, use the shared round window end so all LEDs for this pass
                 # have the same expiry and none expire before the loop completes.
                 led_timer[index] = round_window_end
-                tags[index] = tag_name
+                event = _store_tag(index, tag_name)
+            _notify(event)
 
             # Critical log for detection (only these are visible with current logger level)
             logger.debug(
@@ -519,18 +933,27 @@ def do_scan_cycle():
         # Nur die LEDs durch das Lese-Modul steuern, wenn display_active_leds True ist.
         if display_active_leds:
             if len(active_leds) > 0:
-                leds.switch_on_with_color(active_leds, (0, 255, 0))
+                leds.switch_on_with_color(active_leds, (0, 255, 0), owner=leds.SCANNER)
             else:
-                leds.reset()
+                leds.reset(owner=leds.SCANNER)
         # Wenn display_active_leds False ist, machen wir keine LED-Aktionen,
-        # fahren aber normal fort (z. B. shutdown_reader wird trotzdem ausgeführt).
+        # fahren aber normal fort (z. B. release_reader wird trotzdem ausgeführt).
 
-        # Shutdown this reader (power off / remove object) to avoid interference.
-        shutdown_reader(index)
+        # Without persistent sessions power the reader off to avoid interference.
+        release_reader(index)
 
     # Emit a concise snapshot log of current tags (critical so it is visible)
     # logger.critical("Current Tags %s", get_tags_snapshot())
     last_update = time.time()
+    scanning_reader_index = None
+    # Republish so the snapshot timestamp reflects this pass even without changes
+    with tags_lock:
+        _publish_snapshot()
+
+    scan_metrics.observe_sweep(time.perf_counter() - sweep_start)
+    for i, health in enumerate(reader_health):
+        scan_metrics.set_reader_state(i + 1, health.value)
+    scan_metrics.maybe_export()
 
 
 def continuous_read():
@@ -539,6 +962,8 @@ def continuous_read():
     The actual scanning logic lives in do_scan_cycle(); continuous_read simply
     serializes access via `scan_lock` and reschedules itself.
     """
+    global scanner_running
+    scanner_running = read_continuously
     # If another scan is currently running, do not start a new one.
     acquired = scan_lock.acquire(blocking=False)
     if not acquired:
@@ -565,15 +990,13 @@ def read_from_mifare(reader, tag_uid: str):
 
     tag_uid_readable = "-".join(str(number) for number in tag_uid[:4])
 
-    tag_uid_database = file_lib.get_all_rfid_tags_by_tag_id(tag_uid_readable)
+    tag_uid_database = tag_index.lookup(tag_uid_readable)
 
     if tag_uid_database:
         return tag_uid_database
 
     data_list = extract_mifare_card(reader, tag_uid)
 
-    last_created = None
-
     create_tags_list = []
 
     if data_list:
@@ -590,19 +1013,65 @@ def read_from_mifare(reader, tag_uid: str):
                 )
             )
 
-    with Session(engine) as session:
-        # Persist the new RFID tag in the database
-        for tag in create_tags_list:
-            last_created = crud.create_rfid_tag(tag, db=session)
-            if last_created is None:
-                logger.warning(
-                    f"RFID read, but could not create new tag in DB: {tag_uid_readable}"
-                )
-                return None
-            else:
-                logger.info(f"New RFID tag created in DB: {last_created}")
+    # Index the new tags right away; tag_persistence writes them to the database
+    # in the background so the scan loop never waits for a commit.
+    if tag_persistence.persist(create_tags_list):
+        logger.info(f"New RFID tag queued for DB: {tag_uid_readable}")
+
+    return tag_index.lookup(tag_uid_readable) or None
+
+
+def _metrics_reader():
+    """1-based reader number for scan_metrics (0 if called outside a scan cycle)."""
+    return 0 if scanning_reader_index is None else scanning_reader_index + 1
+
+
+def _ntag_exchange(reader, params, response_length):
+    """Send an NTAG command via InDataExchange; return the data bytes or None."""
+    response = reader.call_function(
+        PN532_COMMAND_INDATAEXCHANGE,
+        params=[0x01] + list(params),
+        response_length=response_length + 1,
+    )
+    # First byte is the PN532 status; 0x00 = success
+    if response is None or len(response) < response_length + 1 or response[0] != 0x00:
+        return None
+    return bytearray(response[1 : response_length + 1])
+
+
+def read_ntag_pages(reader, start_page, end_page):
+    """Read NTAG pages start_page..end_page-1 in as few transactions as possible.
+
+    Tries a single FAST_READ first, then 16-byte READ commands (4 pages each).
+    Returns the page data, or None if the bulk read failed so callers can fall
+    back to per-block reads.
+    """
+    length = (end_page - start_page) * NTAG_PAGE_SIZE
+    try:
+        data = _ntag_exchange(
+            reader, [NTAG_CMD_FAST_READ, start_page, end_page - 1], length
+        )
+        if data is not None:
+            return data
 
-    return last_created
+        # A NAK (e.g. FAST_READ unsupported) sends the tag back to IDLE;
+        # select it again before the next command.
+        if reader.read_passive_target(timeout=0.1) is None:
+            return None
+
+        data = bytearray()
+        for page in range(start_page, end_page, 4):
+            chunk = _ntag_exchange(reader, [NTAG_CMD_READ, page], 16)
+            if chunk is None:
+                reader.read_passive_target(timeout=0.1)
+                return None
+            data.extend(chunk)
+        return data[:length]
+    except Exception as e:
+        logger.debug(
+            "Bulk NTAG read of pages %d..%d failed: %s", start_page, end_page - 1, e
+        )
+        return None
 
 
 def read_from_ntag2(reader):
@@ -610,10 +1079,15 @@ def read_from_ntag2(reader):
 
     logger.info("called read_from_ntag2 function")
 
-    # Read 4 bytes from blocks 0-11
+    # Read 4 bytes from blocks 0-11 (in bulk if possible, else block by block)
     try:
-        for i in range(0, 12):
-            read_data.extend(reader.ntag2xx_read_block(i))
+        with scan_metrics.timed(_metrics_reader(), "ntag_read"):
+            bulk = read_ntag_pages(reader, 0, 12)
+            if bulk is not None:
+                read_data.extend(bulk)
+            else:
+                for i in range(0, 12):
+                    read_data.extend(reader.ntag2xx_read_block(i))
         to_decode = read_data[2 : read_data.find(b"\xfe")]
 
         text = list(ndef.message_decoder(to_decode))[0].text
@@ -621,6 +1095,7 @@ def read_from_ntag2(reader):
         return text
 
     except TypeError:
+        scan_metrics.count_error(_metrics_reader(), "ntag_read")
         logger.error(
             "NTAG2 Error while reading RFID tag content. Tag was probably removed before reading was completed."
         )
@@ -632,70 +1107,21 @@ def read_from_ntag2(reader):
         return "#error#"
 
 
-def read_from_ntag213(reader, tag_uid: str):
-    read_data = bytearray(0)
-
-    tag_uid_readable = "-".join(str(number) for number in tag_uid[:4])
-
-    # Check if tag already exists in DB
-    tag_uid_database = file_lib.get_figure_from_database(tag_uid_readable)
-    if tag_uid_database:
-        return tag_uid_database
-
-    # Before attempting to read blocks, behave like tagwriter: try to (re-)select the tag
-    # to make sure the tag is really present/stable. This mirrors the interactive readers
-    # that wait for a tag when writing/assigning missing tags.
-    preselect_attempts = 3
-    preselect_timeout = 1.0  # seconds, similar to tagwriter's interactive timeouts
-    uid_match = False
-    for pre in range(preselect_attempts):
-        try:
-            uid_now = reader.read_passive_target(timeout=preselect_timeout)
-        except Exception as e:
-            logger.debug(f"Preselect attempt {pre + 1} failed: {e}")
-            uid_now = None
-        if uid_now is None:
-            logger.debug(f"Preselect attempt {pre + 1}: no tag detected")
-            continue
-        # Compare first 4 UID bytes (the readable id format used elsewhere)
-        try:
-            if uid_now[:4] == tag_uid[:4]:
-                uid_match = True
-                logger.debug(
-                    "Preselect matched tag UID before NTAG213 read (attempt %d)",
-                    pre + 1,
-                )
-                break
-            else:
-                logger.debug(
-                    "Preselect attempt %d: different tag detected (%s)",
-                    pre + 1,
-                    uid_now,
-                )
-                # Keep trying to allow the correct tag to be placed
-                continue
-        except Exception:
-            # If comparison fails for any reason, just continue trying
-            continue
-
-    if not uid_match:
-        logger.info(
-            "Proceeding to read NTAG213 blocks for %s without confirmed re-select (tag may be unstable)",
-            tag_uid_readable,
-        )
+def _read_ntag213_blocks(reader, tag_uid, start_block, end_block) -> bytearray:
+    """Read NTAG213 blocks one by one (fallback for read_ntag_pages).
 
-    # Read NTAG213 blocks starting at user data area (block 4). Stop early when the
-    # TLV terminator (0xFE) is found or when an NDEF payload can be extracted.
-    # Keep retries/reselection and pad missing blocks with zeros so indices remain stable.
+    Stops early when the TLV terminator (0xFE) is found or when an NDEF payload
+    can be extracted. Keeps retries/reselection and pads missing blocks with
+    zeros so indices remain stable.
+    """
     max_attempts = 3
     retry_delay = 0.1  # seconds between retry attempts for the same block
     per_block_delay = 0.03  # small pause after a successful block read
     reselection_timeout = 0.3  # timeout for a quick re-check of tag presence
-    start_block = 4
-    end_block = 24
 
     # flag to break outer loop when we've found payload/terminator
     found_early_termination = False
+    read_data = bytearray(0)
 
     for i in range(start_block, end_block):
         success = False
@@ -755,6 +1181,7 @@ def read_from_ntag213(reader, tag_uid: str):
             #  if attempt < max_attempts:
             #      time.sleep(retry_delay)
         if not success:
+            scan_metrics.count_error(_metrics_reader(), "ntag_read")
             # Instead of aborting the whole read, pad missing/empty blocks with zeros
             logger.warning(
                 f"Could not read NTAG213 block {i} after {max_attempts} attempts — padding with zeros and continuing"
@@ -768,6 +1195,77 @@ def read_from_ntag213(reader, tag_uid: str):
         if found_early_termination:
             break
 
+    return read_data
+
+
+def read_from_ntag213(reader, tag_uid: str):
+    read_data = bytearray(0)
+
+    tag_uid_readable = "-".join(str(number) for number in tag_uid[:4])
+
+    # Check if tag already exists in DB
+    tag_uid_database = tag_index.lookup(tag_uid_readable)
+    if tag_uid_database:
+        return tag_uid_database
+
+    # Before attempting to read blocks, behave like tagwriter: try to (re-)select the tag
+    # to make sure the tag is really present/stable. This mirrors the interactive readers
+    # that wait for a tag when writing/assigning missing tags.
+    preselect_attempts = 3
+    preselect_timeout = 1.0  # seconds, similar to tagwriter's interactive timeouts
+    uid_match = False
+    for pre in range(preselect_attempts):
+        try:
+            uid_now = reader.read_passive_target(timeout=preselect_timeout)
+        except Exception as e:
+            logger.debug(f"Preselect attempt {pre + 1} failed: {e}")
+            uid_now = None
+        if uid_now is None:
+            logger.debug(f"Preselect attempt {pre + 1}: no tag detected")
+            continue
+        # Compare first 4 UID bytes (the readable id format used elsewhere)
+        try:
+            if uid_now[:4] == tag_uid[:4]:
+                uid_match = True
+                logger.debug(
+                    "Preselect matched tag UID before NTAG213 read (attempt %d)",
+                    pre + 1,
+                )
+                break
+            else:
+                logger.debug(
+                    "Preselect attempt %d: different tag detected (%s)",
+                    pre + 1,
+                    uid_now,
+                )
+                # Keep trying to allow the correct tag to be placed
+                continue
+        except Exception:
+            # If comparison fails for any reason, just continue trying
+            continue
+
+    if not uid_match:
+        logger.info(
+            "Proceeding to read NTAG213 blocks for %s without confirmed re-select (tag may be unstable)",
+            tag_uid_readable,
+        )
+
+    # Read NTAG213 blocks starting at user data area (block 4). The whole NDEF
+    # area is fetched in one bulk transaction; if that fails we fall back to
+    # reading block by block with retries.
+    start_block = 4
+    end_block = 24
+    read_start = time.perf_counter()
+
+    read_data = read_ntag_pages(reader, start_block, end_block)
+    if read_data is None:
+        logger.debug("Bulk NTAG read failed; falling back to per-block reads")
+        read_data = _read_ntag213_blocks(reader, tag_uid, start_block, end_block)
+
+    scan_metrics.observe(
+        _metrics_reader(), "ntag_read", time.perf_counter() - read_start
+    )
+
     create_tags_list = []
 
     ndef_payload = extract_ndef_payload(read_data)
@@ -820,19 +1318,10 @@ def read_from_ntag213(reader, tag_uid: str):
             )
         )
 
-    last_created = None
-    with Session(engine) as session:
-        for tag in create_tags_list:
-            last_created = crud.create_rfid_tag(tag, db=session)
-            if last_created is None:
-                logger.warning(
-                    f"NTAG213 read, but could not create new tag in DB: {tag_uid_readable}"
-                )
-                return None
-            else:
-                logger.info(f"New NTAG213 RFID tag created in DB: {last_created}")
+    if tag_persistence.persist(create_tags_list):
+        logger.info(f"New NTAG213 RFID tag queued for DB: {tag_uid_readable}")
 
-    return last_created
+    return tag_index.lookup(tag_uid_readable) or None
 
 
 def extract_ndef_payload(data):
@@ -898,15 +1387,31 @@ def extract_ndef_payload(data):
 
 
 def authenticate_sector(reader, uid, block_in_sector):
-    for auth_cmd, key in KEY_CANDIDATES:
-        try:
-            if reader.mifare_classic_authenticate_block(
-                uid, block_in_sector, auth_cmd, key
-            ):
-                return auth_cmd, key
-        except Exception:
-            pass
-        time.sleep(0.02)
+    """Authenticate a sector, trying the key remembered for this UID first.
+
+    Falls back to probing all KEY_CANDIDATES on a cache miss and remembers
+    the working key in mifare_key_cache.
+    """
+    cached = mifare_key_cache.get(uid)
+    candidates = list(KEY_CANDIDATES)
+    if cached is not None:
+        candidates = [cached] + [c for c in candidates if c != cached]
+
+    with scan_metrics.timed(_metrics_reader(), "auth"):
+        for auth_cmd, key in candidates:
+            try:
+                if reader.mifare_classic_authenticate_block(
+                    uid, block_in_sector, auth_cmd, key
+                ):
+                    if (auth_cmd, key) != cached:
+                        mifare_key_cache.put(uid, auth_cmd, key)
+                    return auth_cmd, key
+            except Exception:
+                pass
+            time.sleep(0.02)
+    if cached is not None:
+        mifare_key_cache.forget(uid)
+    scan_metrics.count_error(_metrics_reader(), "auth")
     return None, None
 
 
@@ -923,18 +1428,20 @@ def read_ndef_blocks(reader, uid, start_block=4):
 
     data = bytearray()
 
-    for blk in (4, 5, 6):
-        blk_data = reader.mifare_classic_read_block(blk)
-        if blk_data is None:
-            print(f"Reading block {blk} failed")
-            return None
+    with scan_metrics.timed(_metrics_reader(), "mifare_read"):
+        for blk in (4, 5, 6):
+            blk_data = reader.mifare_classic_read_block(blk)
+            if blk_data is None:
+                print(f"Reading block {blk} failed")
+                scan_metrics.count_error(_metrics_reader(), "mifare_read")
+                return None
 
-        data.extend(blk_data)
+            data.extend(blk_data)
 
-        if 0xFE in blk_data:
-            break
+            if 0xFE in blk_data:
+                break
 
-        time.sleep(0.01)
+            time.sleep(0.01)
 
     return data
 
@@ -944,15 +1451,19 @@ def reset_tags():
     global last_update, round_window_end, focused_reader_index
 
     with tags_lock:
-        tags[:] = [None] * len(reader_pins)
+        events = [_store_tag(i, None) for i in range(len(reader_pins))]
         tag_timer[:] = [0] * len(reader_pins)
         led_timer[:] = [0] * len(reader_pins)
+    for event in events:
+        _notify(event)
 
     round_window_end = 0.0
     focused_reader_index = None
 
-    # Force the next get_tags_snapshot(trigger_scan=True) to scan immediately.
+    # Force the next synchronous get_tags_snapshot(trigger_scan=True) to scan immediately.
     last_update = 0
+    with tags_lock:
+        _publish_snapshot()
 
 
 # Start the script
@@ -0,0 +1,233 @@
+"""
+Timing and error metrics for the RFID scanner.
+
+`rfidreaders` records the latency of each scan phase per reader (PN532 init,
+the read_passive_target poll loop, MIFARE key probing, NTAG/MIFARE block reads)
+plus detection and error counts. Every observation updates cumulative
+histogram buckets and a small per-series ring buffer of recent samples, so
+recording costs a few dict/deque operations on the scan thread.
+
+The scanner runs in the main HOORCH process while the web server runs as a
+separate service, so the scanner periodically writes the metrics in
+Prometheus text format to METRICS_FILE (see `maybe_export`) and the web
+server's /metrics endpoint serves that file.
+"""
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from typing import Optional
+
+METRICS_FILE = "/tmp/hoorch_rfid_metrics.prom"
+export_interval = 5.0  # seconds between metric file exports
+
+PHASES = ("init", "poll", "auth", "mifare_read", "ntag_read")
+# Histogram bucket upper bounds in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+RING_SIZE = 128  # recent samples kept per (reader, phase)
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+class _Series:
+    __slots__ = ("buckets", "total", "count", "recent")
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS) + 1)  # last bucket = +Inf
+        self.total = 0.0
+        self.count = 0
+        self.recent = deque(maxlen=RING_SIZE)
+
+    def add(self, seconds: float):
+        self.buckets[bisect_left(BUCKETS, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+        self.recent.append(seconds)
+
+
+_lock = threading.Lock()
+_series: dict = {}  # (reader, phase) -> _Series
+_sweeps = _Series()
+_detections: dict = {}  # (reader, tag_type) -> count
+_errors: dict = {}  # (reader, phase) -> count
+_reader_states: dict = {}  # reader -> state name
+_last_export = 0.0
+
+
+def observe(reader: int, phase: str, seconds: float) -> None:
+    """Record one phase duration for a (1-based) reader number."""
+    key = (reader, phase)
+    with _lock:
+        series = _series.get(key)
+        if series is None:
+            series = _series[key] = _Series()
+        series.add(seconds)
+
+
+@contextmanager
+def timed(reader: int, phase: str):
+    """Time the enclosed block as one observation of `phase` on `reader`."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(reader, phase, time.perf_counter() - start)
+
+
+def observe_sweep(seconds: float) -> None:
+    """Record the duration of one complete scan cycle over all readers."""
+    with _lock:
+        _sweeps.add(seconds)
+
+
+def count_detection(reader: int, tag_type: str) -> None:
+    with _lock:
+        _detections[(reader, tag_type)] = _detections.get((reader, tag_type), 0) + 1
+
+
+def count_error(reader: int, phase: str) -> None:
+    with _lock:
+        _errors[(reader, phase)] = _errors.get((reader, phase), 0) + 1
+
+
+def set_reader_state(reader: int, state: str) -> None:
+    _reader_states[reader] = state
+
+
+def reset() -> None:
+    """Forget all recorded metrics."""
+    global _sweeps
+    with _lock:
+        _series.clear()
+        _sweeps = _Series()
+        _detections.clear()
+        _errors.clear()
+        _reader_states.clear()
+
+
+def _quantile(sorted_samples, q: float) -> float:
+    if not sorted_samples:
+        return 0.0
+    idx = min(len(sorted_samples) - 1, int(q * len(sorted_samples)))
+    return sorted_samples[idx]
+
+
+def _labels(**labels) -> str:
+    return ",".join(f'{k}="{v}"' for k, v in labels.items())
+
+
+def _histogram_lines(name: str, series: _Series, **labels) -> list:
+    lines = []
+    cumulative = 0
+    for bound, n in zip(BUCKETS, series.buckets):
+        cumulative += n
+        lines.append(f"{name}_bucket{{{_labels(**labels, le=bound)}}} {cumulative}")
+    lines.append(f"{name}_bucket{{{_labels(**labels, le='+Inf')}}} {series.count}")
+    suffix = f"{{{_labels(**labels)}}}" if labels else ""
+    lines.append(f"{name}_sum{suffix} {series.total:.6f}")
+    lines.append(f"{name}_count{suffix} {series.count}")
+    return lines
+
+
+def render_prometheus() -> str:
+    """Return all metrics in the Prometheus text exposition format."""
+    with _lock:
+        series_items = sorted(_series.items())
+        recent = {key: sorted(s.recent) for key, s in series_items}
+        sweeps = _sweeps
+        detections = sorted(_detections.items())
+        errors = sorted(_errors.items())
+        states = sorted(_reader_states.items())
+
+        lines = [
+            "# HELP hoorch_rfid_phase_seconds Duration of RFID scan phases per reader.",
+            "# TYPE hoorch_rfid_phase_seconds histogram",
+        ]
+        for (reader, phase), series in series_items:
+            lines += _histogram_lines(
+                "hoorch_rfid_phase_seconds", series, reader=reader, phase=phase
+            )
+
+        lines += [
+            f"# HELP hoorch_rfid_phase_recent_seconds Phase durations over the last {RING_SIZE} samples.",
+            "# TYPE hoorch_rfid_phase_recent_seconds summary",
+        ]
+        for (reader, phase), samples in recent.items():
+            for q in QUANTILES:
+                value = _quantile(samples, q)
+                lines.append(
+                    f"hoorch_rfid_phase_recent_seconds{{{_labels(reader=reader, phase=phase, quantile=q)}}} {value:.6f}"
+                )
+            lines.append(
+                f"hoorch_rfid_phase_recent_seconds_sum{{{_labels(reader=reader, phase=phase)}}} {sum(samples):.6f}"
+            )
+            lines.append(
+                f"hoorch_rfid_phase_recent_seconds_count{{{_labels(reader=reader, phase=phase)}}} {len(samples)}"
+            )
+
+        lines += [
+            "# HELP hoorch_rfid_sweep_seconds Duration of a full scan cycle.",
+            "# TYPE hoorch_rfid_sweep_seconds histogram",
+        ]
+        lines += _histogram_lines("hoorch_rfid_sweep_seconds", sweeps)
+
+    lines += [
+        "# HELP hoorch_rfid_detections_total Tags detected per reader and tag type.",
+        "# TYPE hoorch_rfid_detections_total counter",
+    ]
+    for (reader, tag_type), n in detections:
+        lines.append(
+            f"hoorch_rfid_detections_total{{{_labels(reader=reader, tag_type=tag_type)}}} {n}"
+        )
+
+    lines += [
+        "# HELP hoorch_rfid_errors_total Errors per reader and scan phase.",
+        "# TYPE hoorch_rfid_errors_total counter",
+    ]
+    for (reader, phase), n in errors:
+        lines.append(
+            f"hoorch_rfid_errors_total{{{_labels(reader=reader, phase=phase)}}} {n}"
+        )
+
+    lines += [
+        "# HELP hoorch_rfid_reader_state Current health state per reader (1 = active state).",
+        "# TYPE hoorch_rfid_reader_state gauge",
+    ]
+    for reader, state in states:
+        lines.append(
+            f"hoorch_rfid_reader_state{{{_labels(reader=reader, state=state)}}} 1"
+        )
+
+    return "\n".join(lines) + "\n"
+
+
+def export(path: str = METRICS_FILE) -> None:
+    """Atomically write the current metrics to `path`."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(render_prometheus())
+    os.replace(tmp_path, path)
+
+
+def maybe_export(path: str = METRICS_FILE) -> None:
+    """Export the metrics if `export_interval` has passed since the last export."""
+    global _last_export
+    now = time.monotonic()
+    if now - _last_export < export_interval:
+        return
+    _last_export = now
+    try:
+        export(path)
+    except OSError:
+        pass
+
+
+def read_exported(path: str = METRICS_FILE) -> Optional[str]:
+    """Return the last exported metrics text, or None if nothing was exported yet."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
@@ -1,12 +1,47 @@
 #!/usr/bin/env python3
+"""
+LED server: owns the NeoPixel strip and executes commands from clients.
+
+Clients (see leds.py) keep one connection open and send newline-delimited
+JSON commands. All connections are served from one selector loop, and every
+complete line received is executed in order. A client that sends a single
+command without a newline and closes the connection is still understood.
+
+The strip shows a static base frame (set by "color", "multi" and "off") with
+animation layers ("rainbow", "blink", "rotate") drawn on top of it. The
+animations never sleep: the selector loop renders a frame every TICK seconds
+while at least one animation runs, so commands are handled immediately. Like
+the old blocking animations they run to completion: a static command only
+changes the base frame below them, which shows once they are done ("stop"
+cancels them early). An animation command replaces the running animations
+(and clears the base frame, as before) unless it is sent with
+"mode": "overlay", in which case it is drawn on top of what is running.
+
+Commands only change the server's frame state. The loop composes the frame
+at most `max_fps` times per second, so a burst of commands arriving within
+one frame interval is merged into a single update, and it pushes pixels and
+calls `show()` only if the frame differs from the one on the strip. The cap
+is set with the LED_MAX_FPS environment variable or the "max_fps" command.
+
+Besides JSON, clients can send binary frames (see led_protocol.py) that set
+all pixels at once, optionally fading from the current frame. Frames carry a
+sequence number; a frame older than the last one applied on the same
+connection is dropped. The same frame can be sent as JSON:
+{"cmd": "frame", "pixels": [[r, g, b], ...], "seq": 1, "fade": 0.3}.
+
+Run it as `python -m services.leds_server` from the HOORCH directory.
+"""
 import json
 import os
+import selectors
 import socket
 import time
 
 import board
 import neopixel
 
+import led_protocol
+
 SOCK_FILE = "/tmp/hoorch_led.sock"
 
 # Hardware-Setup
@@ -17,60 +52,200 @@ pixels = neopixel.NeoPixel(
     pixel_pin, num_pixels, brightness=0.9, auto_write=False, pixel_order=ORDER
 )
 
+TICK = 0.02  # seconds between animation frames
+max_fps = float(os.getenv("LED_MAX_FPS", "50"))  # frame-rate cap of the strip
+OFF = (0, 0, 0)
 
-def blink(color, times=5, interval=0.3, leds=None):
-    """
-    Lässt LEDs blinken.
-    :param color: Farbe als [R, G, B]
-    :param times: Anzahl der Blinks
-    :param interval: Pause zwischen Ein/Aus (Sekunden)
-    :param leds: Liste der LEDs (oder Einzel-LED), None für alle
+base = [OFF] * num_pixels  # static frame below the animations
+animations = []  # active animation layers, drawn in this order
+shown = None  # frame currently on the strip (None = unknown)
+dirty = False  # frame state changed since the last render
+last_render = 0.0
+
+
+def _led_list(leds):
+    """LED indices of a command (None = all), ignoring indices off the strip."""
+    if leds is None:
+        return list(range(num_pixels))
+    if isinstance(leds, int):
+        leds = [leds]
+    return [led for led in leds if 0 <= led < num_pixels]
+
+
+class Animation:
+    """One animation layer. `pixel()` returns None where the layer is transparent."""
+
+    transition = False  # True for fades between base frames
+
+    def __init__(self, duration, leds=None):
+        self.started = time.monotonic()
+        self.duration = duration
+        self.leds = _led_list(leds)
+
+    def finished(self, now):
+        return now - self.started >= self.duration
+
+    def pixel(self, led, elapsed):
+        raise NotImplementedError
+
+
+class Rainbow(Animation):
+    def __init__(self, wait=0.01, leds=None):
+        super().__init__(255 * wait, leds)
+        self.wait = max(wait, 1e-3)
+
+    def pixel(self, led, elapsed):
+        step = int(elapsed / self.wait)
+        return wheel(((led * 256 // num_pixels) + step) & 255)
+
+
+class Blink(Animation):
+    def __init__(self, color, times=5, interval=0.3, leds=None):
+        super().__init__(times * 2 * interval, leds)
+        self.color = tuple(color)
+        self.interval = max(interval, 1e-3)
+
+    def pixel(self, led, elapsed):
+        return self.color if int(elapsed / self.interval) % 2 == 0 else OFF
+
+
+class Rotate(Animation):
+    """A single lit LED that moves once around the strip."""
+
+    def __init__(self, color=(255, 255, 255), delay=0.2, leds=None):
+        super().__init__(num_pixels * delay, leds)
+        self.color = tuple(color)
+        self.delay = max(delay, 1e-3)
+
+    def pixel(self, led, elapsed):
+        return self.color if led == int(elapsed / self.delay) else None
+
+
+class Fade(Animation):
+    """Cross-fade from one frame to another (the target is the new base frame)."""
+
+    transition = True
+
+    def __init__(self, start, target, duration):
+        super().__init__(duration)
+        self.start = start
+        self.target = target
+
+    def pixel(self, led, elapsed):
+        t = min(1.0, elapsed / self.duration)
+        a, b = self.start[led], self.target[led]
+        return tuple(int(a[c] + (b[c] - a[c]) * t) for c in range(3))
+
+
+class Connection:
+    """Read state of one client connection."""
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.buffer = bytearray()
+        self.last_seq = None  # sequence number of the last frame applied
+
+    def accept_seq(self, seq):
+        if seq is None:
+            return True
+        if self.last_seq is not None and not led_protocol.seq_newer(seq, self.last_seq):
+            return False
+        self.last_seq = seq
+        return True
+
+
+def frame_interval():
+    return max(TICK, 1.0 / max_fps) if max_fps > 0 else TICK
+
+
+def compose(now, transitions_only=False):
+    """Base frame with the animation layers on top (drops finished animations).
+
+    With `transitions_only` only running fades are applied, which gives the
+    frame the strip shows below the animations.
     """
-    c = tuple(color)
-    if leds is not None:
-        if isinstance(leds, int):
-            leds = [leds]
-    for _ in range(times):
-        if leds is None:
-            pixels.fill(c)
-        else:
-            reset()
-            for led in leds:
-                pixels[led] = c
-        pixels.show()
-        time.sleep(interval)
-        reset()
-        time.sleep(interval)
+    animations[:] = [a for a in animations if not a.finished(now)]
+    frame = list(base)
+    # Fades belong to the base frame, so they are drawn below the animations
+    for animation in sorted(animations, key=lambda a: not a.transition):
+        if transitions_only and not animation.transition:
+            continue
+        elapsed = now - animation.started
+        for led in animation.leds:
+            color = animation.pixel(led, elapsed)
+            if color is not None:
+                frame[led] = color
+    return frame
 
 
-def reset():
-    pixels.fill((0, 0, 0))
+def render():
+    """Mark the frame as changed; the serve loop pushes it at the next frame slot."""
+    global dirty
+    dirty = True
+
+
+def push_frame(now):
+    """Push the composed frame to the strip if it differs from the shown one."""
+    global shown, dirty, last_render
+    frame = compose(now)
+    dirty = False
+    last_render = now
+    if frame == shown:
+        return False
+    for led, color in enumerate(frame):
+        if shown is None or shown[led] != color:
+            pixels[led] = color
     pixels.show()
+    shown = frame
+    return True
+
+
+def start_animation(animation, mode="replace"):
+    if mode != "overlay":
+        animations.clear()
+        base[:] = [OFF] * num_pixels
+    animations.append(animation)
+    render()
+
+
+def _end_transitions():
+    animations[:] = [a for a in animations if not a.transition]
+
+
+def set_base(frame):
+    """Show a static frame below the running animations (ends a running fade)."""
+    _end_transitions()
+    base[:] = frame
+    render()
+
+
+def reset():
+    set_base([OFF] * num_pixels)
 
 
 def switch_all_on_with_color(color):
-    pixels.fill(tuple(color))
-    pixels.show()
+    set_base([tuple(color)] * num_pixels)
 
 
 def switch_on_with_color(leds, color):
-    reset()
-    c = tuple(color)
-    if isinstance(leds, int):
-        leds = [leds]
-    for led in leds:
-        pixels[led] = c
-    pixels.show()
+    frame = [OFF] * num_pixels
+    for led in _led_list(leds):
+        frame[led] = tuple(color)
+    set_base(frame)
 
 
-def rainbow_cycle(wait):
-    for j in range(255):
-        for i in range(num_pixels):
-            idx = (i * 256 // num_pixels) + j
-            pixels[i] = wheel(idx & 255)
-        pixels.show()
-        time.sleep(wait)
-    reset()
+def set_frame(frame, fade=0.0):
+    """Show `frame` (missing pixels are off), cross-fading for `fade` seconds."""
+    target = [tuple(c) for c in frame[:num_pixels]]
+    target += [OFF] * (num_pixels - len(target))
+    if fade <= 0:
+        set_base(target)
+        return
+    start = compose(time.monotonic(), transitions_only=True)
+    _end_transitions()
+    base[:] = target
+    animations.append(Fade(start, target, fade))
+    render()
 
 
 def wheel(pos):
@@ -85,38 +260,105 @@ def wheel(pos):
     return (0, int(pos * 3), int(255 - pos * 3))
 
 
-if os.path.exists(SOCK_FILE):
-    os.remove(SOCK_FILE)
-server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
-server.bind(SOCK_FILE)
-server.listen(1)
+def handle_command(cmd, conn=None):
+    global max_fps
+    mode = cmd.get("mode", "replace")
+    if cmd["cmd"] == "frame":
+        if conn is None or conn.accept_seq(cmd.get("seq")):
+            set_frame(cmd["pixels"], cmd.get("fade", 0.0))
+    elif cmd["cmd"] == "color":
+        switch_all_on_with_color(cmd["color"])
+    elif cmd["cmd"] == "off":
+        reset()
+    elif cmd["cmd"] == "multi":
+        switch_on_with_color(cmd["leds"], cmd["color"])
+    elif cmd["cmd"] == "rainbow":
+        start_animation(Rainbow(cmd.get("wait", 0.01), cmd.get("leds")), mode)
+    elif cmd["cmd"] == "blink":
+        blink = Blink(
+            cmd.get("color", [255, 255, 255]),
+            cmd.get("times", 5),
+            cmd.get("interval", 0.3),
+            cmd.get("leds"),
+        )
+        start_animation(blink, mode)
+    elif cmd["cmd"] == "rotate":
+        rotate = Rotate(cmd.get("color", [255, 255, 255]), cmd.get("delay", 0.2), cmd.get("leds"))
+        start_animation(rotate, mode)
+    elif cmd["cmd"] == "stop":
+        # Cancel the animations, keep the base frame
+        animations.clear()
+        render()
+    elif cmd["cmd"] == "max_fps":
+        max_fps = float(cmd["value"])
+
+
+def handle_message(message, conn=None):
+    try:
+        if isinstance(message, led_protocol.Frame):
+            if conn is None or conn.accept_seq(message.seq):
+                set_frame(message.pixels, message.fade_ms / 1000)
+        else:
+            handle_command(json.loads(message.decode()), conn)
+    except Exception as e:
+        print("Fehler beim Verarbeiten des Kommandos:", e)
 
-print("leds_server läuft und wartet auf Befehle via", SOCK_FILE)
 
-try:
+def accept(server, selector):
+    sock, _ = server.accept()
+    sock.setblocking(False)
+    selector.register(sock, selectors.EVENT_READ, Connection(sock))
+
+
+def read(conn, selector):
+    try:
+        data = conn.sock.recv(65536)
+    except (BlockingIOError, InterruptedError):
+        return
+    except OSError:
+        data = b""
+    if not data:
+        # Connection closed: a trailing command without newline is still valid
+        conn.buffer += b"\n"
+        for message in led_protocol.parse(conn.buffer):
+            handle_message(message, conn)
+        selector.unregister(conn.sock)
+        conn.sock.close()
+        return
+    conn.buffer += data
+    for message in led_protocol.parse(conn.buffer):
+        handle_message(message, conn)
+
+
+def serve(server):
+    selector = selectors.DefaultSelector()
+    server.setblocking(False)
+    selector.register(server, selectors.EVENT_READ, None)
     while True:
-        conn, _ = server.accept()
-        data = conn.recv(1024)
-        try:
-            cmd = json.loads(data.decode())
-            if cmd["cmd"] == "color":
-                switch_all_on_with_color(cmd["color"])
-            elif cmd["cmd"] == "off":
-                reset()
-            elif cmd["cmd"] == "multi":
-                switch_on_with_color(cmd["leds"], cmd["color"])
-            elif cmd["cmd"] == "rainbow":
-                rainbow_cycle(cmd.get("wait", 0.01))
-            elif cmd["cmd"] == "blink":
-                blink(
-                    cmd.get("color", [255, 255, 255]),
-                    cmd.get("times", 5),
-                    cmd.get("interval", 0.3),
-                    cmd.get("leds"),
-                )
-        except Exception as e:
-            print("Fehler beim Verarbeiten des Kommandos:", e)
-        conn.close()
-finally:
-    server.close()
-    os.remove(SOCK_FILE)
+        timeout = None
+        if dirty or animations:
+            timeout = max(0.0, last_render + frame_interval() - time.monotonic())
+        for key, _ in selector.select(timeout):
+            if key.data is None:
+                accept(key.fileobj, selector)
+            else:
+                read(key.data, selector)
+        now = time.monotonic()
+        if (dirty or animations) and now >= last_render + frame_interval():
+            push_frame(now)
+
+
+if __name__ == "__main__":
+    if os.path.exists(SOCK_FILE):
+        os.remove(SOCK_FILE)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(SOCK_FILE)
+    server.listen(8)
+
+    print("leds_server läuft und wartet auf Befehle via", SOCK_FILE)
+
+    try:
+        serve(server)
+    finally:
+        server.close()
+        os.remove(SOCK_FILE)
@@ -1,5 +1,5 @@
 from fastapi import FastAPI, File, UploadFile, HTTPException, Depends, Request
-from fastapi.responses import HTMLResponse, FileResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, FileResponse, PlainTextResponse, RedirectResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from starlette.status import HTTP_303_SEE_OTHER
@@ -12,6 +12,7 @@ import uvicorn
 from models import RFIDTag
 from schemas import BaseModel, RFIDTagSchema
 from database import get_db
+import scan_metrics
 
 import csv
 from pathlib import Path
@@ -114,6 +115,15 @@ async def download_file(filename: str):
     return FileResponse(path=filepath, filename=filename, media_type='application/octet-stream')
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """RFID scanner metrics in Prometheus text format (exported by the main program)."""
+    text = scan_metrics.read_exported()
+    if text is None:
+        raise HTTPException(status_code=503, detail="No RFID metrics exported yet")
+    return PlainTextResponse(text, media_type="text/plain; version=0.0.4")
+
+
 @app.get("/rfid/", response_model=List[RFIDTagSchema])
 async def list_rfid_tags(db: Session = Depends(get_db)):
     statement = select(RFIDTag)
@@ -1,26 +1,22 @@
 #!/usr/bin/python3
 # -*- coding: UTF8 -*-
 
-import os
 import time
 
 import board
 import digitalio
 from adafruit_debouncer import Debouncer
-from dotenv import load_dotenv, set_key
 
-print("starting adjust volume")
+import settings
 
-dotenv_path = "/home/pi/hoorch/.env"
+print("starting adjust volume")
 
 
 def volume_up():
-    load_dotenv(dotenv_path, override=True)
     print("volume up")
-    SPEAKER_VOLUME = int(os.getenv("SPEAKER_VOLUME", "50"))
+    SPEAKER_VOLUME = settings.speaker_volume(50)
     SPEAKER_VOLUME = min(SPEAKER_VOLUME + 10, 90)
-    os.environ["SPEAKER_VOLUME"] = str(SPEAKER_VOLUME)
-    set_key(dotenv_path, "SPEAKER_VOLUME", SPEAKER_VOLUME, quote_mode="never")
+    settings.set_value("SPEAKER_VOLUME", SPEAKER_VOLUME)
     log_volume(SPEAKER_VOLUME)
 
 
@@ -30,11 +26,9 @@ def log_volume(vol):
 
 def volume_down():
     print("volume down")
-    load_dotenv(dotenv_path, override=True)
-    SPEAKER_VOLUME = int(os.getenv("SPEAKER_VOLUME", "50"))
+    SPEAKER_VOLUME = settings.speaker_volume(50)
     SPEAKER_VOLUME = max(SPEAKER_VOLUME - 10, 10)
-    os.environ["SPEAKER_VOLUME"] = str(SPEAKER_VOLUME)
-    set_key(dotenv_path, "SPEAKER_VOLUME", SPEAKER_VOLUME, quote_mode="never")
+    settings.set_value("SPEAKER_VOLUME", SPEAKER_VOLUME)
     log_volume(SPEAKER_VOLUME)
 
 
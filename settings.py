@@ -0,0 +1,88 @@
+"""
+Shared, always-current view of the settings in the HOORCH .env file.
+
+Several processes use the same .env file: the volume button service writes
+SPEAKER_VOLUME, the main program reads it for every sound. Instead of
+parsing the file on every access, `get()` returns values from memory and
+re-reads the file only when its mtime or size changed. The stat() check runs
+at most every `poll_interval` seconds, so a volume change is picked up within
+that interval.
+"""
+
+import os
+import threading
+import time
+from typing import Optional
+
+from dotenv import dotenv_values, set_key
+
+dotenv_path = "/home/pi/hoorch/.env"
+poll_interval = 0.5  # seconds between mtime checks
+
+_values: dict = {}
+_signature = None  # (mtime_ns, size) of the loaded file
+_next_check = 0.0
+_lock = threading.Lock()
+
+
+def _file_signature(path: str):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _refresh(force: bool = False) -> None:
+    global _values, _signature, _next_check
+    now = time.monotonic()
+    if not force and now < _next_check:
+        return
+    _next_check = now + poll_interval
+    signature = _file_signature(dotenv_path)
+    if signature == _signature and not force:
+        return
+    _values = dict(dotenv_values(dotenv_path)) if signature is not None else {}
+    _signature = signature
+
+
+def get(key: str, default: Optional[str] = None) -> Optional[str]:
+    """Return a setting from the .env file, falling back to the environment."""
+    with _lock:
+        _refresh()
+        value = _values.get(key)
+    if value is None:
+        value = os.getenv(key, default)
+    return value
+
+
+def get_int(key: str, default: int) -> int:
+    try:
+        return int(get(key, str(default)))
+    except (TypeError, ValueError):
+        return default
+
+
+def set_value(key: str, value) -> None:
+    """Write a setting to the .env file and update the in-memory view."""
+    global _signature
+    with _lock:
+        set_key(dotenv_path, key, str(value), quote_mode="never")
+        _values[key] = str(value)
+        _signature = _file_signature(dotenv_path)
+    os.environ[key] = str(value)
+
+
+def set_path(path: str) -> None:
+    """Use a different .env file (forces a reload on the next access)."""
+    global dotenv_path, _signature, _values
+    with _lock:
+        dotenv_path = path
+        _signature = None
+        _values = {}
+        _refresh(force=True)
+
+
+def speaker_volume(default: int = 50) -> int:
+    """Current SPEAKER_VOLUME in percent."""
+    return get_int("SPEAKER_VOLUME", default)
@@ -0,0 +1,164 @@
+"""
+On-disk cache of eSpeak phrases.
+
+`audio.espeaker` used to run `espeak | aplay` for every phrase, so even the
+fixed prompts (IP announcement, hardware test, tag writer, admin menu) paid
+the synthesis time on every use. `render()` synthesizes a phrase once into a
+WAV file in CACHE_DIR, keyed by the text and all eSpeak voice parameters
+(including the amplitude), and returns the cached file afterwards. The least
+recently used files are removed once the cache holds more than `max_bytes`.
+
+`prerender()` (started in the background by `audio.init()`) synthesizes
+every spoken string of the translation files ahead of time.
+"""
+
+import hashlib
+import os
+import subprocess
+import threading
+from pathlib import Path
+from typing import Iterable, Optional
+
+import yaml
+
+from logger_util import get_logger
+
+logger = get_logger(__name__, "logs/audio.log")
+
+data_path = Path("./data")
+CACHE_DIR = data_path / ".speech_cache"
+TRANSLATIONS_DIR = Path(__file__).parent / "translations"
+max_bytes = 64 * 1024 * 1024
+
+VOICE = "de+f2"
+PITCH = 30
+WORD_GAP = 12
+SPEED = 170
+
+# Strings in the translation files that name a clip instead of a phrase
+_FILENAME_SUFFIXES = (".mp3", ".wav", ".ogg")
+
+_sizes: Optional[dict] = None  # file name -> size in bytes
+_lock = threading.Lock()
+
+
+def espeak_args(amplitude: int) -> list:
+    return ["-v", VOICE, "-p", str(PITCH), "-g", str(WORD_GAP), "-s", str(SPEED), "-a", str(amplitude)]
+
+
+def _path_for(text: str, amplitude: int) -> Path:
+    key = "\0".join([text] + espeak_args(amplitude))
+    return CACHE_DIR / f"{hashlib.sha1(key.encode('utf-8')).hexdigest()}.wav"
+
+
+def _load_sizes() -> dict:
+    global _sizes
+    if _sizes is None:
+        _sizes = {}
+        if CACHE_DIR.is_dir():
+            for entry in os.scandir(CACHE_DIR):
+                if entry.name.endswith(".wav"):
+                    _sizes[entry.name] = entry.stat().st_size
+    return _sizes
+
+
+def _evict() -> None:
+    """Remove the least recently used files; the caller holds _lock."""
+    sizes = _load_sizes()
+    total = sum(sizes.values())
+    if total <= max_bytes:
+        return
+
+    def last_used(name):
+        try:
+            return os.stat(CACHE_DIR / name).st_mtime_ns
+        except OSError:
+            return 0
+
+    for name in sorted(sizes, key=last_used):
+        if total <= max_bytes:
+            break
+        (CACHE_DIR / name).unlink(missing_ok=True)
+        total -= sizes.pop(name)
+
+
+def render(text: str, amplitude: int, low_priority: bool = False) -> Optional[Path]:
+    """Return a WAV file with `text` spoken, synthesizing it on a cache miss.
+
+    Returns None if eSpeak failed.
+    """
+    path = _path_for(text, amplitude)
+    with _lock:
+        if path.name in _load_sizes() and path.exists():
+            os.utime(path)  # mtime marks the last use for LRU eviction
+            return path
+
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    cmd = ["espeak"] + espeak_args(amplitude) + ["-w", str(tmp_path), text]
+    if low_priority:
+        cmd = ["nice", "-n", "19"] + cmd
+    try:
+        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        os.replace(tmp_path, path)
+    except (subprocess.CalledProcessError, OSError) as e:
+        logger.error("eSpeak could not render %r: %s", text, e)
+        tmp_path.unlink(missing_ok=True)
+        return None
+
+    with _lock:
+        _load_sizes()[path.name] = path.stat().st_size
+        _evict()
+    logger.debug("Rendered phrase %r to %s", text, path)
+    return path
+
+
+def _phrases(node) -> Iterable[str]:
+    if isinstance(node, dict):
+        for value in node.values():
+            yield from _phrases(value)
+    elif isinstance(node, str):
+        text = node.strip()
+        # Skip clip names and templates that are only complete at runtime
+        if text and not text.lower().endswith(_FILENAME_SUFFIXES) and "{" not in text:
+            yield text
+
+
+def translation_phrases(translation_dir=TRANSLATIONS_DIR) -> list:
+    """All spoken strings of the translation files (without duplicates)."""
+    phrases = []
+    for path in sorted(Path(translation_dir).glob("*.yaml")):
+        with open(path, "r", encoding="utf-8") as f:
+            data = yaml.safe_load(f) or {}
+        for text in _phrases(data):
+            if text not in phrases:
+                phrases.append(text)
+    return phrases
+
+
+def prerender(amplitude: int, phrases: Optional[Iterable[str]] = None) -> int:
+    """Synthesize `phrases` (default: all translation strings). Returns the number rendered."""
+    if phrases is None:
+        phrases = translation_phrases()
+    rendered = 0
+    for text in phrases:
+        if not _path_for(text, amplitude).exists() and render(text, amplitude, low_priority=True):
+            rendered += 1
+    logger.info("Pre-rendered %d eSpeak phrases", rendered)
+    return rendered
+
+
+def prerender_in_background(amplitude: int, phrases=None) -> threading.Thread:
+    thread = threading.Thread(
+        target=prerender, args=(amplitude, phrases), name="speech-prerender", daemon=True
+    )
+    thread.start()
+    return thread
+
+
+def set_cache_dir(path) -> None:
+    """Use a different cache directory (drops the loaded sizes)."""
+    global CACHE_DIR, _sizes
+    with _lock:
+        CACHE_DIR = Path(path)
+        _sizes = None
@@ -0,0 +1,190 @@
+"""
+Background post-processing of recorded stories.
+
+The recorder (see `recorder`) already trims, filters and levels a story while
+it is recorded, so the raw file is playable right away. The precise ffmpeg
+loudness normalization runs afterwards in a low-priority worker thread, so the
+next child does not wait for the Pi to re-encode.
+
+Jobs are kept in JOBS_FILE and survive a restart. Each job remembers the
+mtime and size of the recording it was queued for; if the story was
+re-recorded, archived or deleted in the meantime the result is discarded.
+The processed file is written next to the story and moved over it with
+`os.replace`, so players never see a half-written file.
+"""
+
+import json
+import os
+import subprocess
+import threading
+from pathlib import Path
+from typing import Optional
+
+from logger_util import get_logger
+
+logger = get_logger(__name__, "logs/audio.log")
+
+data_path = Path("./data")
+JOBS_FILE = data_path / ".story_jobs.json"
+MAX_ATTEMPTS = 3  # a job that failed this often is dropped
+LOUDNESS = -24
+BITRATE = "192k"
+
+_jobs: Optional[dict] = None  # story path -> {"mtime_ns", "size", "attempts"}
+_lock = threading.Lock()
+_wakeup = threading.Condition(_lock)
+_worker: Optional[threading.Thread] = None
+_busy = False
+
+
+def _signature(path: Path) -> Optional[tuple]:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _load() -> dict:
+    global _jobs
+    if _jobs is None:
+        try:
+            with open(JOBS_FILE, "r", encoding="utf-8") as f:
+                _jobs = json.load(f)
+        except FileNotFoundError:
+            _jobs = {}
+        except (ValueError, OSError) as e:
+            logger.warning("Ignoring unreadable story job file %s: %s", JOBS_FILE, e)
+            _jobs = {}
+    return _jobs
+
+
+def _save() -> None:
+    """Write the job list; the caller holds _lock."""
+    tmp_path = f"{JOBS_FILE}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(_load(), f)
+        os.replace(tmp_path, JOBS_FILE)
+    except OSError as e:
+        logger.warning("Could not write story jobs %s: %s", JOBS_FILE, e)
+
+
+def _ensure_worker() -> None:
+    """Start the worker thread; the caller holds _lock."""
+    global _worker
+    if _worker is None or not _worker.is_alive():
+        _worker = threading.Thread(target=_worker_loop, name="story-processing", daemon=True)
+        _worker.start()
+
+
+def enqueue(path) -> bool:
+    """Queue the story at `path` for normalization. Returns False if it is missing."""
+    path = Path(path)
+    signature = _signature(path)
+    if signature is None:
+        return False
+    with _lock:
+        _load()[str(path)] = {"mtime_ns": signature[0], "size": signature[1], "attempts": 0}
+        _save()
+        _ensure_worker()
+        _wakeup.notify_all()
+    logger.info("Queued story for post-processing: %s", path)
+    return True
+
+
+def start() -> int:
+    """Resume the jobs left over from the last run. Returns their number."""
+    with _lock:
+        count = len(_load())
+        if count:
+            _ensure_worker()
+            _wakeup.notify_all()
+    if count:
+        logger.info("Resuming %d story post-processing jobs", count)
+    return count
+
+
+def pending() -> int:
+    """Number of stories still waiting for (or in) post-processing."""
+    with _lock:
+        return len(_load())
+
+
+def wait_idle(timeout: Optional[float] = None) -> bool:
+    """Block until every queued job was handled. Returns False on timeout."""
+    with _lock:
+        return _wakeup.wait_for(lambda: not _load() and not _busy, timeout)
+
+
+def _normalize_cmd(source: Path, target: Path) -> list:
+    return [
+        "nice", "-n", "19",
+        "ffmpeg", "-y", "-loglevel", "error",
+        "-i", str(source),
+        "-filter:a", f"loudnorm=I={LOUDNESS}:TP=-2.0:LRA=11",
+        "-c:a", "libmp3lame", "-b:a", BITRATE,
+        "-f", "mp3", str(target),
+    ]
+
+
+def _process(path: Path, job: dict) -> bool:
+    """Normalize one story. Returns True if the job is finished (done or obsolete)."""
+    expected = (job["mtime_ns"], job["size"])
+    if _signature(path) != expected:
+        logger.info("Story changed since it was queued, skipping: %s", path)
+        return True
+
+    processed = path.with_name(f".{path.name}.processing")
+    try:
+        subprocess.run(
+            _normalize_cmd(path, processed),
+            check=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        with _lock:
+            # The story may have been replaced while ffmpeg was running
+            if _signature(path) != expected:
+                logger.info("Story changed during post-processing, discarding: %s", path)
+                processed.unlink(missing_ok=True)
+                return True
+            os.replace(processed, path)
+        logger.info("Post-processed story %s (loudness=%s LUFS)", path, LOUDNESS)
+        return True
+    except (subprocess.CalledProcessError, OSError) as e:
+        logger.error("Post-processing of %s failed: %s", path, e)
+        processed.unlink(missing_ok=True)
+        return job["attempts"] + 1 >= MAX_ATTEMPTS
+
+
+def _worker_loop() -> None:
+    global _busy
+    while True:
+        with _lock:
+            _wakeup.wait_for(lambda: bool(_load()))
+            key, job = next(iter(_load().items()))
+            job = dict(job)
+            _busy = True
+        finished = _process(Path(key), job)
+        with _lock:
+            current = _load().get(key)
+            # A newer recording may have been queued for the same path meanwhile
+            if current is not None and (current["mtime_ns"], current["size"]) == (job["mtime_ns"], job["size"]):
+                if finished:
+                    del _load()[key]
+                else:
+                    current["attempts"] = job["attempts"] + 1
+                    # Move the job to the end so other stories get their turn
+                    _load()[key] = _load().pop(key)
+                _save()
+            _busy = False
+            _wakeup.notify_all()
+
+
+def set_jobs_file(path) -> None:
+    """Use a different job file (drops the loaded jobs)."""
+    global JOBS_FILE, _jobs
+    with _lock:
+        JOBS_FILE = Path(path)
+        _jobs = None
@@ -0,0 +1,203 @@
+"""
+In-memory index of RFID tags keyed by their `rfid_tag` UID string.
+
+The RFID scanner resolves every detected UID through this index instead of
+running a SQL query on the SPI polling path. The index is loaded once from the
+database and kept current by the write functions in `crud` (and the tag
+writer). Every update builds a new dict and swaps it in with a single
+assignment, so lookups never see a half-updated index and need no lock.
+
+Stored entries are detached copies of the database rows, so looking them up
+never triggers a lazy reload through a database session.
+
+Other processes (the web UI) write to the same SQLite file. When the index
+was loaded from the database, `lookup` compares the modification time and
+size of the database file and its WAL file with the state at load time, at
+most every CHECK_INTERVAL seconds. If they changed, a background thread
+reloads the index while lookups keep using the current one, so the scanner
+never waits for SQL. Tags that are indexed but not written yet (see
+tag_persistence) survive such a reload.
+"""
+
+import os
+import threading
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+from logger_util import get_logger
+from models import RFIDTag
+
+logger = get_logger(__name__, "logs/tag_index.log")
+
+# rfid_tag -> tuple of RFIDTag entries (sorted by database id); None = not loaded
+_index: Optional[Dict[str, Tuple[RFIDTag, ...]]] = None
+# Serializes writers; readers only ever access the current `_index` reference.
+_write_lock = threading.Lock()
+
+CHECK_INTERVAL = 1.0  # seconds between checks for changes by other processes
+# Database file state at the last load from the database; None = not tracked
+_db_state: Optional[tuple] = None
+_next_check = 0.0
+_reloader: Optional[threading.Thread] = None
+
+
+def _detached(tag: RFIDTag) -> RFIDTag:
+    return RFIDTag(
+        id=tag.id, rfid_tag=tag.rfid_tag, name=tag.name, rfid_type=tag.rfid_type
+    )
+
+
+def _sort_key(tag: RFIDTag):
+    return tag.id if tag.id is not None else 0
+
+
+def _build(tags: Iterable[RFIDTag]) -> Dict[str, Tuple[RFIDTag, ...]]:
+    grouped: Dict[str, list] = {}
+    for tag in tags:
+        if tag.rfid_tag:
+            grouped.setdefault(tag.rfid_tag, []).append(tag)
+    return {
+        key: tuple(sorted(entries, key=_sort_key)) for key, entries in grouped.items()
+    }
+
+
+def _db_signature() -> tuple:
+    """(mtime, size) of the SQLite database file and its WAL file."""
+    from database import engine
+
+    path = engine.url.database
+    if not path or path == ":memory:":
+        return ()
+    signature = []
+    for name in (path, path + "-wal"):
+        try:
+            st = os.stat(name)
+            signature.append((st.st_mtime_ns, st.st_size))
+        except OSError:
+            signature.append(None)
+    return tuple(signature)
+
+
+def _changed_elsewhere() -> bool:
+    global _next_check
+    if _db_state is None:
+        return False
+    now = time.monotonic()
+    if now < _next_check:
+        return False
+    _next_check = now + CHECK_INTERVAL
+    return _db_signature() != _db_state
+
+
+def _reload():
+    try:
+        load()
+    except Exception as e:
+        # _db_state is unchanged, so the next check tries again
+        logger.error(f"Could not reload the tag index: {e}")
+
+
+def _reload_in_background() -> None:
+    global _reloader
+    with _write_lock:
+        if _reloader is not None and _reloader.is_alive():
+            return
+        _reloader = threading.Thread(
+            target=_reload, name="tag-index-reload", daemon=True
+        )
+        _reloader.start()
+
+
+def load(tags: Optional[Iterable[RFIDTag]] = None) -> None:
+    """(Re)build the index from `tags`, or from the database if not given."""
+    global _index, _db_state
+    state = None
+    if tags is None:
+        from sqlmodel import Session
+
+        from crud import get_all_rfid_tags
+        from database import engine
+
+        # Taken before reading, so a write in between triggers another reload
+        state = _db_signature()
+        # A fresh session: rows cached in a long-lived one would stay stale
+        with Session(engine) as session:
+            tags = get_all_rfid_tags(db=session)
+    new_entries = [_detached(tag) for tag in tags]
+    with _write_lock:
+        if state is not None and _index is not None:
+            # Keep tags still waiting for the tag writer unless already stored
+            stored = {(t.rfid_tag, t.rfid_type) for t in new_entries}
+            new_entries += [
+                t
+                for group in _index.values()
+                for t in group
+                if t.id is None and (t.rfid_tag, t.rfid_type) not in stored
+            ]
+        new_index = _build(new_entries)
+        _index = new_index
+        _db_state = state
+    logger.debug(f"Loaded {len(new_index)} RFID UIDs into tag index")
+
+
+def is_loaded() -> bool:
+    return _index is not None
+
+
+def lookup(rfid_tag: str) -> list[RFIDTag]:
+    """Return all tag entries for `rfid_tag` (empty list if unknown)."""
+    index = _index
+    if index is None:
+        load()
+        index = _index
+    elif _changed_elsewhere():
+        _reload_in_background()
+    return list(index.get(rfid_tag, ()))
+
+
+def _update(change) -> None:
+    """Apply `change(entries)` to a flat copy of all entries and swap the result in."""
+    global _index
+    with _write_lock:
+        if _index is None:
+            # Not loaded yet; the first lookup will read the current database state.
+            return
+        entries = [tag for group in _index.values() for tag in group]
+        _index = _build(change(entries))
+
+
+def add(tag: RFIDTag) -> None:
+    """Add a newly created database tag to the index."""
+    new_tag = _detached(tag)
+    _update(lambda entries: entries + [new_tag])
+
+
+def add_pending(tags: list[RFIDTag]) -> None:
+    """Index tags that are not written to the database yet.
+
+    The given objects are stored as-is (not copied) so the writer can fill in
+    their `id` once the row exists (see tag_persistence).
+    """
+    _update(lambda entries: entries + list(tags))
+
+
+def discard_pending(tags: list[RFIDTag]) -> None:
+    """Remove entries added with `add_pending` whose database write failed."""
+    failed = {id(tag) for tag in tags}
+    _update(lambda entries: [t for t in entries if id(t) not in failed])
+
+
+def replace(tag: RFIDTag) -> None:
+    """Replace the entry with the same database id (its rfid_tag may have changed)."""
+    new_tag = _detached(tag)
+    _update(lambda entries: [t for t in entries if t.id != tag.id] + [new_tag])
+
+
+def remove(tag_id: int) -> None:
+    """Remove the entry with the given database id."""
+    _update(lambda entries: [t for t in entries if t.id != tag_id])
+
+
+def clear() -> None:
+    """Remove all entries (e.g. after all tags were deleted from the database)."""
+    _update(lambda entries: [])
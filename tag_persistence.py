@@ -0,0 +1,127 @@
+"""
+Asynchronous, batched persistence of newly discovered RFID tags.
+
+When the scanner reads an unknown card it must not wait for SQLite commits
+(and their fsync) inside the SPI polling loop. `persist()` therefore puts the
+new tags into the in-memory tag index right away and queues them; a
+background writer thread stores everything queued so far in a single
+transaction and then fills in the database ids of the indexed entries.
+
+A batch whose transaction fails is retried after RETRY_DELAYS; if it still
+cannot be written, its tags are removed from the index again so the next scan
+of those cards queues them anew instead of using entries without an id.
+"""
+
+import queue
+import threading
+import time
+from typing import Iterable, Optional
+
+from sqlmodel import Session
+
+import crud
+import tag_index
+from database import engine
+from logger_util import get_logger
+from models import RFIDTag
+
+logger = get_logger(__name__, "logs/rfid.log")
+
+MAX_BATCH = 32  # tags written per transaction at most
+RETRY_DELAYS = (0.5, 2.0, 5.0)  # seconds to wait before retrying a failed batch
+
+_queue: "queue.Queue[RFIDTag]" = queue.Queue()
+_writer: Optional[threading.Thread] = None
+_writer_lock = threading.Lock()
+
+
+def _ensure_writer():
+    global _writer
+    with _writer_lock:
+        if _writer is None or not _writer.is_alive():
+            _writer = threading.Thread(
+                target=_writer_loop, name="tag-persistence", daemon=True
+            )
+            _writer.start()
+
+
+def persist(tags: Iterable[RFIDTag]) -> list[RFIDTag]:
+    """Index `tags` immediately and queue them for writing to the database.
+
+    Returns the indexed tag objects (their `id` is set once they are written).
+    Tags whose (rfid_tag, rfid_type) is already known are not added again.
+    """
+    new_tags = []
+    for tag in tags:
+        known = tag_index.lookup(tag.rfid_tag)
+        same_uid = [t for t in new_tags if t.rfid_tag == tag.rfid_tag]
+        if any(t.rfid_type == tag.rfid_type for t in known + same_uid):
+            logger.warning(f"Tag already known, not persisting again: {tag}")
+            continue
+        new_tags.append(
+            RFIDTag(rfid_tag=tag.rfid_tag, name=tag.name, rfid_type=tag.rfid_type)
+        )
+
+    if not new_tags:
+        return []
+
+    tag_index.add_pending(new_tags)
+    _ensure_writer()
+    for tag in new_tags:
+        _queue.put(tag)
+    return new_tags
+
+
+def _next_batch() -> list[RFIDTag]:
+    batch = [_queue.get()]
+    while len(batch) < MAX_BATCH:
+        try:
+            batch.append(_queue.get_nowait())
+        except queue.Empty:
+            break
+    return batch
+
+
+def _write(batch: list[RFIDTag]) -> None:
+    with Session(engine) as session:
+        stored = crud.create_rfid_tags(batch, db=session)
+        # Inside the session: rows that already existed were expired by the
+        # commit and are reloaded here
+        for pending, row in zip(batch, stored):
+            pending.id = row.id
+
+
+def _write_with_retries(batch: list[RFIDTag]) -> None:
+    for delay in RETRY_DELAYS + (None,):
+        try:
+            _write(batch)
+            logger.info(f"Persisted {len(batch)} new RFID tags")
+            return
+        except Exception as e:
+            if delay is None:
+                logger.error(f"Could not persist new RFID tags {batch}: {e}")
+            else:
+                logger.warning(f"Persisting RFID tags failed, retry in {delay}s: {e}")
+                time.sleep(delay)
+    # Give up: unindex the tags so they are not used without a database id
+    tag_index.discard_pending(batch)
+
+
+def _writer_loop():
+    while True:
+        batch = _next_batch()
+        try:
+            _write_with_retries(batch)
+        finally:
+            for _ in batch:
+                _queue.task_done()
+
+
+def flush() -> None:
+    """Block until every queued tag has been written (or failed)."""
+    if _writer is not None:
+        _queue.join()
+
+
+def pending_count() -> int:
+    return _queue.qsize()
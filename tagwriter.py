@@ -19,6 +19,7 @@ from models import RFIDTag
 
 import audio
 import leds
+import tag_index
 
 reader = None
 
@@ -46,6 +47,7 @@ def update_rfid_in_db(rfid_tag: str, name: str, rfid_type: str):
             session.add(tag)
             session.commit()
             session.refresh(tag)
+            tag_index.replace(tag)
             return True
         else:
             return False
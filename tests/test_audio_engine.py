@@ -0,0 +1,128 @@
+import os
+import threading
+import wave
+
+import pytest
+
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import audio_engine  # noqa: E402
+
+
+@pytest.fixture
+def clip(tmp_path):
+    path = tmp_path / "beep.wav"
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(22050)
+        w.writeframes(bytes(2 * 22050 // 5))  # 0.2 s
+    return path
+
+
+@pytest.fixture
+def engine():
+    if not audio_engine.init():
+        pytest.skip("no audio mixer available")
+    yield audio_engine
+    audio_engine.stop_all()
+
+
+def test_wait_returns_when_clip_ends(engine, clip):
+    playback = engine.play(clip)
+    assert engine.is_playing("beep.wav")
+    assert playback.wait(timeout=2.0)
+    assert not playback.is_playing()
+    assert not engine.is_playing("beep.wav")
+
+
+def test_stop_all_ends_playback(engine, clip):
+    playback = engine.play(clip, stream=True)
+    engine.stop_all()
+    assert playback.wait(timeout=0)
+
+
+def test_missing_file_does_not_raise(engine, tmp_path):
+    playback = engine.play(tmp_path / "missing.mp3")
+    assert not playback.is_playing()
+
+
+def test_decoded_clips_are_cached(engine, clip, tmp_path, monkeypatch):
+    import audio_cache
+
+    monkeypatch.setattr(audio_cache, "PLAY_COUNTS_FILE", tmp_path / "counts.json")
+    monkeypatch.setattr(audio_cache, "_play_counts", None)
+    audio_cache.clear()
+
+    first = audio_cache.get(clip)
+    assert audio_cache.get(clip) is first
+    assert audio_cache.stats()["entries"] == 1
+
+    monkeypatch.setattr(audio_cache, "max_bytes", 1)
+    audio_cache.clear()
+    audio_cache.get(clip)
+    assert audio_cache.stats()["entries"] == 0
+
+    audio_cache.save_counts()
+    assert (tmp_path / "counts.json").exists()
+
+
+def test_cancel_event_stops_playback(engine, clip):
+    import threading
+    import time
+
+    cancel = threading.Event()
+    playback = engine.play(clip, cancel=cancel)
+    start = time.monotonic()
+    cancel.set()
+    assert playback.wait(timeout=1.0)
+    assert time.monotonic() - start < 0.1
+
+
+def test_monitor_sleeps_while_nothing_plays(engine, clip, monkeypatch):
+    assert engine.play(clip).wait(timeout=2.0)
+    idle = threading.Event()
+    idle.wait(0.05)  # let the monitor notice the empty list
+
+    polls = []
+    real_sleep = audio_engine.time.sleep
+    monkeypatch.setattr(audio_engine.time, "sleep", lambda s: polls.append(s) or real_sleep(s))
+    idle.wait(0.2)
+    assert polls == []
+
+    assert engine.play(clip).wait(timeout=2.0)
+    assert polls
+
+
+def test_sequence_plays_all_clips_in_order(engine, clip):
+    import time
+
+    start = time.monotonic()
+    sequence = engine.play_sequence([clip, clip, clip])
+    assert sequence.wait(timeout=3.0)
+    assert time.monotonic() - start >= 0.5  # three 0.2 s clips
+    assert sequence.index == 2
+    assert not sequence.interrupted
+
+
+def test_sequence_stops_at_a_clip_boundary_when_interrupted(engine, clip):
+    checks = []
+
+    def interrupt():
+        checks.append(True)
+        return True
+
+    sequence = engine.play_sequence([clip, clip, clip], interrupt=interrupt)
+    assert sequence.wait(timeout=2.0)
+    assert sequence.interrupted
+    # checked once, when the first clip ended
+    assert checks == [True]
+    assert sequence.index == 1
+
+
+def test_cancel_event_stops_a_sequence(engine, clip):
+    cancel = threading.Event()
+    sequence = engine.play_sequence([clip, clip], cancel=cancel)
+    cancel.set()
+    assert sequence.wait(timeout=0.5)
+    assert sequence.index == 0
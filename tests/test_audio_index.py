@@ -0,0 +1,133 @@
+import struct
+import wave
+
+import pytest
+
+import audio_index
+
+
+def _mp3_frame():
+    # MPEG1 Layer III, 128 kbit/s, 44.1 kHz, stereo: 417 bytes, 1152 samples
+    header = struct.pack(">I", 0xFFFB9000)
+    return header + bytes(417 - 4)
+
+
+@pytest.fixture
+def index_file(tmp_path):
+    audio_index.set_index_file(tmp_path / "index.json")
+    yield tmp_path / "index.json"
+    audio_index.set_index_file(audio_index.data_path / ".audio_index.json")
+
+
+def test_mp3_duration_from_frame_headers(tmp_path):
+    path = tmp_path / "clip.mp3"
+    path.write_bytes(b"ID3\x03\x00\x00\x00\x00\x00\x05" + bytes(5) + _mp3_frame() * 100)
+    assert audio_index.mp3_duration(path) == pytest.approx(100 * 1152 / 44100)
+
+
+def test_durations_are_cached_and_invalidated(tmp_path, index_file):
+    path = tmp_path / "tone.wav"
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(8000)
+        w.writeframes(bytes(2 * 8000))
+
+    calls = []
+
+    def fallback(p):
+        calls.append(p)
+        return 99.0
+
+    assert audio_index.get_duration(path, fallback) == pytest.approx(1.0)
+    assert index_file.exists()
+
+    # A file the parsers cannot read uses the fallback once, then the index
+    other = tmp_path / "story.ogg"
+    other.write_bytes(b"OggS")
+    assert audio_index.get_duration(other, fallback) == 99.0
+    assert audio_index.get_duration(other, fallback) == 99.0
+    assert calls == [other]
+
+    # Changing the file invalidates its entry
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(8000)
+        w.writeframes(bytes(4 * 8000))
+    assert audio_index.get_duration(path, fallback) == pytest.approx(2.0)
+
+    # The persisted index is used after a reload
+    audio_index.set_index_file(index_file)
+    assert audio_index.get_duration(other, fallback) == 99.0
+    assert calls == [other]
+
+
+def test_loudness_gain_is_stored_and_invalidated(tmp_path, index_file):
+    path = tmp_path / "loud.wav"
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(8000)
+        w.writeframes(bytes(16000))
+    assert audio_index.get_gain(path) == 0.0
+
+    audio_index.build(tmp_path, loudness=True, measure=lambda p: -12.0)
+    assert audio_index.get_gain(path) == pytest.approx(audio_index.TARGET_LOUDNESS + 12.0)
+    assert audio_index.gain_factor(path) < 1.0
+
+    # Already analyzed files are not measured again
+    audio_index.build(tmp_path, loudness=True, measure=lambda p: pytest.fail("measured twice"))
+
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(8000)
+        w.writeframes(bytes(8000))
+    assert audio_index.get_gain(path) == 0.0
+
+
+def test_build_skips_hidden_files_and_directories(tmp_path, index_file):
+    for rel in ("story.wav", ".speech_cache/phrase.wav", ".story.wav.part.wav"):
+        path = tmp_path / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with wave.open(str(path), "wb") as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(8000)
+            w.writeframes(bytes(16000))
+
+    measured = []
+    audio_index.build(tmp_path, loudness=True, measure=lambda p: measured.append(p.name) or -12.0)
+
+    assert measured == ["story.wav"]
+    assert audio_index.get_gain(tmp_path / ".speech_cache" / "phrase.wav") == 0.0
+
+
+def test_mp3_duration_reads_only_the_head_of_long_files(tmp_path, monkeypatch):
+    path = tmp_path / "story.mp3"
+    path.write_bytes(_mp3_frame() * 2000)  # ~830 kB without Xing header
+
+    reads = []
+    real_open = open
+
+    class _Counting:
+        def __init__(self, f):
+            self._f = f
+
+        def read(self, n=-1):
+            reads.append(n)
+            return self._f.read(n)
+
+        def __getattr__(self, name):
+            return getattr(self._f, name)
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            self._f.close()
+
+    monkeypatch.setattr("builtins.open", lambda *a, **k: _Counting(real_open(*a, **k)))
+    assert audio_index.mp3_duration(path) == pytest.approx(2000 * 1152 / 44100)
+    assert max(reads) <= audio_index.HEAD_BYTES
@@ -2,6 +2,7 @@ import pytest
 from unittest import mock
 
 from games import game_utils
+from models import RFIDTag
 
 
 @mock.patch("audio.espeaker")
@@ -16,3 +17,53 @@ def test_announce_score(espeaker, players):
     game_utils.announce_score(score_players)
 
     assert espeaker.call_args_list == score_calls
+
+
+def test_solution_fields_wrap_around_the_readers():
+    assert game_utils.solution_fields(1, 6) == (2, 0)
+    assert game_utils.solution_fields(5, 6) == (0, 4)
+    assert game_utils.solution_fields(0, 6) == (1, 5)
+
+
+def _subscribe_capturing(callbacks):
+    def subscribe(callback, slots=None):
+        callbacks.append(callback)
+        return lambda: callbacks.remove(callback)
+
+    return subscribe
+
+
+def test_announce_sequence_restarts_when_ende_is_placed(monkeypatch):
+    callbacks = []
+    monkeypatch.setattr(game_utils.rfidreaders, "subscribe", _subscribe_capturing(callbacks))
+    snapshot = mock.Mock(return_value=[])
+    monkeypatch.setattr(game_utils.rfidreaders, "get_tags_snapshot", snapshot)
+
+    def play_sequence(clips, wait=True, cancel=None):
+        # the scanner reports ENDE while the sequence plays
+        callbacks[0](mock.Mock(new=RFIDTag(rfid_tag="1-2-3-4", name="ENDE", rfid_type="actions")))
+        assert cancel.is_set()
+
+    with mock.patch("audio.play_sequence", side_effect=play_sequence) as played, \
+            mock.patch("audio.play_file") as play_file:
+        with pytest.raises(game_utils.RestartRequested):
+            game_utils.announce_sequence([("TTS", 80), ("TTS", 81)])
+
+    assert "interrupt" not in played.call_args.kwargs
+    play_file.assert_called_once_with("TTS", "054.mp3")
+    snapshot.assert_not_called()  # no reader scan during or after the sequence
+    assert callbacks == []
+
+
+def test_announce_sequence_without_ende_returns_a_finisher(monkeypatch):
+    callbacks = []
+    monkeypatch.setattr(game_utils.rfidreaders, "subscribe", _subscribe_capturing(callbacks))
+
+    with mock.patch("audio.play_sequence") as played, mock.patch("audio.play_file") as play_file:
+        finish = game_utils.announce_sequence([("TTS", 80)], wait=False)
+        assert callbacks  # still listening for ENDE until finished
+        finish()
+
+    played.return_value.wait.assert_called_once_with()
+    play_file.assert_not_called()
+    assert callbacks == []
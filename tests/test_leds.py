@@ -0,0 +1,119 @@
+import json
+import socket
+
+import pytest
+
+import led_protocol
+import leds
+
+OFF = (0, 0, 0)
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    path = str(tmp_path / "led.sock")
+    monkeypatch.setattr(leds, "SOCK_FILE", path)
+    monkeypatch.setattr(leds, "RECONNECT_DELAY", 0.0)
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(path)
+    listener.listen(1)
+    listener.settimeout(2)
+    leds.invalidate()
+    yield listener
+    leds.release(leds.GAME)
+    leds._close()
+    listener.close()
+
+
+def _read_messages(conn, count):
+    """Frames as pixel lists, JSON commands as dicts."""
+    buffer = bytearray()
+    messages = []
+    conn.settimeout(2)
+    while len(messages) < count:
+        buffer += conn.recv(4096)
+        messages += led_protocol.parse(buffer)
+    return [
+        m.pixels if isinstance(m, led_protocol.Frame) else json.loads(m)
+        for m in messages
+    ]
+
+
+def _frame(lit, color):
+    return [color if i in lit else OFF for i in range(leds.STRIP_PIXELS)]
+
+
+def test_messages_are_pipelined_over_one_connection(server):
+    leds.reset()
+    leds.switch_on_with_color([0, 3], (0, 255, 0))
+    leds.rainbow_cycle(0.02)
+    leds.switch_all_on_with_color((1, 2, 3))
+    assert leds.flush(2)
+
+    conn, _ = server.accept()
+    assert _read_messages(conn, 4) == [
+        _frame([], OFF),
+        _frame([0, 3], (0, 255, 0)),
+        {"cmd": "rainbow", "wait": 0.02},
+        [(1, 2, 3)] * leds.STRIP_PIXELS,
+    ]
+    conn.close()
+
+
+def test_client_reconnects_after_server_restart(server):
+    leds.reset()
+    assert leds.flush(2)
+    conn, _ = server.accept()
+    _read_messages(conn, 1)
+    conn.close()
+
+    leds.switch_on_with_color(2, (9, 9, 9))
+    assert leds.flush(2)
+    conn, _ = server.accept()
+    assert _read_messages(conn, 1) == [_frame([2], (9, 9, 9))]
+    conn.close()
+
+
+def test_redundant_updates_are_not_sent(server):
+    for _ in range(5):
+        leds.switch_on_with_color([1, 2], (0, 255, 0), owner=leds.SCANNER)
+        leds.switch_on_with_color((2, 1), (0, 255, 0), owner=leds.SCANNER)
+    leds.reset()
+    leds.reset()
+    assert leds.flush(2)
+
+    conn, _ = server.accept()
+    assert _read_messages(conn, 2) == [_frame([1, 2], (0, 255, 0)), _frame([], OFF)]
+    conn.close()
+
+
+def test_scanner_updates_are_dropped_while_a_game_owns_the_strip(server):
+    with leds.owned_by(leds.GAME):
+        leds.switch_on_with_color(3, (255, 0, 0))
+        leds.switch_on_with_color([1], (0, 255, 0), owner=leds.SCANNER)
+        leds.reset(owner=leds.SCANNER)
+    leds.reset(owner=leds.SCANNER)
+    assert leds.flush(2)
+
+    conn, _ = server.accept()
+    assert _read_messages(conn, 2) == [_frame([3], (255, 0, 0)), _frame([], OFF)]
+    conn.close()
+
+
+def test_protocol_splits_frames_and_json_lines():
+    frame = led_protocol.encode_frame([(1, 2, 3), (255, 0, 7)], seq=65535, fade_ms=300)
+    stream = frame + b'{"cmd": "off"}\n' + frame
+    buffer = bytearray()
+    messages = []
+    for i in range(len(stream)):  # byte by byte, as if it arrived in pieces
+        buffer += stream[i:i + 1]
+        messages += led_protocol.parse(buffer)
+
+    assert messages == [
+        led_protocol.Frame(65535, 300, [(1, 2, 3), (255, 0, 7)]),
+        b'{"cmd": "off"}',
+        led_protocol.Frame(65535, 300, [(1, 2, 3), (255, 0, 7)]),
+    ]
+    assert not buffer
+    assert led_protocol.seq_newer(0, 65535)
+    assert not led_protocol.seq_newer(5, 5)
@@ -0,0 +1,117 @@
+import json
+import socket
+
+import pytest
+
+import led_protocol
+from services import leds_server as server
+
+OFF = (0, 0, 0)
+RED = (255, 0, 0)
+GREEN = (0, 255, 0)
+
+
+class _Strip:
+    """Stands in for the NeoPixel object and counts the show() calls."""
+
+    def __init__(self, count):
+        self.values = [OFF] * count
+        self.shows = 0
+
+    def __setitem__(self, led, color):
+        self.values[led] = color
+
+    def show(self):
+        self.shows += 1
+
+
+@pytest.fixture
+def strip(monkeypatch):
+    fake = _Strip(server.num_pixels)
+    monkeypatch.setattr(server, "pixels", fake)
+    monkeypatch.setattr(server, "max_fps", 50.0)
+    monkeypatch.setattr(server, "shown", None)
+    monkeypatch.setattr(server, "dirty", False)
+    monkeypatch.setattr(server, "last_render", 0.0)
+    server.base[:] = [OFF] * server.num_pixels
+    server.animations.clear()
+    yield fake
+    server.animations.clear()
+
+
+def _command(**cmd):
+    server.handle_message(json.dumps(cmd).encode())
+
+
+def test_static_update_does_not_cancel_a_running_blink(strip):
+    _command(cmd="blink", color=list(RED), times=2, interval=0.1)
+    blink = server.animations[0]
+    _command(cmd="off")
+    _command(cmd="multi", leds=[1], color=list(GREEN))
+
+    assert server.compose(blink.started + 0.05) == [RED] * server.num_pixels
+    assert server.compose(blink.started + 0.15) == [OFF] * server.num_pixels
+    # once the blink is done the last static frame shows
+    assert server.compose(blink.started + 0.5)[:3] == [OFF, GREEN, OFF]
+    assert not server.animations
+
+
+def test_overlay_is_drawn_over_the_base_frame(strip):
+    _command(cmd="color", color=list(GREEN))
+    _command(cmd="rotate", color=list(RED), delay=0.1, mode="overlay")
+    rotate = server.animations[0]
+
+    frame = server.compose(rotate.started + 0.25)
+    assert frame[2] == RED
+    assert frame.count(GREEN) == server.num_pixels - 1
+
+    _command(cmd="stop")
+    assert server.compose(rotate.started + 0.25) == [GREEN] * server.num_pixels
+
+
+def test_commands_within_one_frame_are_coalesced(strip):
+    for led in range(server.num_pixels):
+        _command(cmd="multi", leds=[led], color=list(RED))
+    assert server.dirty
+    assert server.push_frame(1.0)
+    assert strip.shows == 1
+    assert strip.values[-1] == RED
+
+    # the same frame again is not pushed to the strip
+    _command(cmd="multi", leds=[server.num_pixels - 1], color=list(RED))
+    assert not server.push_frame(2.0)
+    assert strip.shows == 1
+
+    _command(cmd="max_fps", value=10)
+    assert server.frame_interval() == pytest.approx(0.1)
+
+
+def test_binary_frames_are_decoded_and_stale_ones_dropped(strip):
+    client, sock = socket.socketpair()
+    conn = server.Connection(sock)
+    pixels = [RED, GREEN] + [OFF] * (server.num_pixels - 2)
+    frame = led_protocol.encode_frame(pixels, seq=7)
+    stale = led_protocol.encode_frame([GREEN] * server.num_pixels, seq=6)
+    # split inside the header to check the buffering
+    client.sendall(frame[:3])
+    server.read(conn, selector=None)
+    assert server.base == [OFF] * server.num_pixels
+    client.sendall(frame[3:] + stale)
+    server.read(conn, selector=None)
+
+    assert server.base == pixels
+    assert conn.last_seq == 7
+    client.close()
+    sock.close()
+
+
+def test_frame_with_fade_starts_from_the_shown_frame(strip):
+    _command(cmd="color", color=list(RED))
+    server.handle_message(
+        led_protocol.Frame(1, 1000, [GREEN] * server.num_pixels), server.Connection(None)
+    )
+    fade = server.animations[0]
+
+    assert server.compose(fade.started) == [RED] * server.num_pixels
+    assert server.compose(fade.started + 0.5)[0] == (127, 127, 0)
+    assert server.compose(fade.started + 1.0) == [GREEN] * server.num_pixels
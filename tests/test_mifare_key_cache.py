@@ -0,0 +1,37 @@
+import pytest
+
+import mifare_key_cache
+
+UID = bytearray(b"\x04\xd8\x1c\xea")
+KEY = b"\xff\xff\xff\xff\xff\xff"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    mifare_key_cache.set_path(str(tmp_path / "mifare_keys.json"))
+    yield mifare_key_cache
+    mifare_key_cache.set_path(None)
+
+
+def test_put_get_persists(cache, tmp_path):
+    assert cache.get(UID) is None
+    cache.put(UID, 0x60, KEY)
+
+    # reload from disk
+    cache.set_path(str(tmp_path / "mifare_keys.json"))
+    assert cache.get(UID) == (0x60, KEY)
+
+    cache.forget(UID)
+    assert cache.get(UID) is None
+
+
+def test_lru_is_bounded(cache, monkeypatch):
+    monkeypatch.setattr(mifare_key_cache, "max_entries", 2)
+    cache.put(b"\x01", 0x60, KEY)
+    cache.put(b"\x02", 0x60, KEY)
+    cache.get(b"\x01")  # touch -> \x02 is now least recently used
+    cache.put(b"\x03", 0x61, KEY)
+
+    assert cache.get(b"\x02") is None
+    assert cache.get(b"\x01") == (0x60, KEY)
+    assert cache.get(b"\x03") == (0x61, KEY)
@@ -0,0 +1,145 @@
+import pytest
+from sqlmodel import SQLModel, create_engine
+
+import mifare_key_cache
+import tag_index
+import tag_persistence
+from models import RFIDTag
+from helper.pn532_sim import SimBus, SimTag, load_rfidreaders
+
+
+@pytest.fixture
+def sim(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'tags.db'}")
+    SQLModel.metadata.create_all(engine)
+    monkeypatch.setattr(tag_persistence, "engine", engine)
+    mifare_key_cache.set_path(str(tmp_path / "keys.json"))
+    tag_index.load(
+        [RFIDTag(id=1, rfid_tag="4-216-28-234", name="Ritter", rfid_type="figures")]
+    )
+
+    bus = SimBus(time_scale=0.01)
+    rfid = load_rfidreaders(bus)
+    yield bus, rfid
+
+    tag_persistence.flush()
+    tag_index.load([])
+    mifare_key_cache.set_path(None)
+
+
+def test_known_tag_is_detected_and_removed(sim):
+    bus, rfid = sim
+    bus.place(2, SimTag.mifare([4, 216, 28, 234]))
+    rfid.do_scan_cycle()
+    assert [t.name for t in rfid.tags[2]] == ["Ritter"]
+    assert rfid.get_reader_health()[2] == "ok"
+
+    bus.remove(2)
+    rfid.tag_timer[2] = 0
+    rfid.do_scan_cycle()
+    assert rfid.tags[2] is None
+
+
+def test_new_tags_are_read_from_ndef(sim):
+    bus, rfid = sim
+    bus.place(0, SimTag.ntag213([4, 1, 2, 3, 5, 6, 7], ["animals:Hund"]))
+    bus.place(
+        1,
+        SimTag.mifare(
+            [9, 8, 7, 6],
+            ["figures:Frau"],
+            key=(rfid.MIFARE_CMD_AUTH_B, b"\xff" * 6),
+        ),
+    )
+    rfid.do_scan_cycle()
+    assert [(t.rfid_type, t.name) for t in rfid.tags[0]] == [("animals", "Hund")]
+    assert [(t.rfid_type, t.name) for t in rfid.tags[1]] == [("figures", "Frau")]
+    # The whole NDEF area was fetched with one FAST_READ
+    assert bus.calls.get("ntag2xx_read_block", 0) == 0
+
+
+def test_ntag_without_fast_read_falls_back_to_read(sim):
+    bus, rfid = sim
+    bus.place(0, SimTag.ntag213([4, 1, 2, 3, 5, 6, 7], ["animals:Katze"], fast_read=False))
+    rfid.do_scan_cycle()
+    assert [t.name for t in rfid.tags[0]] == ["Katze"]
+
+
+def test_failing_reader_is_marked_and_reinitialized(sim, monkeypatch):
+    bus, rfid = sim
+    bus.inject_failure(slot=4, command="read_passive_target")
+    for _ in range(rfid.max_reader_failures):
+        rfid.do_scan_cycle()
+    assert rfid.get_reader_health()[4] == "failed"
+    assert rfid.readers[4] is None
+
+    # while it waits for the retry the reader is not touched at all
+    shutdowns = []
+    monkeypatch.setattr(rfid, "shutdown_reader", shutdowns.append)
+    rfid.reader_retry_at[4] = rfid.time.time() + 60
+    rfid.do_scan_cycle()
+    assert 4 not in shutdowns
+
+    bus.clear_failures()
+    rfid.reader_retry_at[4] = 0
+    rfid.do_scan_cycle()
+    assert rfid.get_reader_health()[4] == "ok"
+
+
+def test_known_tag_causes_a_single_placed_event(sim):
+    bus, rfid = sim
+    events = []
+    unsubscribe = rfid.subscribe(events.append, slots=[2])
+    bus.place(2, SimTag.mifare([4, 216, 28, 234]))
+    bus.place(3, SimTag.mifare([4, 216, 28, 234]))
+    rfid.do_scan_cycle()
+    unsubscribe()
+    rfid.do_scan_cycle()
+
+    assert [(e.kind, e.slot) for e in events] == [(rfid.TagEventKind.PLACED, 2)]
+    assert [t.name for t in events[0].new] == ["Ritter"]
+
+
+def test_wait_for_change_sees_events_since_the_checked_version(sim):
+    bus, rfid = sim
+    seen_version = rfid.get_snapshot().version
+    assert rfid.tags[1] is None
+
+    # the tag arrives after the caller looked but before it starts waiting
+    bus.place(1, SimTag.mifare([4, 216, 28, 234]))
+    rfid.do_scan_cycle()
+
+    events = rfid.wait_for_change(timeout=0, slots=[1], since_version=seen_version)
+    assert [e.kind for e in events] == [rfid.TagEventKind.PLACED]
+    # without the version only later changes count
+    assert rfid.wait_for_change(timeout=0, slots=[1]) == []
+    assert rfid.wait_for_change(timeout=0, slots=[0], since_version=seen_version) == []
+
+
+def test_snapshot_is_published_per_change(sim):
+    bus, rfid = sim
+    before = rfid.get_snapshot()
+    bus.place(0, SimTag.mifare([4, 216, 28, 234]))
+    rfid.do_scan_cycle()
+
+    after = rfid.get_snapshot()
+    assert after.version == before.version + 1
+    assert [t.name for t in after.tags[0]] == ["Ritter"]
+    # published snapshots are immutable; the old one still shows the empty slot
+    assert before.tags[0] is None
+    assert rfid.wait_for_snapshot(min_version=after.version, timeout=0) is after
+    assert rfid.wait_for_snapshot(min_version=after.version + 1, timeout=0) is after
+
+
+def test_focused_fields_are_polled_more_often(sim):
+    bus, rfid = sim
+    with rfid.focus_fields([1, 4]):
+        order = rfid.build_sweep_order()
+        assert order.count(1) == order.count(4) == rfid.focus_polls_per_sweep
+        # every other reader still comes up within idle_poll_interval sweeps
+        polled = set(order)
+        for _ in range(rfid.idle_poll_interval - 1):
+            polled.update(rfid.build_sweep_order())
+        assert polled == set(range(6))
+    assert rfid.fields_of_interest == ()
+    assert rfid.build_sweep_order() == list(range(6))
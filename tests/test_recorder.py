@@ -0,0 +1,88 @@
+import io
+import math
+import struct
+
+import pytest
+
+import recorder
+
+
+def _tone(seconds, amplitude, rate=8000):
+    samples = int(seconds * rate)
+    return struct.pack(
+        f"<{samples}h",
+        *(int(amplitude * math.sin(2 * math.pi * 440 * i / rate)) for i in range(samples)),
+    )
+
+
+class _Process:
+    def __init__(self, stdout=None):
+        self.stdout = stdout
+        self.stdin = io.BytesIO()
+        self.stdin.close = lambda: None  # keep the written data readable
+
+
+@pytest.mark.skipif(recorder.audioop is None, reason="audioop not available")
+def test_level_control_raises_quiet_speech_without_clipping():
+    level = recorder.LevelControl(-24)
+    quiet = _tone(0.1, 500)
+    for _ in range(100):
+        out = level.process(quiet)
+    assert recorder.audioop.rms(out, 2) > 2 * recorder.audioop.rms(quiet, 2)
+    assert recorder.audioop.max(out, 2) <= recorder.PEAK_LIMIT
+
+    loud = _tone(0.1, 32000)
+    assert recorder.audioop.max(level.process(loud), 2) <= recorder.PEAK_LIMIT
+
+
+def test_pump_trims_start_and_streams_to_encoder(tmp_path):
+    rec = recorder.StoryRecorder(tmp_path / "story.mp3", rate=8000, trim_length=0.2)
+    rec.level = None
+    pcm = _tone(1.0, 1000, rate=8000)
+    rec._capture = _Process(stdout=io.BytesIO(pcm))
+    rec._encoder = _Process()
+
+    rec._run()
+
+    written = rec._encoder.stdin.getvalue()
+    assert written == pcm[int(0.2 * 8000) * 2 :]
+    assert rec.bytes_recorded == len(written)
+
+
+class _HungProcess:
+    """Capture process that ignores terminate() and only dies on kill()."""
+
+    def __init__(self):
+        self.killed = False
+        self.stdout = io.BytesIO()
+
+    def terminate(self):
+        pass
+
+    def kill(self):
+        self.killed = True
+
+    def wait(self, timeout=None):
+        if not self.killed:
+            raise recorder.subprocess.TimeoutExpired("arecord", timeout)
+        return -9
+
+
+def test_stop_kills_hung_capture_and_keeps_the_story(tmp_path):
+    rec = recorder.StoryRecorder(tmp_path / "story.mp3", rate=8000)
+    rec._capture = _HungProcess()
+    rec._encoder = _Process()
+    rec._encoder.returncode = None
+
+    def encoder_wait(timeout=None):
+        rec.partial.write_bytes(b"mp3")
+        rec._encoder.returncode = 0
+        return 0
+
+    rec._encoder.wait = encoder_wait
+    rec._pump = recorder.threading.Thread(target=rec._run)
+    rec._pump.start()
+
+    assert rec.stop(timeout=0.1) == tmp_path / "story.mp3"
+    assert rec._capture is None
+    assert (tmp_path / "story.mp3").read_bytes() == b"mp3"
@@ -0,0 +1,41 @@
+import scan_metrics
+
+
+def setup_function():
+    scan_metrics.reset()
+
+
+def test_histogram_buckets_are_cumulative():
+    scan_metrics.observe(2, "poll", 0.003)
+    scan_metrics.observe(2, "poll", 0.04)
+    scan_metrics.observe(2, "poll", 9.0)
+
+    text = scan_metrics.render_prometheus()
+
+    assert 'hoorch_rfid_phase_seconds_bucket{reader="2",phase="poll",le="0.005"} 1' in text
+    assert 'hoorch_rfid_phase_seconds_bucket{reader="2",phase="poll",le="0.05"} 2' in text
+    assert 'hoorch_rfid_phase_seconds_bucket{reader="2",phase="poll",le="+Inf"} 3' in text
+    assert 'hoorch_rfid_phase_seconds_count{reader="2",phase="poll"} 3' in text
+
+
+def test_counters_and_reader_state():
+    scan_metrics.count_detection(1, "mifare")
+    scan_metrics.count_detection(1, "mifare")
+    scan_metrics.count_error(4, "auth")
+    scan_metrics.set_reader_state(4, "degraded")
+
+    text = scan_metrics.render_prometheus()
+
+    assert 'hoorch_rfid_detections_total{reader="1",tag_type="mifare"} 2' in text
+    assert 'hoorch_rfid_errors_total{reader="4",phase="auth"} 1' in text
+    assert 'hoorch_rfid_reader_state{reader="4",state="degraded"} 1' in text
+
+
+def test_export_roundtrip(tmp_path):
+    path = tmp_path / "metrics.prom"
+    assert scan_metrics.read_exported(str(path)) is None
+
+    scan_metrics.observe_sweep(0.4)
+    scan_metrics.export(str(path))
+
+    assert "hoorch_rfid_sweep_seconds_count 1" in scan_metrics.read_exported(str(path))
@@ -0,0 +1,30 @@
+import os
+
+import settings
+
+
+def test_values_follow_file_changes(tmp_path, monkeypatch):
+    # set_value() also exports to os.environ; monkeypatch restores it afterwards
+    monkeypatch.delenv("SPEAKER_VOLUME", raising=False)
+    monkeypatch.delenv("OTHER", raising=False)
+    env_file = tmp_path / ".env"
+    env_file.write_text("SPEAKER_VOLUME=40\n")
+    monkeypatch.setattr(settings, "poll_interval", 0.0)
+    settings.set_path(str(env_file))
+
+    assert settings.speaker_volume() == 40
+
+    # Another process rewrites the file
+    env_file.write_text("SPEAKER_VOLUME=70\nOTHER=x\n")
+    os.utime(env_file, ns=(0, 10**9))
+    assert settings.speaker_volume() == 70
+
+    settings.set_value("SPEAKER_VOLUME", 20)
+    assert settings.speaker_volume() == 20
+    assert "SPEAKER_VOLUME=20" in env_file.read_text()
+    assert settings.get("OTHER") == "x"
+
+    monkeypatch.delenv("SPEAKER_VOLUME")
+    settings.set_path(str(tmp_path / "missing.env"))
+    assert settings.speaker_volume(55) == 55
+    settings.set_path("/home/pi/hoorch/.env")
@@ -0,0 +1,48 @@
+import pytest
+
+import speech_cache
+
+
+@pytest.fixture
+def espeak_calls(tmp_path, monkeypatch):
+    calls = []
+
+    def fake_run(cmd, **kwargs):
+        calls.append(cmd)
+        out = cmd[cmd.index("-w") + 1]
+        with open(out, "wb") as f:
+            f.write(b"RIFF" + bytes(996))
+
+    monkeypatch.setattr(speech_cache.subprocess, "run", fake_run)
+    speech_cache.set_cache_dir(tmp_path / "speech")
+    yield calls
+    speech_cache.set_cache_dir(speech_cache.data_path / ".speech_cache")
+
+
+def test_phrase_is_synthesized_once_per_voice_setting(espeak_calls):
+    first = speech_cache.render("Test abgeschlossen.", 10)
+    assert speech_cache.render("Test abgeschlossen.", 10) == first
+    assert len(espeak_calls) == 1
+
+    assert speech_cache.render("Test abgeschlossen.", 50) != first
+    assert len(espeak_calls) == 2
+
+
+def test_least_recently_used_phrases_are_evicted(espeak_calls, monkeypatch):
+    monkeypatch.setattr(speech_cache, "max_bytes", 2500)
+    old = speech_cache.render("eins", 10)
+    used = speech_cache.render("zwei", 10)
+    speech_cache.os.utime(old, ns=(0, 0))
+    speech_cache.render("drei", 10)
+
+    assert not old.exists()
+    assert used.exists()
+
+
+def test_translation_phrases_skip_clip_names_and_templates(tmp_path):
+    (tmp_path / "de.yaml").write_text(
+        'de:\n  admin:\n    wifi_on: "WeiFei ist an."\n    ip_address: "294.mp3"\n'
+        '    hotspot: "Verbinde dich mit {hostname}."\n  other: "WeiFei ist an."\n',
+        encoding="utf-8",
+    )
+    assert speech_cache.translation_phrases(tmp_path) == ["WeiFei ist an."]
@@ -0,0 +1,56 @@
+import json
+import os
+import sys
+
+import pytest
+
+import story_processing
+
+
+@pytest.fixture
+def jobs_file(tmp_path, monkeypatch):
+    # Stand-in for ffmpeg: the processed story is the original plus a marker
+    script = "import sys; data = open(sys.argv[1], 'rb').read(); open(sys.argv[2], 'wb').write(data + b'-normalized')"
+    monkeypatch.setattr(
+        story_processing,
+        "_normalize_cmd",
+        lambda source, target: [sys.executable, "-c", script, str(source), str(target)],
+    )
+    story_processing.set_jobs_file(tmp_path / "jobs.json")
+    yield tmp_path / "jobs.json"
+    story_processing.wait_idle(5)
+    story_processing.set_jobs_file(story_processing.data_path / ".story_jobs.json")
+
+
+def test_story_is_replaced_by_processed_version(tmp_path, jobs_file):
+    story = tmp_path / "story.mp3"
+    story.write_bytes(b"raw")
+
+    assert story_processing.enqueue(story)
+    assert story_processing.wait_idle(5)
+
+    assert story.read_bytes() == b"raw-normalized"
+    assert json.loads(jobs_file.read_text()) == {}
+    assert [p.name for p in tmp_path.iterdir() if p.name.startswith(".")] == []
+
+
+def test_jobs_survive_restart_and_skip_changed_stories(tmp_path, jobs_file):
+    kept = tmp_path / "kept.mp3"
+    kept.write_bytes(b"raw")
+    changed = tmp_path / "changed.mp3"
+    changed.write_bytes(b"old")
+    jobs = {}
+    for path in (kept, changed):
+        st = path.stat()
+        jobs[str(path)] = {"mtime_ns": st.st_mtime_ns, "size": st.st_size, "attempts": 0}
+    jobs_file.write_text(json.dumps(jobs))
+    changed.write_bytes(b"re-recorded")
+    os.utime(changed, ns=(0, 0))
+
+    story_processing.set_jobs_file(jobs_file)
+    assert story_processing.start() == 2
+    assert story_processing.wait_idle(5)
+
+    assert kept.read_bytes() == b"raw-normalized"
+    assert changed.read_bytes() == b"re-recorded"
+    assert story_processing.pending() == 0
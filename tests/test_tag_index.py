@@ -0,0 +1,78 @@
+import pytest
+
+import tag_index
+from models import RFIDTag
+
+
+@pytest.fixture
+def index():
+    tag_index.load(
+        [
+            RFIDTag(id=1, rfid_tag="4-216-28-234", name="Ritter", rfid_type="figures"),
+            RFIDTag(id=2, rfid_tag="4-1-2-3", name="1", rfid_type="numeric"),
+            RFIDTag(id=3, rfid_tag="4-1-2-3", name="ENDE", rfid_type="actions"),
+            RFIDTag(id=4, rfid_tag="", name="Frau", rfid_type="figures"),
+        ]
+    )
+    yield tag_index
+    tag_index.load([])
+
+
+def test_lookup_returns_all_entries_for_uid(index):
+    assert [t.name for t in index.lookup("4-1-2-3")] == ["1", "ENDE"]
+    assert index.lookup("9-9-9-9") == []
+    # tags without an assigned UID are not indexed
+    assert index.lookup("") == []
+
+
+def test_add_replace_remove(index):
+    index.add(RFIDTag(id=5, rfid_tag="9-9-9-9", name="Hund", rfid_type="animals"))
+    assert [t.name for t in index.lookup("9-9-9-9")] == ["Hund"]
+
+    index.replace(RFIDTag(id=4, rfid_tag="7-7-7-7", name="Frau", rfid_type="figures"))
+    assert [t.id for t in index.lookup("7-7-7-7")] == [4]
+
+    index.remove(2)
+    assert [t.name for t in index.lookup("4-1-2-3")] == ["ENDE"]
+
+    index.clear()
+    assert index.lookup("4-216-28-234") == []
+
+
+def test_lookup_returns_stable_objects(index):
+    first = index.lookup("4-216-28-234")
+    second = index.lookup("4-216-28-234")
+    assert first == second
+    assert first[0] is second[0]
+    first.clear()
+    assert index.lookup("4-216-28-234") == second
+
+
+def test_lookup_reloads_after_another_process_wrote(tmp_path, monkeypatch):
+    import database
+    from sqlmodel import Session, SQLModel, create_engine
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'tags.db'}")
+    SQLModel.metadata.create_all(engine)
+    monkeypatch.setattr(database, "engine", engine)
+    monkeypatch.setattr(tag_index, "CHECK_INTERVAL", 0.0)
+    with Session(engine) as session:
+        session.add(RFIDTag(rfid_tag="4-216-28-234", name="Ritter", rfid_type="figures"))
+        session.commit()
+
+    tag_index.load()
+    pending = RFIDTag(rfid_tag="4-5-6-7", name="3", rfid_type="numeric")
+    tag_index.add_pending([pending])
+    assert tag_index.lookup("9-9-9-9") == []
+
+    # the web UI assigns a card through its own connection
+    with Session(engine) as session:
+        session.add(RFIDTag(rfid_tag="9-9-9-9", name="Hund", rfid_type="animals"))
+        session.commit()
+
+    # the lookup that notices the change still answers from the old index
+    assert tag_index.lookup("9-9-9-9") == []
+    tag_index._reloader.join(2)
+    assert [t.name for t in tag_index.lookup("9-9-9-9")] == ["Hund"]
+    assert tag_index.lookup("4-5-6-7")[0] is pending
+    tag_index.load([])
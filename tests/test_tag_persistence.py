@@ -0,0 +1,88 @@
+from sqlmodel import Session, SQLModel, create_engine, select
+
+import tag_index
+import tag_persistence
+from models import RFIDTag
+
+
+def test_persist_indexes_immediately_and_writes_in_background(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'tags.db'}")
+    SQLModel.metadata.create_all(engine)
+    monkeypatch.setattr(tag_persistence, "engine", engine)
+    tag_index.load([])
+
+    queued = tag_persistence.persist(
+        [
+            RFIDTag(rfid_tag="4-1-2-3", name="1", rfid_type="numeric"),
+            RFIDTag(rfid_tag="4-1-2-3", name="ENDE", rfid_type="actions"),
+        ]
+    )
+    assert [t.name for t in tag_index.lookup("4-1-2-3")] == ["1", "ENDE"]
+
+    # already indexed tags are not queued a second time
+    assert tag_persistence.persist(
+        [RFIDTag(rfid_tag="4-1-2-3", name="1", rfid_type="numeric")]
+    ) == []
+
+    tag_persistence.flush()
+    with Session(engine) as session:
+        rows = session.exec(select(RFIDTag).order_by(RFIDTag.id)).all()
+    assert [(r.name, r.rfid_type) for r in rows] == [("1", "numeric"), ("ENDE", "actions")]
+    assert [t.id for t in queued] == [r.id for r in rows]
+
+    tag_index.load([])
+
+
+def test_batch_with_a_tag_already_in_the_database(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'tags.db'}")
+    SQLModel.metadata.create_all(engine)
+    monkeypatch.setattr(tag_persistence, "engine", engine)
+    with Session(engine) as session:
+        existing = RFIDTag(rfid_tag="4-7-7-7", name="Hund", rfid_type="animals")
+        session.add(existing)
+        session.commit()
+        existing_id = existing.id
+    # the index does not know the row yet (e.g. written by the web UI)
+    tag_index.load([])
+
+    queued = tag_persistence.persist(
+        [
+            RFIDTag(rfid_tag="4-7-7-7", name="Hund", rfid_type="animals"),
+            RFIDTag(rfid_tag="4-8-8-8", name="Katze", rfid_type="animals"),
+        ]
+    )
+    tag_persistence.flush()
+
+    assert queued[0].id == existing_id
+    assert queued[1].id is not None
+    assert [t.name for t in tag_index.lookup("4-7-7-7")] == ["Hund"]
+
+    tag_index.load([])
+
+
+def test_failed_batch_is_retried_and_then_removed_from_index(monkeypatch):
+    monkeypatch.setattr(tag_persistence, "RETRY_DELAYS", (0.0,))
+    tag_index.load([])
+    calls = []
+
+    def failing_create(tags, db=None):
+        calls.append(len(tags))
+        raise RuntimeError("database is locked")
+
+    monkeypatch.setattr(tag_persistence.crud, "create_rfid_tags", failing_create)
+
+    tag_persistence.persist([RFIDTag(rfid_tag="4-9-9-9", name="2", rfid_type="numeric")])
+    assert [t.name for t in tag_index.lookup("4-9-9-9")] == ["2"]
+
+    tag_persistence.flush()
+    assert calls == [1, 1]
+    assert tag_index.lookup("4-9-9-9") == []
+
+    # the card is queued again the next time it is seen
+    monkeypatch.setattr(tag_persistence, "_write", lambda batch: None)
+    assert len(tag_persistence.persist(
+        [RFIDTag(rfid_tag="4-9-9-9", name="2", rfid_type="numeric")]
+    )) == 1
+    tag_persistence.flush()
+
+    tag_index.load([])